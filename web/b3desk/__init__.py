@@ -74,6 +74,33 @@ def setup_celery(app):
 
     celery.conf.task_always_eager = app.testing
 
+    if interval := app.config["BIGBLUEBUTTON_MEETINGS_SNAPSHOT_INTERVAL"]:
+        celery.conf.beat_schedule = {
+            **celery.conf.beat_schedule,
+            "refresh-meetings-snapshot": {
+                "task": "refresh_meetings_snapshot",
+                "schedule": interval,
+            },
+        }
+
+    if interval := app.config["RECORDING_RECONCILIATION_INTERVAL"]:
+        celery.conf.beat_schedule = {
+            **celery.conf.beat_schedule,
+            "reconcile-recordings": {
+                "task": "reconcile_recordings",
+                "schedule": interval,
+            },
+        }
+
+    if interval := app.config["NC_CREDENTIALS_RENEWAL_INTERVAL"]:
+        celery.conf.beat_schedule = {
+            **celery.conf.beat_schedule,
+            "renew-nc-credentials": {
+                "task": "renew_nc_credentials",
+                "schedule": interval,
+            },
+        }
+
     class ContextTask(celery.Task):
         abstract = True
 
@@ -384,7 +411,7 @@ def setup_user_session(app):
     from flask_pyoidc.user_session import UserSession
 
     from b3desk import session as b3desk_session
-    from b3desk.models.users import get_or_create_user
+    from b3desk.models.users import get_session_user
 
     @app.before_request
     def load_user():
@@ -395,7 +422,7 @@ def setup_user_session(app):
         try:
             user_session = UserSession(session)
             info = user_session.userinfo
-            g.user = get_or_create_user(info)
+            g.user = get_session_user(info)
         except (KeyError, TypeError):
             return
 
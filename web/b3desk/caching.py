@@ -0,0 +1,121 @@
+"""Protect the cached values that are slow to compute from cache stampedes.
+
+When a popular value expires, every concurrent request misses the cache at
+once, and computes the same value again. The helpers defined here let a single
+caller compute it, shared by every worker and node through the cache, while the
+others wait for its result.
+
+:func:`coalesced` also recomputes values a bit before they expire, with a
+probability growing as the expiration comes closer, so that popular values are
+seldom missing from the cache at all.
+
+See "Optimal Probabilistic Cache Stampede Prevention", Vattani et al., 2015.
+"""
+
+import math
+import random
+import time
+import uuid
+from functools import wraps
+
+from b3desk import cache
+
+# Longer than most computations. Callers waiting for a longer one compute the
+# value themselves.
+LOCK_TIMEOUT = 10
+
+WAIT_INTERVAL = 0.05
+
+
+def single_flight(lock_key, compute, read, wait=LOCK_TIMEOUT, stale=None):
+    """Call ``compute``, unless another caller is already doing it.
+
+    Concurrent callers wait up to ``wait`` seconds for the first one, and
+    return what ``read`` finds in the cache, as soon as it is not None. If
+    nothing comes, they call ``compute`` themselves. When ``stale`` is not
+    None, they return it immediately instead of waiting.
+    """
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+        if stale is not None:
+            return stale
+
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            if (value := read()) is not None:
+                return value
+            if cache.get(lock_key) is None:
+                break
+
+        if (value := read()) is not None:
+            return value
+        return compute()
+
+    try:
+        # The value may have been computed since the caller missed it.
+        if stale is None and (value := read()) is not None:
+            return value
+        return compute()
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def should_recompute_early(entry, beta):
+    """Decide whether to recompute a cached value before it expires.
+
+    The longer the value took to compute, the earlier it is recomputed.
+    ``beta`` above 1 favors earlier recomputations.
+    """
+    return (
+        time.time() - entry["delta"] * beta * math.log(1 - random.random())
+        >= entry["expires_at"]
+    )
+
+
+def coalesced(key_prefix, timeout, beta=1.0):
+    """Cache the result of a function, computed by a single caller at once.
+
+    ``timeout`` is a number of seconds, or a function of the result returning
+    it. Results with a null timeout are not cached. The cache key of a
+    function called without arguments is ``key_prefix`` itself.
+    """
+
+    def decorator(f):
+        def make_key(*args):
+            return ":".join([key_prefix, *map(str, args)])
+
+        @wraps(f)
+        def decorated_function(*args):
+            key = make_key(*args)
+            entry = cache.get(key)
+            if entry is not None and not should_recompute_early(entry, beta):
+                return entry["value"]
+
+            def compute():
+                start = time.monotonic()
+                value = f(*args)
+                delta = time.monotonic() - start
+                duration = timeout(value) if callable(timeout) else timeout
+                if duration:
+                    cache.set(
+                        key,
+                        {
+                            "value": value,
+                            "delta": delta,
+                            "expires_at": time.time() + duration,
+                        },
+                        timeout=duration,
+                    )
+                return {"value": value}
+
+            return single_flight(
+                f"{key}:lock", compute, lambda: cache.get(key), stale=entry
+            )["value"]
+
+        decorated_function.uncached = f
+        decorated_function.make_cache_key = make_key
+        return decorated_function
+
+    return decorator
@@ -11,18 +11,24 @@ bp = Blueprint("commands", __name__, cli_group=None)
 
 
 @bp.cli.command("get-apps-id")
-@click.argument("email")
-def get_apps_id(email):
-    """CLI command to retrieve user ID from secondary identity provider using email."""
-    from b3desk.nextcloud import get_secondary_identity_provider_id_from_email
+@click.argument("emails", nargs=-1, required=True)
+def get_apps_id(emails):
+    """CLI command to retrieve user IDs from secondary identity provider using emails."""
+    from b3desk.nextcloud import MissingToken
+    from b3desk.nextcloud import get_secondary_identity_provider_ids_from_emails
 
     try:
-        secondary_id = get_secondary_identity_provider_id_from_email(email)
+        secondary_ids = get_secondary_identity_provider_ids_from_emails(emails)
+    except (requests.RequestException, MissingToken) as e:
+        current_app.logger.error(e)
+        return
+
+    for email in emails:
         current_app.logger.info(
-            "ID from secondary identity provider for email %s: %s", email, secondary_id
+            "ID from secondary identity provider for email %s: %s",
+            email,
+            secondary_ids.get(email),
         )
-    except requests.RequestException as e:
-        current_app.logger.error(e)
 
 
 @bp.cli.command("delete-old-shadow-meetings")
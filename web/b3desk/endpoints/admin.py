@@ -7,6 +7,7 @@ from flask import render_template
 from flask import request
 from flask import url_for
 from flask_babel import lazy_gettext as _
+from sqlalchemy import func
 from sqlalchemy import or_
 from sqlalchemy.exc import IntegrityError
 
@@ -20,6 +21,8 @@ from b3desk.models.groups import Group
 from b3desk.models.meetings import Meeting
 from b3desk.models.roles import Role
 from b3desk.models.users import User
+from b3desk.pagination import keyset_paginate
+from b3desk.transport import pool_statistics
 
 from ..session import admin_needed
 
@@ -29,8 +32,16 @@ bp = Blueprint("admin", __name__)
 PER_PAGE = 50
 
 
-def get_groups_paginate(per_page, data):
-    query = db.select(Group).order_by(Group.created_at)
+def page_cursors():
+    """Read the keyset pagination cursors of the request."""
+    return {
+        "after": request.args.get("after", type=int),
+        "before": request.args.get("before", type=int),
+    }
+
+
+def get_groups_paginate(per_page, data, after=None, before=None):
+    query = db.select(Group)
     if data:
         query = query.where(
             or_(
@@ -38,11 +49,18 @@ def get_groups_paginate(per_page, data):
                 Group.name.ilike(f"%{data}%"),
             )
         )
-    return db.paginate(query, per_page=per_page)
+    return keyset_paginate(
+        query,
+        Group,
+        (Group.created_at, Group.id),
+        per_page=per_page,
+        after=after,
+        before=before,
+    )
 
 
-def get_meetings_paginate(per_page, data):
-    query = db.select(Meeting).order_by(Meeting.created_at)
+def get_meetings_paginate(per_page, data, after=None, before=None):
+    query = db.select(Meeting)
     if data:
         query = query.where(
             or_(
@@ -51,11 +69,18 @@ def get_meetings_paginate(per_page, data):
                 Meeting.visio_code == data,
             )
         )
-    return db.paginate(query, per_page=per_page)
+    return keyset_paginate(
+        query,
+        Meeting,
+        (Meeting.created_at, Meeting.id),
+        per_page=per_page,
+        after=after,
+        before=before,
+    )
 
 
-def get_group_members_paginate(group, per_page, data=None):
-    members = group.get_all_members
+def get_group_members_paginate(group, per_page, data=None, after=None, before=None):
+    members = group.get_all_members.order_by(None)
     if data:
         members = members.where(
             or_(
@@ -65,11 +90,22 @@ def get_group_members_paginate(group, per_page, data=None):
                 User.email.ilike(f"%{data}%"),
             )
         )
-    return db.paginate(members, per_page=per_page)
+    return keyset_paginate(
+        members,
+        User,
+        (
+            func.coalesce(User.family_name, ""),
+            func.coalesce(User.given_name, ""),
+            User.id,
+        ),
+        per_page=per_page,
+        after=after,
+        before=before,
+    )
 
 
-def get_users_paginate(per_page, data=None):
-    query = db.select(User).order_by(User.created_at)
+def get_users_paginate(per_page, data=None, after=None, before=None):
+    query = db.select(User)
     if data:
         query = query.where(
             or_(
@@ -79,7 +115,14 @@ def get_users_paginate(per_page, data=None):
                 User.email.ilike(f"%{data}%"),
             )
         )
-    return db.paginate(query, per_page=per_page)
+    return keyset_paginate(
+        query,
+        User,
+        (User.created_at, User.id),
+        per_page=per_page,
+        after=after,
+        before=before,
+    )
 
 
 @bp.route("/admin/home")
@@ -91,13 +134,20 @@ def home():
     )
 
 
+@bp.route("/admin/http-pools")
+@admin_needed
+def http_pools():
+    """Return the HTTP connection pool statistics of the current worker."""
+    return pool_statistics()
+
+
 @bp.route("/admin/users")
 @admin_needed
 def manage_users():
     """Display user list to manage users."""
     form = UserSearchForm(request.args)
     data = form.search.data.lower() if form.search.data else None
-    users_page = get_users_paginate(per_page=PER_PAGE, data=data)
+    users_page = get_users_paginate(per_page=PER_PAGE, data=data, **page_cursors())
     return render_template(
         "admin/users.html",
         admin_mode=True,
@@ -126,7 +176,9 @@ def manage_meetings():
     """Display meeting list to manage meetings."""
     form = MeetingSearchForm(request.args)
     data = form.search.data.lower() if form.search.data else None
-    meetings_page = get_meetings_paginate(per_page=PER_PAGE, data=data)
+    meetings_page = get_meetings_paginate(
+        per_page=PER_PAGE, data=data, **page_cursors()
+    )
     return render_template(
         "admin/meetings.html",
         admin_mode=True,
@@ -143,6 +195,7 @@ def meeting_infos(meeting: Meeting):
     meeting.moderator_url = get_signin_url(meeting, Role.moderator)
     meeting.attendee_url = get_signin_url(meeting, Role.attendee)
     meeting.authenticated_url = get_signin_url(meeting, Role.authenticated)
+    meeting.has_delegates = bool(meeting.get_all_delegates)
     return render_template(
         "admin/meeting_infos.html",
         admin_mode=True,
@@ -206,7 +259,7 @@ def manage_groups():
     """Display group list to manage groups of admin page."""
     form = GroupSearchForm(request.args)
     data = form.search.data.lower() if form.search.data else None
-    groups_page = get_groups_paginate(per_page=PER_PAGE, data=data)
+    groups_page = get_groups_paginate(per_page=PER_PAGE, data=data, **page_cursors())
     return render_template(
         "admin/groups.html",
         groups_page=groups_page,
@@ -264,7 +317,9 @@ def manage_group_members(group: Group):
     """Display group members list and member addition of admin page."""
     form = UserSearchForm(request.args)
     data = form.search.data.lower() if form.search.data else None
-    members_page = get_group_members_paginate(group, per_page=PER_PAGE, data=data)
+    members_page = get_group_members_paginate(
+        group, per_page=PER_PAGE, data=data, **page_cursors()
+    )
     return render_template(
         "admin/group_members.html",
         group=group,
@@ -323,7 +378,7 @@ def add_group_members_page(group: Group):
     """Display non member users list to add members."""
     form = UserSearchForm(request.args)
     data = form.search.data.lower() if form.search.data else None
-    users_page = get_users_paginate(per_page=PER_PAGE, data=data)
+    users_page = get_users_paginate(per_page=PER_PAGE, data=data, **page_cursors())
     return render_template(
         "admin/add_group_members_page.html",
         group=group,
@@ -3,6 +3,7 @@ from flask import current_app
 from flask import request
 
 from b3desk.join import get_signin_url
+from b3desk.models.bbb import BBBBatch
 from b3desk.models.meetings import get_or_create_shadow_meeting
 from b3desk.models.roles import Role
 from b3desk.models.users import get_or_create_user
@@ -26,6 +27,12 @@ def api_meetings():
     owned = [(meeting, False) for meeting in user.meetings if not meeting.is_shadow]
     delegated = [(meeting, True) for meeting in user.get_all_delegated_meetings]
 
+    running = {}
+    if request.args.get("running", False, type=lambda x: x.lower() == "true"):
+        running = BBBBatch(
+            meeting.meetingID for meeting, _ in owned + delegated
+        ).is_running()
+
     return {
         "meetings": [
             {
@@ -51,6 +58,11 @@ def api_meetings():
                     if meeting.owner.can_use_sip
                     else {}
                 ),
+                **(
+                    {"running": running[meeting.meetingID]}
+                    if meeting.meetingID in running
+                    else {}
+                ),
             }
             for meeting, is_delegate in owned + delegated
         ]
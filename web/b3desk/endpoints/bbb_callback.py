@@ -1,3 +1,4 @@
+import contextlib
 import logging
 
 from flask import Blueprint
@@ -15,6 +16,7 @@ from b3desk.models.meetings import get_meeting_from_bbb_meeting_id
 from b3desk.tasks import RECORDING_CACHE_TTL
 from b3desk.tasks import recording_notified_key
 from b3desk.tasks import recording_scheduled_key
+from b3desk.tasks import refresh_recording
 from b3desk.tasks import send_recording_notification
 
 bp = Blueprint("bbb-callback", __name__)
@@ -31,6 +33,19 @@ def get_recording_status_callback_url():
     )
 
 
+def decode_signed_parameters(signed_parameters):
+    """Decode the parameters of a callback, signed by any of the BBB servers."""
+    from b3desk.models.bbb import get_bbb_servers
+
+    *servers, last_server = get_bbb_servers()
+    for server in servers:
+        with contextlib.suppress(BadSignatureError):
+            return jwt.decode(
+                signed_parameters, OctKey.import_key(server.secret.encode())
+            )
+    return jwt.decode(signed_parameters, OctKey.import_key(last_server.secret.encode()))
+
+
 @csrf.exempt
 @bp.route("/bbb-callback/recording_status", methods=["POST"])
 def recording_status():
@@ -46,6 +61,10 @@ def recording_status():
     ``send_recording_notification`` task re-queries BBB each time and
     guards against duplicate mails with an atomic cache flag.
 
+    Each check stores the recording and its available formats, so the
+    recordings page does not need to query BBB. Once the notification is sent,
+    callbacks for new formats only store them.
+
     Returns 410 on definitively invalid payloads to stop BBB retries
     (BBB only stops retrying on 2xx and 410, per the API documentation).
     """
@@ -54,10 +73,8 @@ def recording_status():
         logger.error("Missing 'signed_parameters' in callback payload")
         return "", 410
 
-    key = OctKey.import_key(current_app.config["BIGBLUEBUTTON_SECRET"].encode())
-
     try:
-        token = jwt.decode(signed_parameters, key)
+        token = decode_signed_parameters(signed_parameters)
     except (BadSignatureError, DecodeError) as e:
         logger.error("Invalid signature on callback: %s", e)
         return "", 401
@@ -76,11 +93,14 @@ def recording_status():
     if not meeting:
         return "", 410
 
+    meeting.bbb.forget_cached_responses([bbb_recording_id])
+
     if cache.get(recording_notified_key(bbb_recording_id)):
         logger.info(
-            "Recording notification already sent for %s, ignoring callback",
+            "Recording notification already sent for %s, storing the recording",
             bbb_recording_id,
         )
+        refresh_recording.delay(meeting.id, bbb_recording_id)
         return "", 200
 
     is_first_callback = cache.add(
@@ -6,6 +6,7 @@ from flask import current_app
 from flask import request
 
 from b3desk import cache
+from b3desk.caching import coalesced
 from b3desk.session import visio_code_attempt_counter_reset
 
 bp = Blueprint("captcha", __name__)
@@ -15,9 +16,16 @@ DEFAULT_TOKEN_EXPIRY = timedelta(hours=1)
 
 def get_captchetat_token():
     """Retrieve and cache OAuth access token for captchetat service."""
-    if token := cache.get(CACHE_KEY_CAPTCHETAT_CREDENTIALS):
-        return token
+    credentials = get_captchetat_credentials()
+    return credentials["access_token"] if credentials else None
 
+
+@coalesced(
+    CACHE_KEY_CAPTCHETAT_CREDENTIALS,
+    timeout=lambda credentials: credentials["expires_in"] if credentials else 0,
+)
+def get_captchetat_credentials():
+    """Request an OAuth access token for captchetat service, and its lifetime."""
     url = f"{current_app.config['PISTE_OAUTH_API_URL']}/oauth/token"
     form_data = {
         "grant_type": "client_credentials",
@@ -33,10 +41,12 @@ def get_captchetat_token():
         return None
 
     response = response.json()
-    token = response["access_token"]
-    timeout = response.get("expires_in", int(DEFAULT_TOKEN_EXPIRY.total_seconds()))
-    cache.set(CACHE_KEY_CAPTCHETAT_CREDENTIALS, token, timeout=timeout)
-    return token
+    return {
+        "access_token": response["access_token"],
+        "expires_in": response.get(
+            "expires_in", int(DEFAULT_TOKEN_EXPIRY.total_seconds())
+        ),
+    }
 
 
 @bp.route("/simple-captcha-endpoint", methods=["GET"])
@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from flask import Blueprint
+from flask import Response
 from flask import abort
 from flask import current_app
 from flask import flash
@@ -29,6 +30,8 @@ from b3desk.session import visio_code_attempt_counter_increment
 from b3desk.session import visio_code_attempt_counter_reset
 from b3desk.utils import check_oidc_connection
 from b3desk.utils import check_token_errors
+from b3desk.waiting_room import can_stream_events
+from b3desk.waiting_room import meeting_events
 
 from .. import auth
 from ..session import get_authenticated_attendee_fullname
@@ -172,6 +175,32 @@ def waiting_meeting(
         seconds_before_refresh=seconds_before_refresh,
         quick_meeting=quick_meeting,
         meeting_name=meeting.name,
+        stream_events=can_stream_events(),
+    )
+
+
+@bp.route("/meeting/wait/<meeting_fake_id>/hash/<hash_>/events")
+def waiting_meeting_events(meeting_fake_id, hash_):
+    """Stream a 'started' Server-Sent-Event as soon as the meeting is started.
+
+    This lets the waiting room join the meeting without reloading the page.
+    """
+    meeting = get_meeting_from_meeting_id(meeting_fake_id)
+    if meeting is None or not get_role(meeting, hash_, g.user):
+        abort(404)
+
+    # A 204 response stops the browser from reconnecting, and the page reloads.
+    if not can_stream_events():
+        return Response(status=204)
+
+    # The stream lasts much longer than the request, the database connection
+    # is given back to the pool before it starts.
+    events = meeting_events(current_app._get_current_object(), meeting.meetingID)
+    db.session.remove()
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -1,4 +1,4 @@
-import secrets
+import mimetypes
 import uuid
 from datetime import date
 from pathlib import Path
@@ -6,8 +6,8 @@ from pathlib import Path
 import filetype
 import requests
 from flask import Blueprint
+from flask import Response
 from flask import abort
-from flask import after_this_request
 from flask import current_app
 from flask import flash
 from flask import g
@@ -15,13 +15,15 @@ from flask import redirect
 from flask import render_template
 from flask import request
 from flask import send_file
-from flask import send_from_directory
 from flask import url_for
 from flask_babel import lazy_gettext as _
 from sqlalchemy import exc
-from webdav3.exceptions import WebDavException
+from webdav3.exceptions import RemoteResourceNotFound
+from webdav3.exceptions import ResponseErrorCode
+from werkzeug.http import unquote_etag
 from werkzeug.utils import secure_filename
 
+from b3desk.file_cache import FileCache
 from b3desk.forms import MeetingFilesForm
 from b3desk.models import db
 from b3desk.models.bbb import BBB
@@ -32,7 +34,12 @@ from b3desk.models.meetings import MeetingFiles
 from b3desk.models.meetings import get_meeting_file_hash
 from b3desk.models.users import User
 from b3desk.nextcloud import create_webdav_client
+from b3desk.nextcloud import get_nextcloud_directory
+from b3desk.nextcloud import get_nextcloud_files_info
 from b3desk.nextcloud import is_nextcloud_available
+from b3desk.uploads import ChunkedUpload
+from b3desk.uploads import get_upload_status
+from b3desk.uploads import start_nextcloud_push
 from b3desk.utils import check_oidc_connection
 
 from .. import auth
@@ -41,6 +48,22 @@ from ..session import meeting_access_required
 from ..session import user_needed
 
 REQUEST_TIMEOUT = 10
+STREAM_CHUNK_SIZE = 64 * 1024
+FORWARDED_REQUEST_HEADERS = (
+    "Accept-Encoding",
+    "Range",
+    "If-Range",
+    "If-None-Match",
+    "If-Modified-Since",
+)
+FORWARDED_RESPONSE_HEADERS = (
+    "Content-Length",
+    "Content-Encoding",
+    "Content-Range",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+)
 bp = Blueprint("meeting_files", __name__)
 
 
@@ -100,21 +123,16 @@ def download_meeting_files(meeting: Meeting, meeting_file: MeetingFiles, user: U
     if meeting_file.meeting_id != meeting.id:
         abort(404)
 
-    tmp_download_dir = Path(current_app.config["TMP_DOWNLOAD_DIR"])
-    tmp_download_dir.mkdir(parents=True, exist_ok=True)
-    tmp_name = tmp_download_dir / secrets.token_urlsafe(32)
-
-    @after_this_request
-    def cleanup(response):
-        if tmp_name.exists():
-            tmp_name.unlink()
-        return response
-
     if meeting_file.url:
-        response = requests.get(meeting_file.url)
-        with tmp_name.open("wb") as f:
-            f.write(response.content)
-        return send_file(tmp_name, as_attachment=True, download_name=meeting_file.title)
+        upstream = requests.get(
+            meeting_file.url,
+            headers=forwarded_request_headers(),
+            stream=True,
+            timeout=REQUEST_TIMEOUT,
+        )
+        return stream_response(
+            upstream, download_name=meeting_file.title, as_attachment=True
+        )
 
     # get file from nextcloud WEBDAV and send it
     nc_available = is_nextcloud_available(
@@ -132,8 +150,10 @@ def download_meeting_files(meeting: Meeting, meeting_file: MeetingFiles, user: U
         return redirect(url_for("public.welcome"))
 
     client = create_webdav_client(meeting_file.owner)
-    client.download_sync(remote_path=meeting_file.nc_path, local_path=tmp_name)
-    return send_file(tmp_name, as_attachment=True, download_name=meeting_file.title)
+    upstream = open_nextcloud_download(client, meeting_file.nc_path)
+    return stream_response(
+        upstream, download_name=meeting_file.title, as_attachment=True
+    )
 
 
 @bp.route(
@@ -156,18 +176,16 @@ def toggledownload(meeting: Meeting, meeting_file: MeetingFiles, user: User):
     return {"id": meeting_file.id}
 
 
-def remove_uploaded_file(absolute_path):
-    """Remove a file from the upload temporary directory."""
-    Path(absolute_path).unlink()
+def add_meeting_file_from_upload(title, meeting_id):
+    """Push an uploaded file to Nextcloud and associate it with a meeting.
 
+    The push is done by a Celery task, whose progress can be polled.
+    """
+    upload = ChunkedUpload(g.user.id, meeting_id, title)
+    if not upload.is_complete:
+        return {"msg": _("Fichier introuvable")}, 404
 
-def add_meeting_file_from_upload(title, meeting_id):
-    """Upload a file to Nextcloud and associate it with a meeting."""
-    upload_chunk_dir = Path(current_app.config["UPLOAD_DIR"]) / "chunks"
-    upload_chunk_dir.mkdir(parents=True, exist_ok=True)
-    upload_path = upload_chunk_dir / f"{g.user.id}-{meeting_id}-{title}"
-    metadata = upload_path.stat()
-    if int(metadata.st_size) > current_app.config["MAX_SIZE_UPLOAD"]:
+    if upload.path.stat().st_size > current_app.config["MAX_SIZE_UPLOAD"]:
         return {
             "msg": _(
                 "Fichier {title} trop volumineux, ne pas dépasser {max_size}Mo"
@@ -177,7 +195,7 @@ def add_meeting_file_from_upload(title, meeting_id):
             )
         }, 413
 
-    if (client := create_webdav_client(g.user)) is None:
+    if create_webdav_client(g.user) is None:
         current_app.logger.warning(
             "WebDAV error: User %s has no credentials", g.user.id
         )
@@ -188,40 +206,9 @@ def add_meeting_file_from_upload(title, meeting_id):
             )
         }, 503
 
-    client.mkdir("visio-agents")  # does not fail if dir already exists
-    nc_path = f"visio-agents/{title}"
-    client.upload_sync(remote_path=nc_path, local_path=upload_path)
-    remove_uploaded_file(upload_path)
-
-    meeting_file = MeetingFiles(
-        nc_path=nc_path,
-        title=title,
-        created_at=date.today(),
-        meeting_id=meeting_id,
-        owner=g.user,
-    )
-
-    try:
-        db.session.add(meeting_file)
-        db.session.commit()
-
-    except exc.SQLAlchemyError as exception:
-        current_app.logger.error("SQLAlchemy error: %s", exception)
-        try:
-            client.clean(nc_path)
-        except WebDavException as cleanup_error:
-            current_app.logger.warning(
-                "Failed to cleanup Nextcloud file %s: %s", nc_path, cleanup_error
-            )
-        return {"msg": _("Le fichier a déjà été mis en ligne")}, 409
-
-    return {
-        "title": meeting_file.short_title,
-        "id": meeting_file.id,
-        "created_at": meeting_file.created_at.strftime(
-            current_app.config["TIME_FORMAT"]
-        ),
-    }
+    meeting = db.session.get(Meeting, meeting_id)
+    upload_id = start_nextcloud_push(g.user, meeting_id, title)
+    return upload_status_response(meeting, upload_id, get_upload_status(upload_id))
 
 
 def add_meeting_file_URL(url, meeting_id):
@@ -293,9 +280,13 @@ def add_meeting_file_nextcloud(path, meeting_id):
             )
         }, 503
 
-    metadata = client.info(path)
+    # Files are usually added from the directory just browsed in the picker,
+    # whose listing is cached
+    metadata = get_nextcloud_files_info(g.user, client, [path]).get(path.strip("/"))
+    if metadata is None:
+        raise RemoteResourceNotFound(path)
 
-    if int(metadata["size"]) > current_app.config["MAX_SIZE_UPLOAD"]:
+    if (metadata["size"] or 0) > current_app.config["MAX_SIZE_UPLOAD"]:
         return {
             "msg": _(
                 "Fichier {path} trop volumineux, ne pas dépasser {max_size}Mo"
@@ -346,47 +337,103 @@ def create_external_meeting_file(path, owner, meeting_id=None):
 @auth.oidc_auth("default")
 @meeting_access_required(AccessLevel.DELEGATE)
 def upload_file_chunks(meeting: Meeting, user: User):
-    """Handle chunked file uploads."""
+    """Handle chunked file uploads.
+
+    Chunks can be sent in parallel and in any order. The upload is checked once
+    all its chunks have been received.
+    """
     file = request.files["dropzoneFiles"]
-    upload_chunk_dir = Path(current_app.config["UPLOAD_DIR"]) / "chunks"
-    upload_chunk_dir.mkdir(parents=True, exist_ok=True)
-    save_path = upload_chunk_dir / secure_filename(
-        f"{user.id}-{meeting.id}-{file.filename}"
-    )
-    current_chunk = int(request.form["dzchunkindex"])
+    upload = ChunkedUpload(user.id, meeting.id, file.filename)
 
-    # If the file already exists it's ok if we are appending to it,
-    # but not if it's new file that would overwrite the existing one
-    if save_path.exists() and current_chunk == 0:
+    # Chunks of an incomplete upload can be sent again, but a complete file
+    # must not be overwritten
+    if upload.is_complete:
         return {"msg": _("Le fichier a déjà été mis en ligne")}, 409
 
     try:
-        with save_path.open("ab") as f:
-            f.seek(int(request.form["dzchunkbyteoffset"]))
-            f.write(file.stream.read())
+        manifest = upload.write_chunk(
+            file.stream,
+            offset=int(request.form["dzchunkbyteoffset"]),
+            total_size=int(request.form["dztotalfilesize"]),
+        )
 
     except OSError:
         return {"msg": _("Erreur lors de l'écriture du fichier sur le disque")}, 500
 
-    total_chunks = int(request.form["dztotalchunkcount"])
+    # The last chunk must end exactly at the announced size, whichever order
+    # the chunks are received in
+    received_size = manifest["ranges"][-1][1]
+    is_last_chunk = int(request.form["dzchunkindex"]) + 1 == int(
+        request.form["dztotalchunkcount"]
+    )
+    if received_size > manifest["total_size"] or (
+        is_last_chunk and received_size != manifest["total_size"]
+    ):
+        upload.remove()
+        return {"msg": _("Erreur de taille du fichier")}, 400
 
-    if current_chunk + 1 == total_chunks:
-        # This was the last chunk, the file should be complete and the size we expect
-        mimetype = filetype.guess(save_path)
+    if manifest["complete"]:
+        mimetype = filetype.guess(upload.path)
         if (
             mimetype
             and mimetype.mime
             not in current_app.config["ALLOWED_MIME_TYPES_SERVER_SIDE"]
         ):
-            save_path.unlink()
+            upload.remove()
             return {"msg": _("Type de fichier non autorisé")}, 400
 
-        if save_path.stat().st_size != int(request.form["dztotalfilesize"]):
-            save_path.unlink()
-            return {"msg": _("Erreur de taille du fichier")}, 400
+    current_app.logger.debug(f"Wrote a chunk at {upload.path}")
+    return {"msg": "ok", "received": manifest["ranges"]}, 200
 
-    current_app.logger.debug(f"Wrote a chunk at {save_path}")
-    return {"msg": "ok"}, 200
+
+@bp.route("/meeting/files/<meeting:meeting>/upload/<path:filename>")
+@check_oidc_connection(auth)
+@auth.oidc_auth("default")
+@meeting_access_required(AccessLevel.DELEGATE)
+def upload_file_chunks_status(meeting: Meeting, user: User, filename):
+    """Return the byte ranges received for an upload, so it can be resumed."""
+    manifest = ChunkedUpload(user.id, meeting.id, filename).manifest
+    if manifest is None:
+        return {"received": [], "complete": False}
+
+    return {"received": manifest["ranges"], "complete": manifest["complete"]}
+
+
+@bp.route("/meeting/files/<meeting:meeting>/push/<upload_id>")
+@check_oidc_connection(auth)
+@auth.oidc_auth("default")
+@meeting_access_required(AccessLevel.DELEGATE)
+def nextcloud_push_status(meeting: Meeting, user: User, upload_id):
+    """Return the progress of the push of an upload to Nextcloud."""
+    status = get_upload_status(upload_id)
+    if not status or status["meeting_id"] != meeting.id:
+        abort(404)
+
+    return upload_status_response(meeting, upload_id, status)
+
+
+def upload_status_response(meeting, upload_id, status):
+    """Build the response describing the state of a push to Nextcloud.
+
+    The meeting file is returned once the push is done, an error message if it
+    failed, and the progress with a 202 code while it is running.
+    """
+    if status["state"] == "done":
+        return status["file"]
+
+    if status["state"] == "error":
+        return {"msg": status["msg"]}, status["code"]
+
+    return {
+        "state": status["state"],
+        "sent": status["sent"],
+        "size": status["size"],
+        "status_url": url_for(
+            "meeting_files.nextcloud_push_status",
+            meeting=meeting,
+            upload_id=upload_id,
+        ),
+    }, 202
 
 
 @bp.route("/meeting/files/delete", methods=["POST"])
@@ -429,7 +476,8 @@ def file_picker(user: User, bbb_meeting_id: str):
     This endpoint is used by BBB during the meetings.
     It is configurated by the 'presentationUploadExternalUrl' parameter on the creation request.
     """
-    if BBB(bbb_meeting_id).is_running():
+    # The meeting may have been created since the last snapshot.
+    if BBB(bbb_meeting_id).is_running(use_snapshot=False):
         nc_available = is_nextcloud_available(
             user, verify=True, retry_on_auth_error=True
         )
@@ -456,12 +504,66 @@ def file_picker_callback(user: User, bbb_meeting_id: str):
     This makes BBB download the document from the 'ncdownload' endpoint.
     """
     filenames = request.get_json()
+    if (client := create_webdav_client(user)) is None:
+        return {
+            "msg": _(
+                "Le service de fichiers est temporairement indisponible. "
+                "Veuillez réessayer dans quelques minutes."
+            )
+        }, 503
+
+    # Picked files often come from the same directory, and are looked up
+    # together with a single listing
+    infos = get_nextcloud_files_info(user, client, filenames)
+    rejected = [filename for filename in filenames if filename.strip("/") not in infos]
+    if rejected:
+        current_app.logger.warning(
+            "Missing Nextcloud files not sent to BBB: %s", rejected
+        )
+
     meeting_files = [
-        create_external_meeting_file(filename, g.user) for filename in filenames
+        create_external_meeting_file(filename, g.user)
+        for filename in filenames
+        if filename not in rejected
     ]
     BBB(bbb_meeting_id).send_meeting_files(meeting_files)
 
-    return {"msg": "SUCCESS"}
+    return {"msg": "SUCCESS", "rejected": rejected}
+
+
+@bp.route("/nextcloud/files")
+@check_oidc_connection(auth)
+@auth.oidc_auth("default")
+@user_needed
+def nextcloud_directory(user: User):
+    """List a directory of the user's Nextcloud account, page by page.
+
+    The ``path`` parameter is relative to the root of the account, and
+    ``page`` starts at 1.
+    """
+    path = request.args.get("path", "")
+    page = max(request.args.get("page", 1, type=int), 1)
+    if (client := create_webdav_client(user)) is None:
+        return {
+            "msg": _(
+                "Le service de fichiers est temporairement indisponible. "
+                "Veuillez réessayer dans quelques minutes."
+            )
+        }, 503
+
+    try:
+        entries = get_nextcloud_directory(user, client, path)
+    except RemoteResourceNotFound:
+        return {"msg": _("Fichier introuvable")}, 404
+
+    page_size = current_app.config["NC_LISTING_PAGE_SIZE"]
+    return {
+        "path": path.strip("/"),
+        "page": page,
+        "pages": max(-(-len(entries) // page_size), 1),
+        "total": len(entries),
+        "entries": entries[(page - 1) * page_size : page * page_size],
+    }
 
 
 @bp.route("/ncdownload/<token>/<user:user>/<path:ncpath>")
@@ -471,11 +573,6 @@ def ncdownload(token, user, ncpath):
     if token != get_meeting_file_hash(user.id, ncpath):
         abort(404, "Bad token provided, no file matching")
 
-    tmp_download_dir = Path(current_app.config["TMP_DOWNLOAD_DIR"])
-    tmp_download_dir.mkdir(parents=True, exist_ok=True)
-    uniqfile = str(uuid.uuid4())
-    tmp_name = tmp_download_dir / uniqfile
-
     if not is_nextcloud_available(user):
         return {
             "msg": _(
@@ -485,17 +582,141 @@ def ncdownload(token, user, ncpath):
         }, 503
 
     client = create_webdav_client(user)
-
-    @after_this_request
-    def cleanup(response):
-        if tmp_name.exists():
-            tmp_name.unlink()
+    download_name = ncpath.split("/")[-1]
+    file_cache = get_file_cache()
+    if file_cache is None or "Range" in request.headers:
+        upstream = open_nextcloud_download(client, ncpath)
+        return stream_response(upstream, download_name=download_name)
+
+    # Revalidate the cached copy, Nextcloud answers 304 if the ETag still matches.
+    # The cached copy is served to every client, so it is never compressed.
+    cached = file_cache.get(user.id, ncpath)
+    headers = {"Accept-Encoding": "identity"}
+    if cached:
+        headers["If-None-Match"] = cached[1]["etag"]
+    upstream = client.open_download(ncpath, headers=headers)
+    if cached and upstream.status_code == 304:
+        upstream.close()
+        data_path, metadata = cached
+        etag, _weak = unquote_etag(metadata["etag"])
+        response = send_file(
+            data_path,
+            mimetype=metadata["content_type"],
+            download_name=download_name,
+            etag=etag,
+            conditional=True,
+        )
+        if content_encoding := metadata.get("content_encoding"):
+            response.headers["Content-Encoding"] = content_encoding
         return response
 
-    mimetype = client.info(ncpath).get("content_type")
-    client.download_sync(remote_path=ncpath, local_path=tmp_name)
+    writer = file_cache.writer(
+        user.id,
+        ncpath,
+        etag=upstream.headers.get("ETag"),
+        content_type=upstream.headers.get("Content-Type"),
+        size=int(upstream.headers.get("Content-Length", 0)) or None,
+        content_encoding=upstream.headers.get("Content-Encoding"),
+    )
+    body = cache_while_streaming(upstream, writer) if writer else None
+    return stream_response(upstream, download_name=download_name, body=body)
+
+
+def get_file_cache():
+    """Return the cache of the files downloaded from Nextcloud, if enabled."""
+    if not (max_size := current_app.config["NC_DOWNLOAD_CACHE_MAX_SIZE"]):
+        return None
 
-    title = ncpath.split("/")[-1]
-    return send_from_directory(
-        tmp_download_dir, uniqfile, download_name=title, mimetype=mimetype
+    return FileCache(
+        Path(current_app.config["TMP_DOWNLOAD_DIR"]) / "ncdownload", max_size
+    )
+
+
+def cache_while_streaming(upstream, writer):
+    """Yield the chunks of a response while storing them in the file cache.
+
+    The cache entry is only committed if the whole file has been transferred.
+    """
+    completed = False
+    try:
+        for chunk in upstream_chunks(upstream):
+            writer.write(chunk)
+            yield chunk
+        completed = True
+    finally:
+        if completed:
+            writer.commit()
+        else:
+            writer.abort()
+
+
+def forwarded_request_headers():
+    """Return the conditional, range and encoding headers of the request to forward upstream.
+
+    Compressed bodies are forwarded as they are, so without an
+    ``Accept-Encoding`` header from the client, an uncompressed body is asked
+    instead of the ``gzip`` that ``requests`` accepts by default.
+    """
+    headers = {
+        header: request.headers[header]
+        for header in FORWARDED_REQUEST_HEADERS
+        if header in request.headers
+    }
+    headers.setdefault("Accept-Encoding", "identity")
+    return headers
+
+
+def open_nextcloud_download(client, nc_path):
+    """Start streaming a file from Nextcloud, forwarding the range and conditional headers."""
+    try:
+        return client.open_download(nc_path, headers=forwarded_request_headers())
+    except ResponseErrorCode as exception:
+        if exception.code == 416:
+            abort(416)
+        raise
+
+
+def upstream_chunks(upstream):
+    """Iterate over the body of a streamed response, as it was sent.
+
+    Unlike ``iter_content``, a compressed body is not decoded, so it matches
+    the ``Content-Length`` and ``Content-Encoding`` headers of the response.
+    """
+    return upstream.raw.stream(STREAM_CHUNK_SIZE, decode_content=False)
+
+
+def stream_response(upstream, download_name, as_attachment=False, body=None):
+    """Forward a streamed ``requests`` response to the client, chunk by chunk.
+
+    The file is never completely loaded in memory. The status code and the
+    range and cache headers are passed through, so clients can resume
+    downloads and revalidate their cache. ``body`` can replace the iterator
+    over the upstream chunks.
+    """
+    if upstream.status_code >= 400:
+        upstream.close()
+        abort(416 if upstream.status_code == 416 else 502)
+
+    mimetype = (
+        upstream.headers.get("Content-Type")
+        or mimetypes.guess_type(download_name)[0]
+        or "application/octet-stream"
+    )
+    response = Response(
+        body or upstream_chunks(upstream),
+        status=upstream.status_code,
+        mimetype=mimetype,
+        direct_passthrough=True,
+    )
+    response.call_on_close(upstream.close)
+
+    for header in FORWARDED_RESPONSE_HEADERS:
+        if header in upstream.headers:
+            response.headers[header] = upstream.headers[header]
+    response.headers.setdefault("Accept-Ranges", "bytes")
+    response.headers.set(
+        "Content-Disposition",
+        "attachment" if as_attachment else "inline",
+        filename=download_name,
     )
+    return response
@@ -37,6 +37,8 @@ from b3desk.models.meetings import assign_unique_visio_code
 from b3desk.models.meetings import get_quick_meeting_from_fake_id
 from b3desk.models.meetings import save_voiceBridge_and_delete_meeting
 from b3desk.models.meetings import unique_visio_code_generation
+from b3desk.models.recordings import get_meeting_recording
+from b3desk.models.recordings import get_meeting_recordings
 from b3desk.models.roles import Role
 from b3desk.models.users import User
 from b3desk.utils import check_oidc_connection
@@ -91,6 +93,7 @@ def show_meeting_recording(meeting: Meeting, user: User):
         "meeting/recordings.html",
         meeting_mailto_params=meeting_mailto_params,
         meeting=meeting,
+        recordings=get_meeting_recordings(meeting),
         form=form,
         admin_mode=is_admin_mode(),
     )
@@ -110,6 +113,9 @@ def update_recording_name(meeting: Meeting, recording_id, user: User):
         recording_ids=[recording_id], metadata={"name": form.data["name"]}
     )
     if BBB.success(result):
+        if recording := get_meeting_recording(meeting, recording_id):
+            recording.name = form.data["name"]
+            db.session.commit()
         flash(_("Enregistrement renommé"), "success")
     else:
         flash(
@@ -335,6 +341,9 @@ def delete_video_meeting(meeting: Meeting, user: User):
     recordID = request.form["recordID"]
     data = BBB(meeting.meetingID).delete_recordings(recordID)
     if BBB.success(data):
+        if recording := get_meeting_recording(meeting, recordID):
+            db.session.delete(recording)
+            db.session.commit()
         flash(_("Vidéo supprimée"), "success")
         current_app.logger.info(
             "Meeting %s %s record %s was deleted by %s",
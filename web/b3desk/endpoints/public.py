@@ -7,10 +7,11 @@ from flask import render_template
 from flask import request
 from flask import url_for
 
+from b3desk.models.meetings import get_user_meetings
 from b3desk.models.roles import Role
 
 from .. import auth
-from .. import cache
+from ..caching import coalesced
 from ..join import get_signin_url
 from ..session import has_user_session
 from ..session import should_display_captcha
@@ -22,8 +23,9 @@ from .meetings import meeting_mailto_params
 bp = Blueprint("public", __name__)
 
 
-@cache.cached(
-    timeout=current_app.config["STATS_CACHE_DURATION"], key_prefix="meetings_stats"
+@coalesced(
+    "meetings_stats",
+    timeout=lambda stats: current_app.config["STATS_CACHE_DURATION"] if stats else 0,
 )
 def get_meetings_stats():
     """Retrieve current meeting statistics from the configured stats URL."""
@@ -91,26 +93,11 @@ def welcome():
     if order_key not in ["created_at", "name"]:
         order_key = "created_at"
 
-    meetings = [meeting for meeting in g.user.meetings if not meeting.is_shadow] + [
-        meeting for meeting in g.user.get_all_delegated_meetings
-    ]
-    favorite_meetings = []
-    if favorite_filter:
-        favorite_meetings = [
-            meeting for meeting in meetings if g.user in meeting.favorite_of
-        ]
-        if favorite_meetings:
-            meetings = favorite_meetings
-
-    meetings = sorted(
-        meetings,
-        key=lambda m: (
-            getattr(m, order_key).lower()
-            if isinstance(getattr(m, order_key), str)
-            else getattr(m, order_key),
-            m.id,
-        ),
-        reverse=reverse_order,
+    meetings = get_user_meetings(
+        g.user,
+        order_key=order_key,
+        reverse_order=reverse_order,
+        favorite_only=favorite_filter,
     )
 
     for meeting in meetings:
@@ -131,7 +118,8 @@ def welcome():
         meetings=meetings,
         reverse_order=reverse_order,
         order_key=order_key,
-        favorite_filter=favorite_filter and bool(favorite_meetings),
+        favorite_filter=favorite_filter
+        and any(meeting.is_favorite for meeting in meetings),
         should_display_captcha=should_display_captcha(),
         admin_mode=False,
     )
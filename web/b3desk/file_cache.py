@@ -0,0 +1,155 @@
+"""Size-bounded on-disk cache of the files BBB downloads from Nextcloud.
+
+There is one entry per owner and Nextcloud path, recording the WebDAV ETag the
+file was downloaded with, so callers can revalidate it against Nextcloud and a
+file that changed is never served from the cache. Each entry is made of a
+``.json`` file holding its metadata, which names the ``.data`` file holding its
+content. The modification time of the ``.data`` file is refreshed on each hit,
+and the least recently used entries are evicted when the cache grows over its
+size.
+
+Files are written under a temporary name then atomically renamed, so several
+processes can share the same cache directory. Each version of a file gets its
+own ``.data`` file, published by renaming the ``.json`` file once the content
+is in place, so a reader never pairs a content with the metadata of another
+version. Replaced versions are left to the eviction, as a reader may still be
+sending them.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+from pathlib import Path
+
+DATA_SUFFIX = ".data"
+METADATA_SUFFIX = ".json"
+
+
+def path_key(owner_id, nc_path):
+    return hashlib.sha256(f"{owner_id}:{nc_path}".encode()).hexdigest()
+
+
+class FileCache:
+    """An LRU cache of Nextcloud files stored in ``directory``."""
+
+    def __init__(self, directory, max_size):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def _metadata_path(self, key):
+        return self.directory / f"{key}{METADATA_SUFFIX}"
+
+    def get(self, owner_id, nc_path):
+        """Return the path and the metadata of the cached file, or None.
+
+        The metadata contains the ``etag`` the file was downloaded with, so the
+        caller can revalidate it against Nextcloud.
+        """
+        metadata_path = self._metadata_path(path_key(owner_id, nc_path))
+        try:
+            metadata = json.loads(metadata_path.read_text())
+            data_path = self.directory / metadata["data"]
+            os.utime(data_path)
+            if data_path.stat().st_size != metadata["size"]:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+
+        return data_path, metadata
+
+    def writer(
+        self, owner_id, nc_path, etag, content_type, size=None, content_encoding=None
+    ):
+        """Return a writer storing a file in the cache, or None if it would not fit."""
+        if not etag or (size is not None and size > self.max_size):
+            return None
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return CacheWriter(
+            self,
+            path_key(owner_id, nc_path),
+            {
+                "nc_path": nc_path,
+                "etag": etag,
+                "content_type": content_type,
+                "content_encoding": content_encoding,
+            },
+        )
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits its size."""
+        entries = []
+        for data_path in self.directory.glob(f"*{DATA_SUFFIX}"):
+            try:
+                stat = data_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, data_path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, data_path in sorted(entries):
+            if total <= self.max_size:
+                break
+
+            # Previous versions of a file are only referenced by a replaced
+            # metadata file, they are evicted without it.
+            metadata_path = self._metadata_path(data_path.name.split(".")[0])
+            try:
+                if json.loads(metadata_path.read_text())["data"] == data_path.name:
+                    metadata_path.unlink(missing_ok=True)
+            except (OSError, ValueError, KeyError):
+                pass
+            data_path.unlink(missing_ok=True)
+            total -= size
+
+
+class CacheWriter:
+    """Write a file in the cache chunk by chunk, and commit it once complete."""
+
+    def __init__(self, cache, key, metadata):
+        self.cache = cache
+        self.key = key
+        self.metadata = metadata
+        self.size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=cache.directory, suffix=".tmp")
+        self.tmp_path = Path(tmp_path)
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, chunk):
+        if self.file is None:
+            return
+
+        self.size += len(chunk)
+        if self.size > self.cache.max_size:
+            self.abort()
+            return
+
+        self.file.write(chunk)
+
+    def commit(self):
+        if self.file is None:
+            return
+
+        self.file.close()
+        self.file = None
+        data_path = self.cache.directory / (
+            f"{self.key}.{secrets.token_hex(8)}{DATA_SUFFIX}"
+        )
+        self.tmp_path.replace(data_path)
+        self.metadata["data"] = data_path.name
+        self.metadata["size"] = self.size
+        fd, tmp_metadata_path = tempfile.mkstemp(dir=self.cache.directory)
+        with os.fdopen(fd, "w") as metadata_file:
+            json.dump(self.metadata, metadata_file)
+        Path(tmp_metadata_path).replace(self.cache._metadata_path(self.key))
+        self.cache.evict()
+
+    def abort(self):
+        if self.file is None:
+            return
+
+        self.file.close()
+        self.file = None
+        self.tmp_path.unlink(missing_ok=True)
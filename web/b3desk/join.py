@@ -1,14 +1,22 @@
+import contextlib
 import hashlib
+import time
+import uuid
 from datetime import datetime
 
 from flask import current_app
 from flask import render_template
 from flask import url_for
 
+from b3desk import BigBlueButtonUnavailable
+from b3desk import cache
 from b3desk.endpoints.bbb_callback import get_recording_status_callback_url
 from b3desk.models import db
 from b3desk.models.roles import Role
 from b3desk.nextcloud import is_nextcloud_available
+from b3desk.waiting_room import MEETING_STARTED_CACHE_KEY
+from b3desk.waiting_room import has_meeting_started
+from b3desk.waiting_room import notify_meeting_started
 
 
 def get_hash(meeting, role: Role, hash_from_string=False):
@@ -58,7 +66,12 @@ def get_join_url(
     """Return the URL of the BBB meeting URL if available, and the URL of the b3desk 'waiting_meeting' if it is not ready."""
     from b3desk.models.bbb import BBB
 
-    if waiting_room and not BBB(meeting.meetingID).is_running():
+    # When BBB is unavailable, the waiting room checks again later.
+    if waiting_room:
+        with contextlib.suppress(BigBlueButtonUnavailable):
+            waiting_room = not has_meeting_started(meeting.meetingID)
+
+    if waiting_room:
         return url_for(
             "join.waiting_meeting",
             meeting_fake_id=meeting.fake_id,
@@ -92,12 +105,60 @@ def get_signin_url(meeting, meeting_role: Role):
     )
 
 
+MEETING_CREATION_LOCK_CACHE_KEY = "meeting_creation_{meeting_id}"
+
+# Longer than a room creation, including the upload of the meeting files.
+MEETING_CREATION_LOCK_TIMEOUT = 30
+
+MEETING_CREATION_POLL_INTERVAL = 0.1
+
+
+def create_once(meeting_id, create, *args, **kwargs) -> bool:
+    """Create a BBB room, unless it is already being created.
+
+    The lock is held in the cache, and thus shared by every worker and node.
+    Concurrent callers wait for the first creation to finish, instead of
+    sending duplicate ``create`` and ``insertDocument`` requests to BBB, and
+    return whether it has started the room.
+    """
+    lock_key = MEETING_CREATION_LOCK_CACHE_KEY.format(meeting_id=meeting_id)
+    token = uuid.uuid4().hex
+    if not cache.add(lock_key, token, timeout=MEETING_CREATION_LOCK_TIMEOUT):
+        current_app.logger.info("BBB room %s is already being created", meeting_id)
+        return wait_for_meeting_creation(meeting_id, lock_key)
+
+    try:
+        return create(*args, **kwargs)
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def wait_for_meeting_creation(meeting_id, lock_key) -> bool:
+    """Wait until another caller has created the room, or has failed to."""
+    started_key = MEETING_STARTED_CACHE_KEY.format(meeting_id=meeting_id)
+    deadline = time.monotonic() + MEETING_CREATION_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        if cache.get(started_key):
+            return True
+        if cache.get(lock_key) is None:
+            return bool(cache.get(started_key))
+        time.sleep(MEETING_CREATION_POLL_INTERVAL)
+    return False
+
+
 def create_bbb_meeting(meeting, user=None) -> bool:
     """Create a BBB room for a persistent meeting."""
+    return create_once(meeting.meetingID, request_bbb_meeting_creation, meeting, user)
+
+
+def request_bbb_meeting_creation(meeting, user=None) -> bool:
+    """Send the creation request of a persistent meeting room to BBB."""
     from b3desk.models.bbb import BBB
 
+    # The snapshot does not know the rooms created since its last refresh.
     bbb = BBB(meeting.meetingID)
-    if bbb.is_running():
+    if bbb.is_running(use_snapshot=False):
         return False
 
     if user:
@@ -172,6 +233,8 @@ def create_bbb_meeting(meeting, user=None) -> bool:
     if not BBB.success(result):
         return False
 
+    notify_meeting_started(meeting.meetingID)
+
     if meeting.files:
         bbb.send_meeting_files(meeting.files)
 
@@ -188,20 +251,32 @@ def create_bbb_meeting(meeting, user=None) -> bool:
     return True
 
 
+def get_quick_meeting_id(fake_id: str) -> str:
+    """Return the BBB meeting ID of a quick meeting."""
+    return f"meeting-vanish-{fake_id}--"
+
+
 def create_bbb_quick_meeting(fake_id: str, user=None) -> bool:
     """Create a BBB room for a quick meeting."""
+    return create_once(
+        get_quick_meeting_id(fake_id), request_bbb_quick_meeting_creation, fake_id, user
+    )
+
+
+def request_bbb_quick_meeting_creation(fake_id: str, user=None) -> bool:
+    """Send the creation request of a quick meeting room to BBB."""
     from b3desk.models.bbb import BBB
     from b3desk.models.meetings import get_deterministic_password
     from b3desk.models.meetings import pin_generation
 
-    meeting_id = f"meeting-vanish-{fake_id}--"
+    meeting_id = get_quick_meeting_id(fake_id)
     name = str(current_app.config["QUICK_MEETING_DEFAULT_NAME"])
     moderator_pw = get_deterministic_password(fake_id, "moderator")
     attendee_pw = get_deterministic_password(fake_id, "attendee")
     meta_academy = user.mail_domain if user and user.mail_domain else None
 
     bbb = BBB(meeting_id)
-    if bbb.is_running():
+    if bbb.is_running(use_snapshot=False):
         return False
 
     current_app.logger.info("Request BBB quick room creation %s %s", name, fake_id)
@@ -270,4 +345,8 @@ def create_bbb_quick_meeting(fake_id: str, user=None) -> bool:
 
     current_app.logger.info("BBB room %s creation result: %s", meeting_id, result)
 
-    return BBB.success(result)
+    if not BBB.success(result):
+        return False
+
+    notify_meeting_started(meeting_id)
+    return True
@@ -11,3 +11,18 @@
 from flask_sqlalchemy import SQLAlchemy
 
 db = SQLAlchemy()
+
+
+def trigram_index(name, column):
+    """Index speeding up the ``ILIKE '%...%'`` searches on a column.
+
+    This is a GIN trigram index on PostgreSQL. The migrations do not create it
+    on other databases, but ``create_all`` does, as a plain index that the
+    searches cannot use.
+    """
+    return db.Index(
+        name,
+        column,
+        postgresql_using="gin",
+        postgresql_ops={column: "gin_trgm_ops"},
+    )
@@ -10,6 +10,12 @@
 # FOR A PARTICULAR PURPOSE.
 import hashlib
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
@@ -21,7 +27,10 @@ from flask import current_app
 from flask import url_for
 from flask_babel import lazy_gettext as _
 
+from b3desk.caching import single_flight
 from b3desk.tasks import background_upload
+from b3desk.transport import PooledTransport
+from b3desk.waiting_room import forget_meeting_started
 
 from .. import BigBlueButtonUnavailable
 from .. import cache
@@ -29,10 +38,174 @@ from .roles import Role
 
 logger = logging.getLogger("bbb")
 
+bbb_transport = PooledTransport("bigbluebutton")
 
-def cache_key(func, caller, prepped, *args, **kwargs):
-    """Generate a cache key based on the request URL."""
-    return prepped.url
+
+def get_bbb_session():
+    """Return the pooled HTTP session used to reach the BBB API."""
+    return bbb_transport.session(
+        pool_size=current_app.config["BIGBLUEBUTTON_POOL_SIZE"],
+        keepalive=current_app.config["BIGBLUEBUTTON_POOL_KEEPALIVE"],
+        retries=current_app.config["BIGBLUEBUTTON_REQUEST_RETRIES"],
+        backoff_factor=current_app.config["BIGBLUEBUTTON_REQUEST_BACKOFF"],
+        # In local development environment, BBB is not served as https
+        verify=not current_app.debug,
+    )
+
+
+@dataclass(frozen=True)
+class BBBServer:
+    """A BBB server rooms can be placed on."""
+
+    endpoint: str
+    secret: str
+
+
+def get_bbb_servers():
+    """Return the pool of BBB servers.
+
+    ``BIGBLUEBUTTON_SERVERS`` lists them. When it is empty, the single server
+    set by ``BIGBLUEBUTTON_ENDPOINT`` and ``BIGBLUEBUTTON_SECRET`` is used.
+    """
+    if servers := current_app.config["BIGBLUEBUTTON_SERVERS"]:
+        return [BBBServer(server["endpoint"], server["secret"]) for server in servers]
+
+    return [
+        BBBServer(
+            current_app.config["BIGBLUEBUTTON_ENDPOINT"],
+            current_app.config["BIGBLUEBUTTON_SECRET"],
+        )
+    ]
+
+
+def fan_out(function, servers):
+    """Call ``function`` for each server concurrently, and return the results in order."""
+    if len(servers) == 1:
+        return [function(servers[0])]
+
+    app = current_app._get_current_object()
+
+    def call(server):
+        with app.app_context():
+            return function(server)
+
+    with ThreadPoolExecutor(max_workers=len(servers)) as executor:
+        return list(executor.map(call, servers))
+
+
+MEETINGS_SNAPSHOT_CACHE_KEY = "bbb_meetings_snapshot"
+
+MEETING_SERVER_CACHE_KEY = "bbb_meeting_server_{meeting_id}"
+
+# Longer than any meeting.
+MEETING_SERVER_TIMEOUT = 24 * 3600
+
+
+def get_meeting_server(meeting_id):
+    """Return the server a meeting runs on, or None if it is not known.
+
+    Meetings are pinned to the server they are created on. Meetings created
+    by another process are found in the ``getMeetings`` snapshot.
+    """
+    servers = get_bbb_servers()
+    if len(servers) == 1:
+        return servers[0]
+
+    endpoint = cache.get(MEETING_SERVER_CACHE_KEY.format(meeting_id=meeting_id))
+    if endpoint is None and (snapshot := cache.get(MEETINGS_SNAPSHOT_CACHE_KEY)):
+        endpoint = snapshot["servers"].get(meeting_id)
+    return next((server for server in servers if server.endpoint == endpoint), None)
+
+
+def pin_meeting_server(meeting_id, server):
+    """Remember the server a meeting runs on."""
+    if len(get_bbb_servers()) > 1:
+        cache.set(
+            MEETING_SERVER_CACHE_KEY.format(meeting_id=meeting_id),
+            server.endpoint,
+            timeout=MEETING_SERVER_TIMEOUT,
+        )
+
+
+def forget_meeting_server(meeting_id):
+    cache.delete(MEETING_SERVER_CACHE_KEY.format(meeting_id=meeting_id))
+
+
+def choose_server():
+    """Return the server with the fewest participants, to place a new room on.
+
+    The loads come from the last ``getMeetings`` snapshot. Ties, and the
+    absence of snapshot, are settled at random.
+    """
+    snapshot = cache.get(MEETINGS_SNAPSHOT_CACHE_KEY) or {}
+    loads = snapshot.get("loads", {})
+    return min(
+        get_bbb_servers(),
+        key=lambda server: (loads.get(server.endpoint, 0), random.random()),
+    )
+
+
+def get_meetings_snapshot():
+    """Return the ``getMeetings`` index if it is fresh enough, else None.
+
+    The index maps BBB meeting ids to their ``running``, ``participantCount``,
+    ``moderatorCount`` and ``createTime`` values. It is kept up to date by the
+    ``refresh_meetings_snapshot`` periodic task.
+    """
+    snapshot = cache.get(MEETINGS_SNAPSHOT_CACHE_KEY)
+    if not snapshot:
+        return None
+
+    max_age = current_app.config["BIGBLUEBUTTON_MEETINGS_SNAPSHOT_MAX_AGE"]
+    if time.time() - snapshot["refreshed_at"] > max_age:
+        return None
+
+    return snapshot["meetings"]
+
+
+def refresh_meetings_snapshot():
+    """Fetch all the meetings from each BBB server with one request and store the index.
+
+    The server of each meeting, and the number of participants on each
+    server, are stored along.
+    """
+    servers = get_bbb_servers()
+    meetings, locations, loads = {}, {}, {}
+    for server, server_meetings in zip(
+        servers, fan_out(BBB.get_meetings, servers), strict=True
+    ):
+        meetings.update(server_meetings)
+        locations.update(dict.fromkeys(server_meetings, server.endpoint))
+        loads[server.endpoint] = sum(
+            meeting["participantCount"] for meeting in server_meetings.values()
+        )
+
+    cache.set(
+        MEETINGS_SNAPSHOT_CACHE_KEY,
+        {
+            "refreshed_at": time.time(),
+            "meetings": meetings,
+            "servers": locations,
+            "loads": loads,
+        },
+        timeout=current_app.config["BIGBLUEBUTTON_MEETINGS_SNAPSHOT_MAX_AGE"],
+    )
+    return meetings
+
+
+def forget_meeting_in_snapshot(meeting_id):
+    """Remove a meeting from the index, so it is not seen running until the next refresh."""
+    snapshot = cache.get(MEETINGS_SNAPSHOT_CACHE_KEY)
+    if not snapshot or meeting_id not in snapshot["meetings"]:
+        return
+
+    del snapshot["meetings"][meeting_id]
+    snapshot["servers"].pop(meeting_id, None)
+    remaining = current_app.config["BIGBLUEBUTTON_MEETINGS_SNAPSHOT_MAX_AGE"] - (
+        time.time() - snapshot["refreshed_at"]
+    )
+    if remaining > 0:
+        cache.set(MEETINGS_SNAPSHOT_CACHE_KEY, snapshot, timeout=int(remaining) + 1)
 
 
 def parse_ai_summary_playback(format_element):
@@ -57,11 +230,93 @@ def parse_ai_summary_playback(format_element):
     return playback
 
 
-def caching_exclusion(func, caller, prepped, *args, **kwargs):
+def parse_recording(recording):
+    """Parse a <recording> element of a ``getRecordings`` response.
+
+    Return None for recordings without playback.
+    """
+    data = {}
+    data["recordID"] = recording.find("recordID").text
+    data["meetingID"] = recording.findtext("meetingID")
+    name = recording.find("metadata").find("name")
+    data["name"] = name.text if name is not None else None
+    data["participants"] = int(recording.find("participants").text)
+    data["start_date"] = datetime.fromtimestamp(
+        int(recording.find("startTime").text) / 1000.0, tz=timezone.utc
+    ).replace(microsecond=0)
+    data["end_date"] = datetime.fromtimestamp(
+        int(recording.find("endTime").text) / 1000.0, tz=timezone.utc
+    ).replace(microsecond=0)
+
+    data["playbacks"] = {}
+    playback = recording.find("playback")
+    if playback is None:
+        return None
+
+    for format in playback.iter("format"):
+        type = format.find("type").text
+
+        if type == "ai-summary":
+            summary = parse_ai_summary_playback(format)
+            if summary.get("url"):
+                data["playbacks"][type] = summary
+            continue
+
+        if type not in ("presentation", "video"):
+            logger.warning(
+                "Unhandled recording playback format %r for recording %s",
+                type,
+                data["recordID"],
+            )
+            continue
+
+        images = []
+        preview = format.find("preview")
+        if preview is not None:
+            for i in format.find("preview").find("images").iter("image"):
+                image = {k: v for k, v in i.attrib.items()}
+                image["url"] = i.text
+                images.append(image)
+
+        data["playbacks"][type] = {
+            "url": (media_url := format.find("url").text),
+            "images": images,
+        }
+        if type == "video":
+            data["playbacks"][type]["direct_link"] = media_url + "video-0.m4v"
+    return data
+
+
+def parse_recordings(root):
+    """Parse the recordings of a ``getRecordings`` response, latest first.
+
+    Malformed recordings are logged and skipped.
+    """
+    recordings = root.find("recordings")
+    if recordings is None:
+        return []
+
+    result = []
+    for recording in recordings.iter("recording"):
+        try:
+            data = parse_recording(recording)
+        except (AttributeError, TypeError, ValueError) as exception:
+            logger.error(exception)
+            continue
+
+        if data is not None:
+            result.append(data)
+    return sorted(result, key=lambda x: x["start_date"], reverse=True)
+
+
+def get_endpoint_name(prepped):
+    """Return the name of the BBB API endpoint a request is sent to."""
+    return urlparse(prepped.url).path.split("/")[-1]
+
+
+def is_cacheable(prepped):
     """Only read-only methods should be cached."""
-    url = urlparse(prepped.url)
-    endpoint_name = url.path.split("/")[-1]
-    return prepped.method != "GET" or endpoint_name not in (
+    return prepped.method == "GET" and get_endpoint_name(prepped) in (
         "isMeetingRunning",
         "getMeetingInfo",
         "getMeetings",
@@ -70,6 +325,177 @@ def caching_exclusion(func, caller, prepped, *args, **kwargs):
     )
 
 
+def get_cache_duration(prepped):
+    """Return how long the response to a request stays fresh in the cache.
+
+    ``BIGBLUEBUTTON_API_CACHE_DURATIONS`` sets the duration of some endpoints.
+    """
+    if not is_cacheable(prepped) or not (
+        default := current_app.config["BIGBLUEBUTTON_API_CACHE_DURATION"]
+    ):
+        return 0
+
+    return current_app.config["BIGBLUEBUTTON_API_CACHE_DURATIONS"].get(
+        get_endpoint_name(prepped), default
+    )
+
+
+def bbb_response_cache_key(url):
+    return f"bbb_response:{url}"
+
+
+def bbb_response_refresh_key(url):
+    return f"bbb_response_refresh:{url}"
+
+
+def cache_bbb_response(request, root):
+    """Cache a BBB response, fresh then stale."""
+    fresh = get_cache_duration(request)
+    stale = current_app.config["BIGBLUEBUTTON_API_STALE_DURATION"]
+    now = time.time()
+    cache.set(
+        bbb_response_cache_key(request.url),
+        {"root": root, "fresh_until": now + fresh, "stale_until": now + fresh + stale},
+        timeout=fresh + stale,
+    )
+
+
+def cache_bbb_failure(url):
+    """Remember that BBB could not answer a request, keeping the last response."""
+    if not (duration := current_app.config["BIGBLUEBUTTON_API_ERROR_CACHE_DURATION"]):
+        return
+
+    entry = cache.get(bbb_response_cache_key(url)) or {}
+    now = time.time()
+    entry["failed_until"] = now + duration
+    expires_at = max(entry.get("stale_until", 0), entry["failed_until"])
+    cache.set(bbb_response_cache_key(url), entry, timeout=int(expires_at - now) + 1)
+
+
+def refresh_bbb_response_in_background(request):
+    """Schedule the refresh of a cached response, unless one is already scheduled."""
+    from b3desk.tasks import refresh_bbb_response
+
+    if cache.add(
+        bbb_response_refresh_key(request.url),
+        True,
+        timeout=get_cache_duration(request),
+    ):
+        refresh_bbb_response.delay(request.url)
+
+
+class BBBCircuitBreaker:
+    """Circuit breaker for the BBB API, per endpoint.
+
+    After ``BIGBLUEBUTTON_BREAKER_THRESHOLD`` failures of an endpoint within
+    ``BIGBLUEBUTTON_BREAKER_DURATION`` seconds, the circuit opens and the
+    requests to this endpoint fail immediately. When the delay is over, a
+    single probe request is let through: the circuit closes if it succeeds,
+    or opens again for twice as long if it fails.
+    """
+
+    key_prefix = "bbb_breaker"
+
+    def check(self, endpoint):
+        """Raise BigBlueButtonUnavailable if the requests to the endpoint are blocked.
+
+        Return the state of an open circuit whose probe request is let
+        through, to be passed to :meth:`mark_succeeded` and :meth:`mark_failed`.
+        """
+        if not current_app.config["BIGBLUEBUTTON_BREAKER_THRESHOLD"]:
+            return None
+
+        state = cache.get(f"{self.key_prefix}:{endpoint}")
+        if state is None:
+            return None
+
+        remaining = state["open_until"] - time.time()
+        if remaining > 0:
+            logger.debug("BBB API %s blocked, retry in %.0fs", endpoint, remaining)
+            raise BigBlueButtonUnavailable()
+
+        probe_timeout = current_app.config["BIGBLUEBUTTON_REQUEST_TIMEOUT"] * (
+            current_app.config["BIGBLUEBUTTON_REQUEST_RETRIES"] + 1
+        )
+        if not cache.add(
+            f"{self.key_prefix}_probe:{endpoint}", True, timeout=probe_timeout + 1
+        ):
+            logger.debug("BBB API %s blocked, a probe request is pending", endpoint)
+            raise BigBlueButtonUnavailable()
+
+        return state
+
+    def mark_succeeded(self, endpoint, state):
+        if state is None:
+            return
+
+        cache.delete_many(
+            f"{self.key_prefix}:{endpoint}",
+            f"{self.key_prefix}_probe:{endpoint}",
+            f"{self.key_prefix}_failures:{endpoint}",
+        )
+        logger.info("BBB API %s available again", endpoint)
+
+    def mark_failed(self, endpoint, state):
+        if not (threshold := current_app.config["BIGBLUEBUTTON_BREAKER_THRESHOLD"]):
+            return
+
+        max_duration = current_app.config["BIGBLUEBUTTON_BREAKER_MAX_DURATION"]
+        if state is not None:
+            duration = min(state["duration"] * 2, max_duration)
+        else:
+            failures_key = f"{self.key_prefix}_failures:{endpoint}"
+            failures = (cache.get(failures_key) or 0) + 1
+            duration = current_app.config["BIGBLUEBUTTON_BREAKER_DURATION"]
+            if failures < threshold:
+                cache.set(failures_key, failures, timeout=duration)
+                return
+
+        cache.set(
+            f"{self.key_prefix}:{endpoint}",
+            {"open_until": time.time() + duration, "duration": duration},
+            timeout=max_duration * 2,
+        )
+        cache.delete_many(
+            f"{self.key_prefix}_probe:{endpoint}",
+            f"{self.key_prefix}_failures:{endpoint}",
+        )
+        logger.warning("BBB API %s marked unavailable for %ds", endpoint, duration)
+
+
+bbb_breaker = BBBCircuitBreaker()
+
+
+class InFlightLimit:
+    """Bound the number of requests a process sends to BBB at the same time.
+
+    When BBB is slow, the requests exceeding ``BIGBLUEBUTTON_MAX_IN_FLIGHT_REQUESTS``
+    fail immediately instead of tying up more threads of the worker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    @contextmanager
+    def __call__(self):
+        limit = current_app.config["BIGBLUEBUTTON_MAX_IN_FLIGHT_REQUESTS"]
+        with self.lock:
+            if limit and self.count >= limit:
+                logger.warning("Too many BBB API requests in progress, request dropped")
+                raise BigBlueButtonUnavailable()
+            self.count += 1
+
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.count -= 1
+
+
+in_flight_limit = InFlightLimit()
+
+
 class BBB:
     """Interface to BBB API."""
 
@@ -80,14 +506,33 @@ class BBB:
     def __init__(self, meeting_id):
         self.meeting_id = meeting_id
 
+    @property
+    def server(self):
+        """The server the meeting runs on, or the first server of the pool."""
+        if self.meeting_id and (server := get_meeting_server(self.meeting_id)):
+            return server
+        return get_bbb_servers()[0]
+
     def _send_request(self, request):
         """Send an HTTP request and parse the XML response.
 
-        Raises BigBlueButtonUnavailable on network/parsing errors.
+        Raises BigBlueButtonUnavailable on network/parsing errors, and when
+        the circuit breaker or the in-flight limit blocks the request.
         """
-        session = requests.Session()
-        if current_app.debug:  # pragma: no cover
-            session.verify = False
+        endpoint = f"{urlparse(request.url).netloc}/{get_endpoint_name(request)}"
+        state = bbb_breaker.check(endpoint)
+        with in_flight_limit():
+            try:
+                root = self._query(request)
+            except BigBlueButtonUnavailable:
+                bbb_breaker.mark_failed(endpoint, state)
+                raise
+
+        bbb_breaker.mark_succeeded(endpoint, state)
+        return root
+
+    def _query(self, request):
+        session = get_bbb_session()
 
         logger.debug(
             "BBB API request method:%s url:%s data:%s",
@@ -124,46 +569,165 @@ class BBB:
 
         return root
 
-    def bbb_request(self, action, method="GET", **kwargs):
-        """Prepare a BBB API request with authentication checksum."""
+    def bbb_request(self, action, method="GET", server=None, **kwargs):
+        """Prepare a BBB API request with authentication checksum.
+
+        The request is sent to the server of the meeting, unless ``server`` is
+        given.
+        """
+        server = server or self.server
         request = requests.Request(
-            method=method,
-            url="{}/{}".format(current_app.config["BIGBLUEBUTTON_ENDPOINT"], action),
-            **kwargs,
+            method=method, url=f"{server.endpoint}/{action}", **kwargs
         )
         prepped = request.prepare()
-        bigbluebutton_secret = current_app.config["BIGBLUEBUTTON_SECRET"]
         secret = "{}{}".format(
-            prepped.url.replace("?", "").replace(
-                f"{current_app.config['BIGBLUEBUTTON_ENDPOINT']}/", ""
-            ),
-            bigbluebutton_secret,
+            prepped.url.replace("?", "").replace(f"{server.endpoint}/", ""),
+            server.secret,
         )
         checksum = hashlib.sha1(secret.encode("utf-8")).hexdigest()
         prepped.prepare_url(prepped.url, params={"checksum": checksum})
         return prepped
 
-    @cache.memoize(
-        unless=caching_exclusion,
-        timeout=current_app.config["BIGBLUEBUTTON_API_CACHE_DURATION"],
-    )
+    def cached_request(self, request):
+        """Send a BBB API request and parse the XML response, through the cache.
+
+        Responses of the read-only endpoints are cached for
+        ``BIGBLUEBUTTON_API_CACHE_DURATION`` seconds, or the duration set for
+        the endpoint in ``BIGBLUEBUTTON_API_CACHE_DURATIONS``. They are then
+        served stale for ``BIGBLUEBUTTON_API_STALE_DURATION`` more seconds,
+        while a background task refreshes them. When BBB fails to answer, the
+        last response is served, or BigBlueButtonUnavailable is raised without
+        querying BBB again for ``BIGBLUEBUTTON_API_ERROR_CACHE_DURATION``
+        seconds.
+        """
+        if not get_cache_duration(request):
+            return self._send_request(request)
+
+        entry = cache.get(bbb_response_cache_key(request.url)) or {}
+        now = time.time()
+        has_root = "root" in entry and now < entry["stale_until"]
+        if has_root and now < entry["fresh_until"]:
+            return entry["root"]
+
+        if now < entry.get("failed_until", 0):
+            if has_root:
+                return entry["root"]
+            logger.debug("BBB API recently failed, skipping %s", request.url)
+            raise BigBlueButtonUnavailable()
+
+        if has_root:
+            refresh_bbb_response_in_background(request)
+            return entry["root"]
+
+        return self.refresh_once(request)
+
+    def refresh_once(self, request):
+        """Refresh a missing response, unless another caller is already doing it.
+
+        Concurrent callers wait for its response, or its failure, instead of
+        sending the same request to BBB.
+        """
+        key = bbb_response_cache_key(request.url)
+
+        def read():
+            entry = cache.get(key) or {}
+            now = time.time()
+            if now < entry.get("fresh_until", 0) or now < entry.get("failed_until", 0):
+                return entry
+            return None
+
+        # The refresh key marks the background refreshes, the lock has its own.
+        entry = single_flight(
+            f"{key}:lock",
+            lambda: {"root": self.refresh_response(request)},
+            read,
+            wait=current_app.config["BIGBLUEBUTTON_REQUEST_TIMEOUT"]
+            * (current_app.config["BIGBLUEBUTTON_REQUEST_RETRIES"] + 1),
+        )
+        if "root" not in entry:
+            raise BigBlueButtonUnavailable()
+        return entry["root"]
+
+    def refresh_response(self, request):
+        """Send a read-only request to BBB and cache its response or its failure."""
+        try:
+            root = self._send_request(request)
+        except BigBlueButtonUnavailable:
+            cache_bbb_failure(request.url)
+            raise
+
+        cache_bbb_response(request, root)
+        return root
+
+    def forget_cached_responses(self, recording_ids=()):
+        """Purge the cached responses about the meeting and some of its recordings.
+
+        Called after the actions changing the state of the meeting, so that
+        the cached responses can be kept longer.
+        """
+        if isinstance(recording_ids, str):
+            recording_ids = recording_ids.split(",")
+
+        params = [
+            ("isMeetingRunning", {"meetingID": self.meeting_id}),
+            ("getMeetingInfo", {"meetingID": self.meeting_id}),
+            ("getRecordings", {"meetingID": self.meeting_id}),
+            *(("getRecordings", {"recordID": id}) for id in recording_ids),
+        ]
+        requests = [
+            self.bbb_request(action, params=action_params, server=server)
+            for server in get_bbb_servers()
+            for action, action_params in params
+        ]
+        cache.delete_many(
+            *(bbb_response_cache_key(request.url) for request in requests)
+        )
+
     def bbb_response(self, request):
         """Send the BBB API request and parse the XML response."""
-        root = self._send_request(request)
+        root = self.cached_request(request)
         return {c.tag: c.text for c in root}
 
-    bbb_response.make_cache_key = cache_key
-
-    def is_running(self):
+    def is_running(self, use_snapshot=True):
         """Check if the meeting is running.
 
+        Answered from the ``getMeetings`` snapshot when it is fresh enough. A
+        meeting created since the last snapshot is reported as not running.
+        When ``use_snapshot`` is False, BBB is asked directly, bypassing the
+        cached responses too, as a stale answer would make the callers skip
+        the creation of a meeting that has ended.
+
         https://docs.bigbluebutton.org/development/api/#ismeetingrunning
         """
-        request = self.bbb_request(
-            "isMeetingRunning", params={"meetingID": self.meeting_id}
+        if use_snapshot and (meetings := get_meetings_snapshot()) is not None:
+            return meetings.get(self.meeting_id, {}).get("running", False)
+
+        # Meetings whose server is not known are looked for on every server.
+        servers = (
+            [server]
+            if (server := get_meeting_server(self.meeting_id))
+            else get_bbb_servers()
         )
-        data = self.bbb_response(request)
-        return self.success(data) and data["running"] == "true"
+
+        def is_running_on(server):
+            request = self.bbb_request(
+                "isMeetingRunning", params={"meetingID": self.meeting_id}, server=server
+            )
+            root = (
+                self.cached_request(request)
+                if use_snapshot
+                else self.refresh_response(request)
+            )
+            data = {c.tag: c.text for c in root}
+            return self.success(data) and data["running"] == "true"
+
+        for server, running in zip(
+            servers, fan_out(is_running_on, servers), strict=True
+        ):
+            if running:
+                pin_meeting_server(self.meeting_id, server)
+                return True
+        return False
 
     def create(  # noqa: C901
         self,
@@ -275,22 +839,43 @@ class BBB:
             )
             params["bannerColor"] = "#202c7d"
 
+        server = get_meeting_server(self.meeting_id) or choose_server()
         if not file_sharing:
-            request = self.bbb_request("create", params=params)
-            return self.bbb_response(request)
+            request = self.bbb_request("create", params=params, server=server)
+        else:
+            request = self.bbb_request("create", "POST", params=params, server=server)
+        data = self.bbb_response(request)
+        if self.success(data):
+            pin_meeting_server(self.meeting_id, server)
+        self.forget_cached_responses()
+        return data
 
-        request = self.bbb_request("create", "POST", params=params)
-        return self.bbb_response(request)
+    def send_to_all_servers(self, action, **kwargs):
+        """Send a request to every server, and return the first successful response.
+
+        Recordings are kept on the server the meeting was recorded on.
+        """
+        responses = fan_out(
+            lambda server: self.bbb_response(
+                self.bbb_request(action, server=server, **kwargs)
+            ),
+            get_bbb_servers(),
+        )
+        return next(
+            (data for data in responses if self.success(data)),
+            responses[0],
+        )
 
     def delete_recordings(self, recording_ids):
         """Delete recordings.
 
         https://docs.bigbluebutton.org/dev/api.html#deleterecordings
         """
-        request = self.bbb_request(
+        data = self.send_to_all_servers(
             "deleteRecordings", params={"recordID": recording_ids}
         )
-        return self.bbb_response(request)
+        self.forget_cached_responses(recording_ids)
+        return data
 
     def delete_all_recordings(self):
         """Delete all recordings for this meeting."""
@@ -312,85 +897,137 @@ class BBB:
         )
         return self.bbb_response(request)
 
-    @cache.memoize(timeout=current_app.config["BIGBLUEBUTTON_API_CACHE_DURATION"])
-    def get_recordings(self, bbb_recording_id=None):  # noqa: C901
+    def get_meeting_state(self):
+        """Retrieve the state of a meeting, in the format of ``getMeetingInfo``.
+
+        When the ``getMeetings`` snapshot is fresh enough, only its
+        ``running``, ``participantCount``, ``moderatorCount`` and ``createTime``
+        values are returned, and a meeting created since the last snapshot is
+        reported as not found. Otherwise, the complete ``getMeetingInfo``
+        response is returned.
+        """
+        if (meetings := get_meetings_snapshot()) is None:
+            return self.get_meeting_info()
+
+        if self.meeting_id not in meetings:
+            return {"returncode": "FAILED", "messageKey": "notFound"}
+
+        meeting = meetings[self.meeting_id]
+        return {
+            "returncode": "SUCCESS",
+            "meetingID": self.meeting_id,
+            "running": str(meeting["running"]).lower(),
+            "participantCount": str(meeting["participantCount"]),
+            "moderatorCount": str(meeting["moderatorCount"]),
+            "createTime": str(meeting["createTime"]),
+        }
+
+    @classmethod
+    def get_meetings(cls, server=None):
+        """Retrieve the state of every meeting of a BBB server in one request.
+
+        https://docs.bigbluebutton.org/development/api/#getmeetings
+        """
+        bbb = cls(None)
+        root = bbb._send_request(bbb.bbb_request("getMeetings", server=server))
+        if root.findtext("returncode") != "SUCCESS":
+            raise BigBlueButtonUnavailable()
+
+        result = {}
+        meetings = root.find("meetings")
+        if meetings is None:
+            return result
+
+        for meeting in meetings.iter("meeting"):
+            try:
+                result[meeting.findtext("meetingID")] = {
+                    "running": meeting.findtext("running") == "true",
+                    "participantCount": int(meeting.findtext("participantCount", 0)),
+                    "moderatorCount": int(meeting.findtext("moderatorCount", 0)),
+                    "createTime": int(meeting.findtext("createTime", 0)),
+                }
+            except ValueError as exception:
+                logger.error(exception)
+        return result
+
+    def get_recordings(self, bbb_recording_id=None, cached=True):
         """Get the list of recordings for a meeting or infos of one recording.
 
+        Every server is queried, as a meeting may have been recorded on any.
+
         https://docs.bigbluebutton.org/development/api/#get-getrecordings
         """
-        request = (
-            self.bbb_request("getRecordings", params={"recordID": bbb_recording_id})
+        params = (
+            {"recordID": bbb_recording_id}
             if bbb_recording_id
-            else self.bbb_request(
-                "getRecordings", params={"meetingID": self.meeting_id}
+            else {"meetingID": self.meeting_id}
+        )
+
+        def get_server_recordings(server):
+            request = self.bbb_request("getRecordings", params=params, server=server)
+            root = (
+                self.cached_request(request) if cached else self._send_request(request)
             )
+            data = {c.tag: c.text for c in root}
+            if not self.success(data):
+                return []
+
+            return parse_recordings(root)
+
+        servers = get_bbb_servers()
+        recordings = fan_out(get_server_recordings, servers)
+        if len(servers) == 1:
+            return recordings[0]
+
+        return sorted(
+            (recording for server in recordings for recording in server),
+            key=lambda recording: recording["start_date"],
+            reverse=True,
         )
-        root = self._send_request(request)
-        data = {c.tag: c.text for c in root}
-        if not self.success(data):
-            return []
 
-        recordings = root.find("recordings")
-        if recordings is None:
-            return []
+    @classmethod
+    def get_all_recordings(cls, page_size=100):
+        """Retrieve the recordings of every meeting of every BBB server.
 
-        result = []
-        try:
-            for recording in recordings.iter("recording"):
-                data = {}
-                data["recordID"] = recording.find("recordID").text
-                name = recording.find("metadata").find("name")
-                data["name"] = name.text if name is not None else None
-                data["participants"] = int(recording.find("participants").text)
-                data["start_date"] = datetime.fromtimestamp(
-                    int(recording.find("startTime").text) / 1000.0, tz=timezone.utc
-                ).replace(microsecond=0)
-                data["end_date"] = datetime.fromtimestamp(
-                    int(recording.find("endTime").text) / 1000.0, tz=timezone.utc
-                ).replace(microsecond=0)
-
-                data["playbacks"] = {}
-                playback = recording.find("playback")
-                if playback is None:
-                    continue
-
-                for format in playback.iter("format"):
-                    type = format.find("type").text
-
-                    if type == "ai-summary":
-                        summary = parse_ai_summary_playback(format)
-                        if summary.get("url"):
-                            data["playbacks"][type] = summary
-                        continue
-
-                    if type not in ("presentation", "video"):
-                        logger.warning(
-                            "Unhandled recording playback format %r for recording %s",
-                            type,
-                            data["recordID"],
-                        )
-                        continue
-
-                    images = []
-                    preview = format.find("preview")
-                    if preview is not None:
-                        for i in format.find("preview").find("images").iter("image"):
-                            image = {k: v for k, v in i.attrib.items()}
-                            image["url"] = i.text
-                            images.append(image)
-
-                    data["playbacks"][type] = {
-                        "url": (media_url := format.find("url").text),
-                        "images": images,
-                    }
-                    if type == "video":
-                        data["playbacks"][type]["direct_link"] = (
-                            media_url + "video-0.m4v"
-                        )
-                result.append(data)
-        except (AttributeError, TypeError, ValueError) as exception:
-            logger.error(exception)
-        return sorted(result, key=lambda x: x["start_date"], reverse=True)
+        The recordings are requested ``page_size`` at a time. Servers ignoring
+        the ``offset`` and ``limit`` parameters return every recording at once,
+        and are only queried again if that makes exactly one page.
+
+        https://docs.bigbluebutton.org/development/api/#get-getrecordings
+        """
+        bbb = cls(None)
+
+        def get_server_recordings(server):
+            recordings = {}
+            record_ids = set()
+            while True:
+                params = {"offset": len(record_ids), "limit": page_size}
+                root = bbb._send_request(
+                    bbb.bbb_request("getRecordings", params=params, server=server)
+                )
+                if root.findtext("returncode") != "SUCCESS":
+                    raise BigBlueButtonUnavailable()
+
+                # Recordings without playback and malformed ones are not
+                # parsed, the pages are counted on the raw elements.
+                page_ids = [
+                    element.findtext("recordID")
+                    for element in root.iterfind("recordings/recording")
+                ]
+                count = len(record_ids)
+                record_ids.update(page_ids)
+                recordings.update(
+                    (recording["recordID"], recording)
+                    for recording in parse_recordings(root)
+                )
+                if len(page_ids) < page_size or len(record_ids) == count:
+                    return list(recordings.values())
+
+        return [
+            recording
+            for server in fan_out(get_server_recordings, get_bbb_servers())
+            for recording in server
+        ]
 
     def update_recordings(self, recording_ids, metadata):
         """Update the recordings of a meeting.
@@ -398,10 +1035,11 @@ class BBB:
         https://docs.bigbluebutton.org/dev/api.html#updaterecordings
         """
         meta = {f"meta_{key}": value for (key, value) in metadata.items()}
-        request = self.bbb_request(
+        data = self.send_to_all_servers(
             "updateRecordings", params={"recordID": ",".join(recording_ids), **meta}
         )
-        return self.bbb_response(request)
+        self.forget_cached_responses(recording_ids)
+        return data
 
     def prepare_request_to_join_bbb(self, meeting_role, fullname):
         """Join a BBB meeting.
@@ -429,7 +1067,12 @@ class BBB:
         https://docs.bigbluebutton.org/development/api/#end
         """
         request = self.bbb_request("end", params={"meetingID": self.meeting_id})
-        return self.bbb_response(request)
+        forget_meeting_in_snapshot(self.meeting_id)
+        forget_meeting_started(self.meeting_id)
+        data = self.bbb_response(request)
+        forget_meeting_server(self.meeting_id)
+        self.forget_cached_responses()
+        return data
 
     def send_meeting_files(self, meeting_files):
         """Send files to a BBB meeting."""
@@ -472,3 +1115,47 @@ class BBB:
             "insertDocument", params={"meetingID": self.meeting_id}
         )
         background_upload.delay(request.url, payload)
+
+
+class BBBBatch:
+    """Issue the same read-only BBB API call for several meetings concurrently.
+
+    Calls run in a bounded thread pool, so that the state of N meetings costs
+    roughly one BBB round-trip instead of N. Results are mappings from meeting
+    ids to the value :class:`BBB` would return, or ``None`` when BBB could not
+    be reached for that meeting.
+    """
+
+    def __init__(self, meeting_ids, max_workers=None):
+        self.meeting_ids = list(dict.fromkeys(meeting_ids))
+        self.max_workers = (
+            max_workers or current_app.config["BIGBLUEBUTTON_MAX_CONCURRENT_REQUESTS"]
+        )
+
+    def _map(self, method, **kwargs):
+        if not self.meeting_ids:
+            return {}
+
+        app = current_app._get_current_object()
+
+        def call(meeting_id):
+            with app.app_context():
+                try:
+                    return getattr(BBB(meeting_id), method)(**kwargs)
+                except BigBlueButtonUnavailable:
+                    return None
+
+        max_workers = min(self.max_workers, len(self.meeting_ids))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(
+                zip(self.meeting_ids, executor.map(call, self.meeting_ids), strict=True)
+            )
+
+    def is_running(self):
+        return self._map("is_running")
+
+    def get_meeting_info(self):
+        return self._map("get_meeting_info")
+
+    def get_recordings(self):
+        return self._map("get_recordings")
@@ -1,6 +1,10 @@
 from datetime import datetime
 
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
 from . import db
+from . import trigram_index
 
 group_member_table = db.Table(
     "group_member",
@@ -10,6 +14,11 @@ group_member_table = db.Table(
 
 
 class Group(db.Model):
+    __table_args__ = (
+        db.Index("ix_group_created_at_id", "created_at", "id"),
+        trigram_index("ix_group_name_trgm", "name"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
 
     created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
@@ -39,3 +48,47 @@ class Group(db.Model):
             .where(group_member_table.c.group_id == self.id)
             .order_by(User.family_name, User.given_name)
         )
+
+
+@event.listens_for(Session, "before_flush")
+def refresh_members_permissions(session, flush_context, instances):
+    """Recompute the permissions of the users whose groups changed.
+
+    Memberships changed through an already loaded ``User.groups`` collection
+    are handled right away by its listeners.
+    """
+    from b3desk.models.users import PERMISSIONS
+    from b3desk.models.users import User
+
+    deleted_groups = {obj for obj in session.deleted if isinstance(obj, Group)}
+    edited_groups = {
+        obj
+        for obj in session.dirty
+        if isinstance(obj, Group)
+        and any(
+            db.inspect(obj).attrs[permission].history.has_changes()
+            for permission in PERMISSIONS
+        )
+    }
+    users = set()
+    for obj in session.dirty | session.new:
+        if isinstance(obj, User) and db.inspect(obj).attrs.groups.history.has_changes():
+            users.add(obj)
+        elif isinstance(obj, Group):
+            history = db.inspect(obj).attrs.members.history
+            users.update(history.added or (), history.deleted or ())
+
+    if group_ids := [group.id for group in deleted_groups | edited_groups]:
+        users.update(
+            session.scalars(
+                db.select(User)
+                .join(group_member_table, User.id == group_member_table.c.user_id)
+                .where(group_member_table.c.group_id.in_(group_ids))
+                .options(db.selectinload(User.groups))
+            ).unique()
+        )
+
+    for user in users - set(session.deleted):
+        user.refresh_permissions(
+            [group for group in user.groups if group not in deleted_groups]
+        )
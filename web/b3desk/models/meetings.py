@@ -26,6 +26,8 @@ from b3desk.utils import get_random_alphanumeric_string
 from b3desk.utils import secret_key
 
 from . import db
+from . import trigram_index
+from .recordings import Recording
 from .users import User
 
 
@@ -36,7 +38,9 @@ class AccessLevel(IntEnum):
 
 class MeetingAccess(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
-    meeting_id = db.Column(db.Integer, db.ForeignKey("meeting.id"), primary_key=True)
+    meeting_id = db.Column(
+        db.Integer, db.ForeignKey("meeting.id"), primary_key=True, index=True
+    )
     level = db.Column(db.Integer, nullable=False)
 
     user = db.relationship("User", backref="user_meeting_access")
@@ -85,7 +89,9 @@ class MeetingFiles(BaseMeetingFiles, db.Model):
     title = db.Column(db.Unicode(4096))
     url = db.Column(db.Unicode(4096))
     nc_path = db.Column(db.Unicode(4096))
-    meeting_id = db.Column(db.Integer, db.ForeignKey("meeting.id"), nullable=False)
+    meeting_id = db.Column(
+        db.Integer, db.ForeignKey("meeting.id"), nullable=False, index=True
+    )
     owner_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     is_downloadable = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.Date)
@@ -104,8 +110,23 @@ class MeetingFiles(BaseMeetingFiles, db.Model):
 
 
 class Meeting(db.Model):
+    __table_args__ = (
+        # Shadow meetings are a small part of the table, and are the only ones
+        # looked up by their last connection date.
+        db.Index(
+            "ix_meeting_shadow_last_connection_utc_datetime",
+            "last_connection_utc_datetime",
+            postgresql_where=db.text("is_shadow"),
+            sqlite_where=db.text("is_shadow = 1"),
+        ),
+        db.Index("ix_meeting_created_at_id", "created_at", "id"),
+        trigram_index("ix_meeting_name_trgm", "name"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    owner_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    owner_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), nullable=False, index=True
+    )
     owner = db.relationship("User")
 
     created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
@@ -113,6 +134,12 @@ class Meeting(db.Model):
         db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False
     )
     files = db.relationship("MeetingFiles", back_populates="meeting")
+    recordings = db.relationship(
+        Recording,
+        back_populates="meeting",
+        cascade="all, delete-orphan",
+        order_by=Recording.start_date.desc(),
+    )
     last_connection_utc_datetime = db.Column(db.DateTime)
     is_shadow = db.Column(db.Boolean, unique=False, default=False)
     visio_code = db.Column(db.Unicode(50), unique=True, nullable=False)
@@ -204,21 +231,30 @@ class Meeting(db.Model):
         )
 
 
-def get_meeting_from_bbb_meeting_id(bbb_meeting_id):
-    """Retrieve a Meeting from a BBB-formatted meeting ID like ``meeting-persistent-{id}--{hash}``."""
+def parse_bbb_meeting_id(bbb_meeting_id):
+    """Return the meeting id of a BBB meeting ID like ``meeting-persistent-{id}--{hash}``."""
     try:
         id = bbb_meeting_id.split("-")[2]
     except (IndexError, AttributeError):
         return None
     if not id.isdigit():
         return None
+    return id
+
+
+def get_meeting_from_bbb_meeting_id(bbb_meeting_id):
+    """Retrieve a Meeting from a BBB-formatted meeting ID like ``meeting-persistent-{id}--{hash}``."""
+    if (id := parse_bbb_meeting_id(bbb_meeting_id)) is None:
+        return None
     return get_meeting_from_meeting_id(id)
 
 
 class PreviousVoiceBridge(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     voiceBridge = db.Column(db.Unicode(50), unique=True, nullable=False)
-    archived_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    archived_at = db.Column(
+        db.DateTime, default=datetime.now, nullable=False, index=True
+    )
 
 
 def get_all_previous_voiceBridges():
@@ -367,6 +403,68 @@ def create_and_save_shadow_meeting(user):
     return meeting
 
 
+def get_user_meetings(
+    user, order_key="created_at", reverse_order=True, favorite_only=False
+):
+    """Return the meetings a user owns or is a delegate of, for the welcome page.
+
+    The meetings are loaded with their owner and the owner groups, and their
+    ``is_favorite`` and ``has_delegates`` attributes are set, so listing them
+    takes a constant number of queries. When ``favorite_only`` is set and the
+    user has no favorite meeting, all the meetings are returned.
+    """
+    is_favorite = (
+        db.select(favorite_table.c.meeting_id)
+        .where(
+            favorite_table.c.meeting_id == Meeting.id,
+            favorite_table.c.user_id == user.id,
+        )
+        .exists()
+    )
+    has_delegates = (
+        db.select(MeetingAccess.meeting_id)
+        .where(
+            MeetingAccess.meeting_id == Meeting.id,
+            MeetingAccess.level == AccessLevel.DELEGATE,
+        )
+        .exists()
+    )
+    delegated_meeting_ids = db.select(MeetingAccess.meeting_id).where(
+        MeetingAccess.user_id == user.id,
+        MeetingAccess.level == AccessLevel.DELEGATE,
+    )
+    order_column = (
+        db.func.lower(Meeting.name) if order_key == "name" else Meeting.created_at
+    )
+    order_by = (
+        (order_column.desc(), Meeting.id.desc())
+        if reverse_order
+        else (order_column, Meeting.id)
+    )
+    query = (
+        db.select(Meeting, is_favorite, has_delegates)
+        .where(
+            or_(
+                db.and_(Meeting.owner_id == user.id, Meeting.is_shadow.isnot(True)),
+                Meeting.id.in_(delegated_meeting_ids),
+            )
+        )
+        .options(db.joinedload(Meeting.owner))
+        .order_by(*order_by)
+    )
+
+    rows = db.session.execute(query.where(is_favorite)).all() if favorite_only else []
+    if not rows:
+        rows = db.session.execute(query).all()
+
+    meetings = []
+    for meeting, meeting_is_favorite, meeting_has_delegates in rows:
+        meeting.is_favorite = meeting_is_favorite
+        meeting.has_delegates = meeting_has_delegates
+        meetings.append(meeting)
+    return meetings
+
+
 def get_or_create_shadow_meeting(user):
     """Retrieve the user's shadow meeting or create one if it doesn't exist."""
     shadow_meetings = [
@@ -0,0 +1,178 @@
+# +----------------------------------------------------------------------------+
+# | B3DESK                                                                  |
+# +----------------------------------------------------------------------------+
+#
+#   This program is free software: you can redistribute it and/or modify it
+# under the terms of the European Union Public License 1.2 version.
+#
+#   This program is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE.
+import contextlib
+from datetime import datetime
+
+from flask import current_app
+
+from b3desk import BigBlueButtonUnavailable
+from b3desk import cache
+
+from . import db
+
+RECORDINGS_RECONCILED_CACHE_KEY = "recordings_reconciled"
+MEETING_RECORDINGS_FETCHED_CACHE_KEY = "meeting_recordings_fetched_{meeting_id}"
+
+
+class Recording(db.Model):
+    """A BBB recording of a meeting.
+
+    Recordings are stored when BBB calls back for each of their formats, and
+    periodically reconciled with the recordings BBB still has, so they can be
+    listed without querying BBB.
+    """
+
+    __table_args__ = (
+        db.Index("ix_recording_meeting_id_start_date", "meeting_id", "start_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recordID = db.Column(db.Unicode(255), unique=True, nullable=False)
+    meeting_id = db.Column(db.Integer, db.ForeignKey("meeting.id"), nullable=False)
+    meeting = db.relationship("Meeting", back_populates="recordings")
+
+    name = db.Column(db.Unicode(4096))
+    participants = db.Column(db.Integer)
+    start_date = db.Column(db.DateTime(timezone=True), nullable=False)
+    end_date = db.Column(db.DateTime(timezone=True), nullable=False)
+    # Playback formats, with their URLs and preview images.
+    playbacks = db.Column(db.JSON, nullable=False, default=dict)
+    synchronized_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    # Number of consecutive reconciliations the recording was missing from.
+    missed_reconciliations = db.Column(
+        db.Integer, default=0, server_default="0", nullable=False
+    )
+
+
+def get_meeting_recording(meeting, bbb_recording_id):
+    """Return the stored recording of a meeting, or None."""
+    return db.session.scalar(
+        db.select(Recording).where(
+            Recording.meeting_id == meeting.id,
+            Recording.recordID == bbb_recording_id,
+        )
+    )
+
+
+def update_recording(recording, meeting, data):
+    """Update a recording with the values returned by BBB."""
+    values = {
+        "name": data["name"],
+        "participants": data.get("participants"),
+        "start_date": data["start_date"],
+        "end_date": data.get("end_date", data["start_date"]),
+        "playbacks": data["playbacks"],
+    }
+    recording.meeting = meeting
+    for key, value in values.items():
+        setattr(recording, key, value)
+    recording.synchronized_at = datetime.now()
+    recording.missed_reconciliations = 0
+    db.session.add(recording)
+    return recording
+
+
+def store_recording(meeting, data):
+    """Create or update a recording from the values returned by BBB."""
+    recording = db.session.scalar(
+        db.select(Recording).where(Recording.recordID == data["recordID"])
+    ) or Recording(recordID=data["recordID"])
+    return update_recording(recording, meeting, data)
+
+
+def refresh_recording(meeting, bbb_recording_id):
+    """Fetch a recording from BBB and store it.
+
+    Return None if BBB does not know the recording.
+    """
+    recordings = meeting.bbb.get_recordings(
+        bbb_recording_id=bbb_recording_id, cached=False
+    )
+    if not recordings:
+        return None
+
+    return store_recording(meeting, {"recordID": bbb_recording_id, **recordings[0]})
+
+
+def get_meeting_recordings(meeting):
+    """Return the stored recordings of a meeting, latest first.
+
+    Until a reconciliation has completed, the recordings of each meeting are
+    fetched from BBB and stored the first time they are listed, as the
+    recording callbacks may only have stored some of them.
+    """
+    from b3desk.models.bbb import BBB
+
+    fetched_key = MEETING_RECORDINGS_FETCHED_CACHE_KEY.format(meeting_id=meeting.id)
+    if not cache.get(RECORDINGS_RECONCILED_CACHE_KEY) and not cache.get(fetched_key):
+        with contextlib.suppress(BigBlueButtonUnavailable):
+            for data in BBB(meeting.meetingID).get_recordings():
+                store_recording(meeting, data)
+            db.session.commit()
+            cache.set(fetched_key, True, timeout=0)
+
+    return meeting.recordings
+
+
+def reconcile_recordings():
+    """Synchronise the stored recordings with all the recordings of BBB.
+
+    Recordings of unknown meetings are ignored. Stored recordings BBB does not
+    return anymore are only removed after ``RECORDING_RECONCILIATION_MAX_MISSES``
+    consecutive reconciliations, so an incomplete answer of BBB does not empty
+    the catalog. Return the number of recordings returned by BBB.
+    """
+    from b3desk.models.bbb import BBB
+    from b3desk.models.meetings import Meeting
+    from b3desk.models.meetings import parse_bbb_meeting_id
+
+    recordings = BBB.get_all_recordings(
+        page_size=current_app.config["RECORDING_RECONCILIATION_PAGE_SIZE"]
+    )
+
+    ids = {
+        int(id)
+        for recording in recordings
+        if (id := parse_bbb_meeting_id(recording["meetingID"])) is not None
+    }
+    meetings = {
+        meeting.meetingID: meeting
+        for meeting in db.session.scalars(
+            db.select(Meeting)
+            .where(Meeting.id.in_(ids))
+            .options(db.joinedload(Meeting.owner))
+        )
+    }
+    stored = {
+        recording.recordID: recording
+        for recording in db.session.scalars(db.select(Recording))
+    }
+
+    record_ids = set()
+    for data in recordings:
+        if meeting := meetings.get(data["meetingID"]):
+            recording = stored.get(data["recordID"]) or Recording(
+                recordID=data["recordID"]
+            )
+            update_recording(recording, meeting, data)
+            record_ids.add(data["recordID"])
+
+    max_misses = current_app.config["RECORDING_RECONCILIATION_MAX_MISSES"]
+    for record_id, recording in stored.items():
+        if record_id in record_ids:
+            continue
+
+        recording.missed_reconciliations += 1
+        if recording.missed_reconciliations >= max_misses:
+            db.session.delete(recording)
+    db.session.commit()
+    cache.set(RECORDINGS_RECONCILED_CACHE_KEY, True, timeout=0)
+    return len(record_ids)
@@ -9,16 +9,101 @@
 # ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
 # FOR A PARTICULAR PURPOSE.
 import hashlib
+import threading
+import time
 from datetime import date
 from datetime import datetime
 from datetime import timezone
 
 from flask import current_app
+from sqlalchemy import event
 
 from b3desk.nextcloud import update_user_nc_credentials
 from b3desk.utils import secret_key
 
 from . import db
+from . import trigram_index
+
+# Permissions granted by groups, denormalised on the users.
+PERMISSIONS = ("enable_sip", "enable_file_sharing", "enable_ai_summary")
+
+# Per-process cache of the users resolved from a session userinfo, by OIDC
+# subject: (userinfo fingerprint, user id, resolution day, expiration time).
+resolved_users = {}
+resolved_users_lock = threading.Lock()
+
+
+def get_groups_permission(groups, permission):
+    """Return True if any group grants a permission, False if all groups deny it.
+
+    Return None otherwise, meaning the instance setting applies.
+    """
+    if any(getattr(group, permission) for group in groups):
+        return True
+    if groups and all(getattr(group, permission) is False for group in groups):
+        return False
+    return None
+
+
+def get_user_claims(user_info):
+    """Return the user fields read from the identity server claims."""
+    mapping = current_app.config["OIDC_CLAIMS_MAPPING"]
+    return {
+        "given_name": user_info.get(mapping.get("given_name", "given_name"), ""),
+        "family_name": user_info.get(mapping.get("family_name", "family_name"), ""),
+        "preferred_username": user_info.get(
+            mapping.get("preferred_username", "preferred_username")
+        ),
+        "email": user_info[mapping.get("email", "email")].lower(),
+    }
+
+
+def get_user_claims_fingerprint(claims):
+    return hashlib.sha256(
+        "\x00".join(str(claims[key]) for key in sorted(claims)).encode()
+    ).hexdigest()
+
+
+def get_session_user(user_info):
+    """Return the user of an authenticated session.
+
+    The full :func:`get_or_create_user` path is only run when the claims of the
+    user changed, once a day, or after ``USER_CACHE_TIMEOUT`` seconds. In
+    between, the user is loaded by its primary key, without any write.
+    """
+    timeout = current_app.config["USER_CACHE_TIMEOUT"]
+    if not timeout:
+        return get_or_create_user(user_info)
+
+    claims = get_user_claims(user_info)
+    key = user_info.get("sub") or claims["email"]
+    fingerprint = get_user_claims_fingerprint(claims)
+    now = time.monotonic()
+
+    with resolved_users_lock:
+        cached = resolved_users.get(key)
+
+    if cached:
+        cached_fingerprint, user_id, day, expires_at = cached
+        if (
+            cached_fingerprint == fingerprint
+            and day == date.today()
+            and expires_at > now
+            and (user := db.session.get(User, user_id))
+            and user.email == claims["email"]
+        ):
+            return user
+
+    user = get_or_create_user(user_info)
+    with resolved_users_lock:
+        for expired_key in [
+            cached_key
+            for cached_key, (*_, expires_at) in resolved_users.items()
+            if expires_at <= now
+        ]:
+            del resolved_users[expired_key]
+        resolved_users[key] = (fingerprint, user.id, date.today(), now + timeout)
+    return user
 
 
 def get_or_create_user(user_info):
@@ -26,13 +111,11 @@ def get_or_create_user(user_info):
 
     Updates user information if any fields have changed and saves to database.
     """
-    mapping = current_app.config["OIDC_CLAIMS_MAPPING"]
-    given_name = user_info.get(mapping.get("given_name", "given_name"), "")
-    family_name = user_info.get(mapping.get("family_name", "family_name"), "")
-    preferred_username = user_info.get(
-        mapping.get("preferred_username", "preferred_username")
-    )
-    email = user_info[mapping.get("email", "email")].lower()
+    claims = get_user_claims(user_info)
+    given_name = claims["given_name"]
+    family_name = claims["family_name"]
+    preferred_username = claims["preferred_username"]
+    email = claims["email"]
 
     user = User.get_user_by_email(email)
 
@@ -78,6 +161,13 @@ def get_or_create_user(user_info):
 
 
 class User(db.Model):
+    __table_args__ = (
+        db.Index("ix_user_created_at_id", "created_at", "id"),
+        trigram_index("ix_user_given_name_trgm", "given_name"),
+        trigram_index("ix_user_family_name_trgm", "family_name"),
+        trigram_index("ix_user_email_trgm", "email"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.Unicode(255), unique=True)
     given_name = db.Column(db.Unicode(50))
@@ -91,6 +181,12 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
     admin = db.Column(db.Boolean, default=False, nullable=False)
 
+    # Permissions granted by the groups of the user, kept up to date when
+    # groups or memberships change. None means the instance setting applies.
+    enable_sip = db.Column(db.Boolean)
+    enable_file_sharing = db.Column(db.Boolean)
+    enable_ai_summary = db.Column(db.Boolean)
+
     meetings = db.relationship("Meeting", back_populates="owner")
     favorites = db.relationship(
         "Meeting", secondary="favorite", back_populates="favorite_of"
@@ -147,32 +243,42 @@ class User(db.Model):
     def get_user_by_email(cls, email):
         return db.session.query(User).filter(User.email == email).first()
 
+    def refresh_permissions(self, groups=None):
+        """Recompute the permissions granted by the groups of the user."""
+        groups = self.groups if groups is None else groups
+        for permission in PERMISSIONS:
+            setattr(self, permission, get_groups_permission(groups, permission))
+
     @property
     def can_use_file_sharing(self):
-        if not self.groups:
+        if self.enable_file_sharing is None:
             return current_app.config["FILE_SHARING"]
-        if any(group.enable_file_sharing for group in self.groups):
-            return True
-        if all(group.enable_file_sharing is False for group in self.groups):
-            return False
-        return current_app.config["FILE_SHARING"]
+        return self.enable_file_sharing
 
     @property
     def can_use_sip(self):
-        if not self.groups:
+        if self.enable_sip is None:
             return current_app.config["ENABLE_SIP"]
-        if any(group.enable_sip for group in self.groups):
-            return True
-        if all(group.enable_sip is False for group in self.groups):
-            return False
-        return current_app.config["ENABLE_SIP"]
+        return self.enable_sip
 
     @property
     def can_use_ai_summary(self):
-        if not self.groups:
+        if self.enable_ai_summary is None:
             return current_app.config["ENABLE_AI_SUMMARY"]
-        if any(group.enable_ai_summary for group in self.groups):
-            return True
-        if all(group.enable_ai_summary is False for group in self.groups):
-            return False
-        return current_app.config["ENABLE_AI_SUMMARY"]
+        return self.enable_ai_summary
+
+
+def groups_are_loaded(user):
+    return "groups" in db.inspect(user).dict
+
+
+@event.listens_for(User.groups, "append")
+def refresh_permissions_on_group_append(user, group, initiator):
+    if groups_are_loaded(user):
+        user.refresh_permissions([*user.groups, group])
+
+
+@event.listens_for(User.groups, "remove")
+def refresh_permissions_on_group_remove(user, group, initiator):
+    if groups_are_loaded(user):
+        user.refresh_permissions([other for other in user.groups if other is not group])
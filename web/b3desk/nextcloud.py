@@ -1,25 +1,66 @@
+import contextlib
+import posixpath
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from datetime import datetime
 from datetime import timedelta
+from pathlib import Path
 from urllib.parse import unquote
 from urllib.parse import urlparse
 from urllib.parse import urlunparse
+from xml.etree import ElementTree
 
 import requests
 from flask import current_app
 from flask import g
 from webdav3.client import Client as webdavClient
+from webdav3.client import WebDavXmlUtils
+from webdav3.client import wrap_connection_error
 from webdav3.exceptions import ConnectionException
 from webdav3.exceptions import NoConnection
+from webdav3.exceptions import RemoteResourceNotFound
 from webdav3.exceptions import ResponseErrorCode
 from webdav3.exceptions import WebDavException
+from webdav3.urn import Urn
 
 from b3desk import cache
+from b3desk.caching import coalesced
+from b3desk.transport import KeyedPooledTransport
+from b3desk.transport import PooledTransport
 
 NEXTCLOUD_BACKOFF_INITIAL = 1
 NEXTCLOUD_BACKOFF_MULTIPLIER = 1
 NEXTCLOUD_BACKOFF_MAX = 1
 NEXTCLOUD_REQUEST_TIMEOUT = 10
 
+SECONDARY_IDENTITY_PROVIDER_CONCURRENCY = 4
+SECONDARY_IDENTITY_PROVIDER_KEEPALIVE = 60
+CACHE_KEY_SECONDARY_IDENTITY_PROVIDER_TOKEN = "secondary-identity-provider-token"
+# Tokens are renewed a bit before they expire, so that they never expire while
+# a request is being sent
+TOKEN_EXPIRY_MARGIN = 30
+
+# Status codes of the MKCOL creating a chunked upload, when the server does not
+# support Nextcloud chunked uploads.
+CHUNKED_UPLOAD_UNSUPPORTED_CODES = (404, 405, 409)
+
+# Only asks for the type of the root collection, so that the probe stays cheap
+# whatever the size of the user's Nextcloud home.
+PROBE_BODY = (
+    '<?xml version="1.0"?>'
+    '<d:propfind xmlns:d="DAV:"><d:prop><d:resourcetype/></d:prop></d:propfind>'
+)
+
+ETAG_PROPFIND_BODY = (
+    '<?xml version="1.0"?>'
+    '<d:propfind xmlns:d="DAV:"><d:prop><d:getetag/></d:prop></d:propfind>'
+)
+
+NEXTCLOUD_AVAILABLE_CACHE_KEY = "nc_available:{user_id}:{nc_locator}"
+NEXTCLOUD_LISTING_CACHE_KEY = "nc_listing:{user_id}:{etag}:{path}"
+
 
 class WebDAVClient(webdavClient):
     """WebDAV client with fix for spaces in webdav_root.
@@ -31,6 +72,169 @@ class WebDAVClient(webdavClient):
     def get_full_path(self, urn):
         return f"{unquote(self.webdav.root or '')}{urn.path()}"
 
+    @wrap_connection_error
+    def open_download(self, remote_path, headers=None):
+        """Send a GET request for a file and return the streamed response.
+
+        Unlike ``download_sync``, nothing is read from the body, so the caller
+        can forward it chunk by chunk.
+        """
+        headers_ext = [f"{key}: {value}" for key, value in (headers or {}).items()]
+        return self.execute_request(
+            action="download",
+            path=Urn(remote_path).quote(),
+            headers_ext=headers_ext,
+        )
+
+    @wrap_connection_error
+    def probe(self):
+        """Check that the root of the account can be reached.
+
+        Unlike ``list``, this sends a depth 0 PROPFIND, so the content of the
+        root is never listed. Returns the short body of the response, reading it
+        releases the connection to the pool.
+        """
+        response = self.execute_request(
+            action="info",
+            path=Urn("/").quote(),
+            data=PROBE_BODY,
+            headers_ext=["Depth: 0", "Content-Type: application/xml"],
+        )
+        return response.content
+
+    @wrap_connection_error
+    def get_etag(self, remote_path):
+        """Return the ETag of a resource, with a depth 0 PROPFIND.
+
+        Nextcloud changes the ETag of a directory whenever its content changes.
+        """
+        response = self.execute_request(
+            action="info",
+            path=Urn(remote_path).quote(),
+            data=ETAG_PROPFIND_BODY,
+            headers_ext=["Depth: 0", "Content-Type: application/xml"],
+        )
+        return ElementTree.fromstring(response.content).findtext(".//{DAV:}getetag")
+
+    def get_relative_path(self, href_path):
+        """Return the path of a listed resource, relative to the root of the account.
+
+        Listed paths are absolute, so they also start with the path of the
+        Nextcloud location when it is not served at the root of its domain.
+        """
+        prefix = unquote(urlparse(self.webdav.hostname).path + self.webdav.root)
+        path = href_path.strip("/")
+        prefix = prefix.strip("/")
+        if path == prefix:
+            return ""
+        if prefix and path.startswith(f"{prefix}/"):
+            path = path[len(prefix) + 1 :]
+        return path
+
+    @wrap_connection_error
+    def list_directory(self, remote_path):
+        """Return the information of the entries of a directory.
+
+        Unlike ``list``, the existence of the directory is not checked with an
+        additional request beforehand. The paths of the entries are relative to
+        the root of the account.
+        """
+        urn = Urn(remote_path, directory=True)
+        response = self.execute_request(action="list", path=urn.quote())
+        directory_path = urn.path().strip("/")
+        entries = []
+        for info in WebDavXmlUtils.parse_get_list_info_response(response.content):
+            info["path"] = self.get_relative_path(info["path"])
+            if info["path"] != directory_path:
+                entries.append(info)
+        return entries
+
+    def execute_upload_request(self, method, url, headers=None, data=None):
+        """Send a request to the chunked uploads endpoint of Nextcloud."""
+        response = self.session.request(
+            method=method,
+            url=url,
+            headers={**self.get_headers(None), **(headers or {})},
+            timeout=self.timeout,
+            data=data,
+            verify=self.verify,
+        )
+        if response.status_code >= 400:
+            raise ResponseErrorCode(
+                url=url, code=response.status_code, message=response.content
+            )
+        return response
+
+    @wrap_connection_error
+    def upload_chunked(
+        self, remote_path, local_path, chunk_size, parallelism, progress=None
+    ):
+        """Upload a file with the Nextcloud chunked upload v2 protocol.
+
+        The chunks are sent in parallel to a temporary upload collection, then
+        assembled by Nextcloud with a MOVE to the destination. Files fitting in
+        a single chunk, and servers that do not support chunked uploads, get a
+        single PUT instead.
+
+        https://docs.nextcloud.com/server/latest/developer_manual/client_apis/WebDAV/chunking.html
+        """
+        total_size = Path(local_path).stat().st_size
+        if total_size <= chunk_size:
+            return self.upload_sync(
+                remote_path=remote_path, local_path=local_path, progress=progress
+            )
+
+        uploads_root = self.webdav.root.replace("/dav/files/", "/dav/uploads/", 1)
+        upload_url = (
+            f"{self.webdav.hostname}{uploads_root.rstrip('/')}/{uuid.uuid4().hex}"
+        )
+        headers = {
+            "Destination": self.get_url(Urn(remote_path).quote()),
+            "OC-Total-Length": str(total_size),
+        }
+
+        try:
+            self.execute_upload_request("MKCOL", upload_url, headers)
+        except ResponseErrorCode as exception:
+            if exception.code not in CHUNKED_UPLOAD_UNSUPPORTED_CODES:
+                raise
+            return self.upload_sync(
+                remote_path=remote_path, local_path=local_path, progress=progress
+            )
+
+        def upload_chunk(index, offset):
+            with Path(local_path).open("rb") as local_file:
+                local_file.seek(offset)
+                data = local_file.read(chunk_size)
+            self.execute_upload_request(
+                "PUT", f"{upload_url}/{index:05d}", headers, data
+            )
+            return len(data)
+
+        try:
+            with ThreadPoolExecutor(max_workers=parallelism) as executor:
+                futures = [
+                    executor.submit(upload_chunk, index, offset)
+                    for index, offset in enumerate(
+                        range(0, total_size, chunk_size), start=1
+                    )
+                ]
+                sent = 0
+                for future in as_completed(futures):
+                    sent += future.result()
+                    if progress:
+                        progress(sent, total_size)
+
+            self.execute_upload_request("MOVE", f"{upload_url}/.file", headers)
+        except Exception:
+            with contextlib.suppress(WebDavException, requests.RequestException):
+                self.execute_upload_request("DELETE", upload_url)
+            raise
+
+
+nextcloud_transport = KeyedPooledTransport("nextcloud")
+secondary_identity_provider_transport = PooledTransport("secondary_identity_provider")
+
 
 class CircuitBreaker:
     """Circuit breaker with exponential backoff."""
@@ -88,7 +292,8 @@ def is_nextcloud_available(user, verify=False, retry_on_auth_error=False):
     """Check if Nextcloud is available for a user.
 
     If verify=False (default), only checks credentials and circuit breakers.
-    If verify=True, performs a WebDAV connection test.
+    If verify=True, performs a WebDAV connection test, whose success is cached
+    for NC_AVAILABILITY_CACHE_DURATION seconds.
     If retry_on_auth_error=True and verify=True, renews credentials on 401/403.
     """
     if user.nc_locator and nextcloud_breaker.is_blocked(user.nc_locator):
@@ -97,7 +302,7 @@ def is_nextcloud_available(user, verify=False, retry_on_auth_error=False):
     if user_auth_breaker.is_blocked(user.id):
         return False
 
-    if not verify:
+    if not verify or was_nextcloud_available(user):
         return user.has_nc_credentials
 
     def handle_error(should_retry=False, auth_error=False):
@@ -113,7 +318,7 @@ def is_nextcloud_available(user, verify=False, retry_on_auth_error=False):
         return handle_error(should_retry=retry_on_auth_error)
 
     try:
-        client.list()
+        client.probe()
     except WebDavException as exception:
         current_app.logger.warning("WebDAV error: %s", exception)
 
@@ -127,9 +332,30 @@ def is_nextcloud_available(user, verify=False, retry_on_auth_error=False):
         )
 
     user_auth_breaker.clear(user.id)
+    remember_nextcloud_availability(user)
     return True
 
 
+def nextcloud_availability_cache_key(user):
+    """Return the cache key of the availability of a user's Nextcloud instance."""
+    return NEXTCLOUD_AVAILABLE_CACHE_KEY.format(
+        user_id=user.id, nc_locator=user.nc_locator
+    )
+
+
+def was_nextcloud_available(user):
+    """Check if Nextcloud was recently found available for a user."""
+    return user.has_nc_credentials and bool(
+        cache.get(nextcloud_availability_cache_key(user))
+    )
+
+
+def remember_nextcloud_availability(user):
+    """Cache that Nextcloud was found available for a user."""
+    if duration := current_app.config["NC_AVAILABILITY_CACHE_DURATION"]:
+        cache.set(nextcloud_availability_cache_key(user), True, timeout=duration)
+
+
 def is_nextcloud_unavailable_error(error):
     """Check if a WebDAV error indicates Nextcloud is unavailable."""
     if isinstance(error, (NoConnection, ConnectionException)):
@@ -143,9 +369,22 @@ def is_auth_error(error):
     return isinstance(error, ResponseErrorCode) and error.code in (401, 403)
 
 
+def get_nextcloud_session(nc_locator, nc_login):
+    """Return the pooled HTTP session used to reach a Nextcloud account."""
+    return nextcloud_transport.session(
+        (nc_locator, nc_login),
+        max_size=current_app.config["NC_POOL_MAX_ACCOUNTS"],
+        # Chunked uploads send several chunks at once on the same session
+        pool_size=current_app.config["NC_UPLOAD_PARALLELISM"],
+        keepalive=current_app.config["NC_POOL_KEEPALIVE"],
+    )
+
+
 def create_webdav_client(user) -> WebDAVClient | None:
     """Create a WebDAV client configured for a user's Nextcloud account.
 
+    The client uses the pooled session of the account, so that connections to
+    Nextcloud are kept alive from one call to the other.
     Also stores nc_locator in g for error handler access.
     """
     if not user.nc_login or not user.nc_locator or not user.nc_token:
@@ -159,7 +398,68 @@ def create_webdav_client(user) -> WebDAVClient | None:
         "webdav_verbose": True,
         "webdav_token": user.nc_token,
     }
-    return WebDAVClient(options)
+    client = WebDAVClient(options)
+    client.session = get_nextcloud_session(user.nc_locator, user.nc_login)
+    return client
+
+
+def get_nextcloud_directory(user, client, path):
+    """Return the entries of a directory of a user's Nextcloud account.
+
+    Directories come first, then files, both sorted by name. Listings are
+    cached for NC_LISTING_CACHE_DURATION seconds, with the ETag of the
+    directory in their key, so a directory is listed again as soon as its
+    content changes. Paths are relative to the root of the account.
+    """
+    path = path.strip("/")
+    cache_key = NEXTCLOUD_LISTING_CACHE_KEY.format(
+        user_id=user.id, etag=client.get_etag(path or "/"), path=path
+    )
+    if (entries := cache.get(cache_key)) is not None:
+        return entries
+
+    entries = sorted(
+        (
+            {
+                "name": posixpath.basename(info["path"]),
+                "path": info["path"],
+                "is_dir": info["isdir"],
+                "size": int(info["size"]) if info["size"] else None,
+                "modified": info["modified"],
+                "content_type": info["content_type"],
+            }
+            for info in client.list_directory(path or "/")
+        ),
+        key=lambda entry: (not entry["is_dir"], entry["name"].lower()),
+    )
+    if duration := current_app.config["NC_LISTING_CACHE_DURATION"]:
+        cache.set(cache_key, entries, timeout=duration)
+    return entries
+
+
+def get_nextcloud_files_info(user, client, paths):
+    """Return the entries of several files of a user's Nextcloud account.
+
+    Files in the same directory are looked up with a single listing of that
+    directory. Files that cannot be found are missing from the result.
+    """
+    paths_by_directory = defaultdict(set)
+    for path in paths:
+        path = path.strip("/")
+        paths_by_directory[posixpath.dirname(path)].add(path)
+
+    infos = {}
+    for directory, directory_paths in paths_by_directory.items():
+        try:
+            entries = get_nextcloud_directory(user, client, directory)
+        except RemoteResourceNotFound:
+            continue
+        infos.update(
+            (entry["path"], entry)
+            for entry in entries
+            if entry["path"] in directory_paths and not entry["is_dir"]
+        )
+    return infos
 
 
 def make_nextcloud_credentials_request(url, payload, headers):
@@ -223,10 +523,18 @@ class NoUserFound(Exception):
         super().__init__(self.message)
 
 
+def get_secondary_identity_provider_session():
+    """Return the pooled HTTP session used to reach the secondary identity provider."""
+    return secondary_identity_provider_transport.session(
+        pool_size=SECONDARY_IDENTITY_PROVIDER_CONCURRENCY,
+        keepalive=SECONDARY_IDENTITY_PROVIDER_KEEPALIVE,
+    )
+
+
 def get_secondary_identity_provider_token():
     """Retrieve OAuth access token from secondary identity provider using client credentials."""
     # TODO: replace this with authlib
-    return requests.post(
+    return get_secondary_identity_provider_session().post(
         f"{current_app.config['SECONDARY_IDENTITY_PROVIDER_URI']}/auth/realms/{current_app.config['SECONDARY_IDENTITY_PROVIDER_REALM']}/protocol/openid-connect/token",
         headers={"Content-Type": "application/x-www-form-urlencoded"},
         data={
@@ -238,24 +546,14 @@ def get_secondary_identity_provider_token():
     )
 
 
-def get_secondary_identity_provider_users_from_email(email, access_token):
-    """Query secondary identity provider API to retrieve users matching the given email."""
-    return requests.get(
-        f"{current_app.config['SECONDARY_IDENTITY_PROVIDER_URI']}/auth/admin/realms/{current_app.config['SECONDARY_IDENTITY_PROVIDER_REALM']}/users",
-        headers={
-            "Authorization": f"Bearer {access_token}",
-            "cache-control": "no-cache",
-        },
-        params={"email": email},
-        timeout=NEXTCLOUD_REQUEST_TIMEOUT,
-    )
-
-
-def get_secondary_identity_provider_id_from_email(email):
-    """Get username from secondary identity provider by email.
+@coalesced(
+    CACHE_KEY_SECONDARY_IDENTITY_PROVIDER_TOKEN,
+    timeout=lambda token: max(token["expires_in"] - TOKEN_EXPIRY_MARGIN, 0),
+)
+def get_secondary_identity_provider_access_token():
+    """Request an access token from the secondary identity provider, and its lifetime.
 
-    Returns the unique username associated with the given email address.
-    Raises exceptions if no user or multiple users are found.
+    The token is cached until shortly before it expires.
     """
     try:
         token_response = get_secondary_identity_provider_token()
@@ -267,7 +565,8 @@ def get_secondary_identity_provider_id_from_email(email):
         raise exception
 
     try:
-        access_token = token_response.json()["access_token"]
+        token = token_response.json()
+        access_token = token["access_token"]
         if not access_token:
             raise MissingToken(
                 f"No token given for the B3Desk instance, {token_response}"
@@ -277,6 +576,27 @@ def get_secondary_identity_provider_id_from_email(email):
             f"No token given for the B3Desk instance, {token_response}"
         ) from err
 
+    return {"access_token": access_token, "expires_in": token.get("expires_in", 0)}
+
+
+def get_secondary_identity_provider_users_from_email(email, access_token):
+    """Query secondary identity provider API to retrieve users matching the given email."""
+    return get_secondary_identity_provider_session().get(
+        f"{current_app.config['SECONDARY_IDENTITY_PROVIDER_URI']}/auth/admin/realms/{current_app.config['SECONDARY_IDENTITY_PROVIDER_REALM']}/users",
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "cache-control": "no-cache",
+        },
+        params={"email": email},
+        timeout=NEXTCLOUD_REQUEST_TIMEOUT,
+    )
+
+
+def find_secondary_identity_provider_username(email, access_token):
+    """Return the unique username associated with an email address.
+
+    Raises exceptions if no user or multiple users are found.
+    """
     try:
         users_response = get_secondary_identity_provider_users_from_email(
             email=email, access_token=access_token
@@ -297,6 +617,74 @@ def get_secondary_identity_provider_id_from_email(email):
     return user["username"]
 
 
+def forget_secondary_identity_provider_access_token(access_token):
+    """Drop a revoked access token from the cache, unless it was already replaced."""
+    entry = cache.get(CACHE_KEY_SECONDARY_IDENTITY_PROVIDER_TOKEN)
+    if entry and entry["value"]["access_token"] == access_token:
+        cache.delete(CACHE_KEY_SECONDARY_IDENTITY_PROVIDER_TOKEN)
+
+
+def lookup_secondary_identity_provider_username(email, access_token):
+    """Return the unique username associated with an email address.
+
+    If the cached access token has been revoked or rotated, a new one is
+    requested and the lookup is sent once more.
+    """
+    try:
+        return find_secondary_identity_provider_username(email, access_token)
+    except requests.exceptions.HTTPError as exception:
+        if exception.response is None or exception.response.status_code != 401:
+            raise
+
+    forget_secondary_identity_provider_access_token(access_token)
+    access_token = get_secondary_identity_provider_access_token()["access_token"]
+    return find_secondary_identity_provider_username(email, access_token)
+
+
+def get_secondary_identity_provider_id_from_email(email):
+    """Get username from secondary identity provider by email.
+
+    Returns the unique username associated with the given email address.
+    Raises exceptions if no user or multiple users are found.
+    """
+    access_token = get_secondary_identity_provider_access_token()["access_token"]
+    return lookup_secondary_identity_provider_username(email, access_token)
+
+
+def get_secondary_identity_provider_ids_from_emails(emails):
+    """Get the usernames from secondary identity provider of several emails.
+
+    A single access token is used for every lookup, and
+    SECONDARY_IDENTITY_PROVIDER_CONCURRENCY lookups are sent at once. Returns
+    a dictionary of the usernames by email. Emails matching no user or several
+    users are mapped to None, emails whose lookup failed are missing from it.
+    """
+    access_token = get_secondary_identity_provider_access_token()["access_token"]
+    app = current_app._get_current_object()
+    failed = object()
+
+    def find_username(email):
+        with app.app_context():
+            try:
+                return lookup_secondary_identity_provider_username(email, access_token)
+            except (requests.exceptions.RequestException, MissingToken):
+                return failed
+            except (TooManyUsers, NoUserFound) as exception:
+                app.logger.warning(exception)
+                return None
+
+    emails = list(dict.fromkeys(emails))
+    with ThreadPoolExecutor(
+        max_workers=SECONDARY_IDENTITY_PROVIDER_CONCURRENCY
+    ) as executor:
+        usernames = executor.map(find_username, emails)
+        return {
+            email: username
+            for email, username in zip(emails, usernames, strict=True)
+            if username is not failed
+        }
+
+
 def has_secondary_identity_with_email(email):
     """Check if secondary identity provider is enabled and email is present."""
     return current_app.config["SECONDARY_IDENTITY_PROVIDER_ENABLED"] and email
@@ -314,10 +702,52 @@ def can_get_file_sharing_credentials(user):
     ) or user.preferred_username
 
 
-def get_user_nc_credentials(user):
+def resolve_nc_username(user):
+    """Return the Nextcloud username of a user.
+
+    The secondary identity provider is asked when configured, the
+    preferred_username is used otherwise or if the lookup fails.
+    """
+    if not has_secondary_identity_with_email(user.email):
+        return user.preferred_username
+
+    try:
+        return get_secondary_identity_provider_id_from_email(email=user.email)
+    except requests.exceptions.HTTPError:
+        pass
+    except (TooManyUsers, NoUserFound) as e:
+        current_app.logger.warning(e)
+    return user.preferred_username
+
+
+def resolve_nc_usernames(users):
+    """Return the Nextcloud usernames of several users, by user id.
+
+    Like ``resolve_nc_username``, with a single batch of lookups to the
+    secondary identity provider. Users whose lookup failed are missing from
+    the result rather than falling back to their preferred_username, which
+    could be the login of another Nextcloud account.
+    """
+    emails = [
+        user.email for user in users if has_secondary_identity_with_email(user.email)
+    ]
+    usernames = (
+        get_secondary_identity_provider_ids_from_emails(emails) if emails else {}
+    )
+    result = {}
+    for user in users:
+        if not has_secondary_identity_with_email(user.email):
+            result[user.id] = user.preferred_username
+        elif user.email in usernames:
+            result[user.id] = usernames[user.email] or user.preferred_username
+    return result
+
+
+def get_user_nc_credentials(user, nc_username=None):
     """Retrieve Nextcloud credentials (login, token, locator) for the given user.
 
     Uses secondary identity provider if configured, otherwise uses preferred_username.
+    ``nc_username`` skips the lookup, for usernames resolved beforehand.
     """
     if not can_get_file_sharing_credentials(user):
         current_app.logger.info(
@@ -325,17 +755,17 @@ def get_user_nc_credentials(user):
         )
         return {"nctoken": None, "nclocator": None, "nclogin": None}
 
-    nc_username = user.preferred_username
-    if has_secondary_identity_with_email(user.email):
-        try:
-            nc_username = get_secondary_identity_provider_id_from_email(
-                email=user.email
-            )
-        except requests.exceptions.HTTPError:
-            pass
-        except (TooManyUsers, NoUserFound) as e:
-            current_app.logger.warning(e)
+    if nc_username is None:
+        nc_username = resolve_nc_username(user)
 
+    return request_nc_credentials(nc_username)
+
+
+def request_nc_credentials(nc_username):
+    """Retrieve the Nextcloud credentials (login, token, locator) of a Nextcloud username.
+
+    Only plain values are involved, so this can be called from other threads.
+    """
     payload = {"username": nc_username}
     headers = {"X-API-KEY": current_app.config["NC_LOGIN_API_KEY"]}
     current_app.logger.info(
@@ -403,7 +833,14 @@ def update_user_nc_credentials(user, force_renew=False):
     if credentials_breaker.is_blocked(user.id):
         return False
 
-    data = get_user_nc_credentials(user)
+    return apply_user_nc_credentials(user, get_user_nc_credentials(user))
+
+
+def apply_user_nc_credentials(user, data):
+    """Store Nextcloud credentials retrieved for a user.
+
+    Returns True if the credentials were valid and stored, False otherwise.
+    """
     if (
         not data
         or data.get("error")
@@ -424,3 +861,96 @@ def update_user_nc_credentials(user, force_renew=False):
     user.nc_login = data["nclogin"]
     user.nc_last_auto_enroll = datetime.now()
     return True
+
+
+def renew_expiring_nc_credentials():
+    """Renew the Nextcloud credentials that expire in a few days.
+
+    Credentials are renewed NC_CREDENTIALS_RENEWAL_MARGIN_DAYS days before
+    their expiration. Users are processed NC_CREDENTIALS_RENEWAL_BATCH_SIZE at a time, oldest
+    credentials first, and NC_CREDENTIALS_RENEWAL_CONCURRENCY credentials are
+    retrieved at once. Returns the number of renewed credentials.
+    """
+    from sqlalchemy import or_
+    from sqlalchemy import tuple_
+
+    from b3desk.models import db
+    from b3desk.models.users import User
+
+    config = current_app.config
+    threshold = datetime.now() - timedelta(
+        days=config["NC_LOGIN_TIMEDELTA_DAYS"]
+        - config["NC_CREDENTIALS_RENEWAL_MARGIN_DAYS"]
+    )
+    file_sharing = User.enable_file_sharing.is_(True)
+    if config["FILE_SHARING"]:
+        file_sharing = or_(file_sharing, User.enable_file_sharing.is_(None))
+    query = User.query.filter(
+        User.nc_last_auto_enroll < threshold, file_sharing
+    ).order_by(User.nc_last_auto_enroll, User.id)
+
+    app = current_app._get_current_object()
+
+    # ORM instances are bound to the session of the main thread, the workers
+    # only get plain values, and the results are stored from the main thread.
+    def fetch_credentials(user_id, nc_username):
+        if nc_username is None:
+            return {"nctoken": None, "nclocator": None, "nclogin": None}
+
+        with app.app_context():
+            try:
+                return request_nc_credentials(nc_username)
+            except (requests.exceptions.RequestException, MissingToken) as exception:
+                app.logger.warning(
+                    "Could not retrieve Nextcloud credentials for user %s: %s",
+                    user_id,
+                    exception,
+                )
+                return None
+
+    renewed = 0
+    last = None
+    with ThreadPoolExecutor(
+        max_workers=config["NC_CREDENTIALS_RENEWAL_CONCURRENCY"]
+    ) as executor:
+        while True:
+            batch_query = query
+            if last is not None:
+                # Credentials that could not be renewed keep their date, the
+                # next batches start after them
+                batch_query = batch_query.filter(
+                    tuple_(User.nc_last_auto_enroll, User.id) > last
+                )
+            users = batch_query.limit(config["NC_CREDENTIALS_RENEWAL_BATCH_SIZE"]).all()
+            if not users:
+                break
+
+            last = (users[-1].nc_last_auto_enroll, users[-1].id)
+            users = [
+                user for user in users if not credentials_breaker.is_blocked(user.id)
+            ]
+            try:
+                usernames = resolve_nc_usernames(users)
+            except (requests.exceptions.RequestException, MissingToken) as exception:
+                current_app.logger.warning(
+                    "Could not resolve the Nextcloud usernames: %s", exception
+                )
+                break
+
+            # Users whose username could not be resolved are tried again later
+            users = [user for user in users if user.id in usernames]
+            credentials = executor.map(
+                fetch_credentials,
+                [user.id for user in users],
+                [
+                    usernames[user.id]
+                    if can_get_file_sharing_credentials(user)
+                    else None
+                    for user in users
+                ],
+            )
+            for user, data in zip(users, credentials, strict=True):
+                renewed += apply_user_nc_credentials(user, data)
+            db.session.commit()
+
+    return renewed
@@ -0,0 +1,116 @@
+"""Keyset pagination of the admin listings.
+
+Instead of skipping rows with ``OFFSET``, each page starts right after (or
+ends right before) the row used as cursor, by comparing the ordering columns
+with those of the cursor row. Reaching a page is then an index range scan,
+whatever its position in the listing. The cursor is the id of a row, so the
+ordering columns must end with the primary key for the order to be total.
+
+Counting the rows matching a search is as costly as the search itself. On
+PostgreSQL, the planner estimation is used instead when it is large.
+"""
+
+import json
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy import tuple_
+
+from b3desk.models import db
+
+
+class KeysetPage:
+    """A page of results, and the cursors to the neighbouring pages."""
+
+    def __init__(self, items, has_prev, has_next, total, estimated):
+        self.items = items
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self.total = total
+        self.estimated = estimated
+
+    @property
+    def prev_cursor(self):
+        return self.items[0].id if self.items else None
+
+    @property
+    def next_cursor(self):
+        return self.items[-1].id if self.items else None
+
+
+def estimate_count(query):
+    """Return the number of rows of a query estimated by the PostgreSQL planner.
+
+    Return None on other databases.
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != "postgresql":
+        return None
+
+    statement = query.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", statement.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count(query):
+    """Count the rows of a query, and tell if the count is an estimation.
+
+    The exact count is only computed when the estimation is below
+    ``ADMIN_COUNT_ESTIMATE_THRESHOLD``.
+    """
+    threshold = current_app.config["ADMIN_COUNT_ESTIMATE_THRESHOLD"]
+    estimate = estimate_count(query) if threshold else None
+    if estimate is not None and estimate >= threshold:
+        return estimate, True
+
+    total = db.session.scalar(
+        db.select(func.count()).select_from(query.order_by(None).subquery())
+    )
+    return total, False
+
+
+def keyset_paginate(query, entity, order_by, per_page, after=None, before=None):
+    """Return the page of ``query`` following ``after``, or preceding ``before``.
+
+    ``before=0`` returns the last page.
+    """
+    total, estimated = count(query)
+    cursor = before if before is not None else after
+    ordering = tuple_(*order_by)
+    backward = before is not None
+    bounded = False
+
+    if cursor:
+        values = db.session.execute(
+            db.select(*order_by).where(entity.id == cursor)
+        ).first()
+        if values is not None:
+            bounded = True
+            query = query.where(
+                ordering < tuple_(*values) if backward else ordering > tuple_(*values)
+            )
+        else:
+            backward = False
+
+    if backward:
+        query = query.order_by(*(column.desc() for column in order_by))
+    else:
+        query = query.order_by(*order_by)
+
+    items = db.session.scalars(query.limit(per_page + 1)).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if backward:
+        items.reverse()
+
+    return KeysetPage(
+        items,
+        has_prev=has_more if backward else bounded,
+        has_next=bounded if backward else has_more,
+        total=total,
+        estimated=estimated,
+    )
@@ -186,6 +186,31 @@ class MainSettings(BaseSettings):
     NC_LOGIN_TIMEDELTA_DAYS: int = 30
     """Durée en jours avant l’expiration des autorisations Nextcloud."""
 
+    NC_CREDENTIALS_RENEWAL_INTERVAL: int = 3600
+    """Intervalle (en secondes) entre deux renouvellements des autorisations
+    Nextcloud sur le point d’expirer.
+
+    Une tâche périodique du worker renouvelle les autorisations avant leur
+    expiration, si bien que la connexion des utilisateurs n’a plus à
+    contacter Nextcloud ni le fournisseur d’identité secondaire. Le worker
+    doit être lancé avec l'option ``--beat``. Les autorisations plus
+    anciennes que ``NC_LOGIN_TIMEDELTA_DAYS`` restent renouvelées à la
+    connexion, par exemple si la tâche n’a pas pu s’exécuter. ``0`` désactive
+    le renouvellement périodique.
+    """
+
+    NC_CREDENTIALS_RENEWAL_MARGIN_DAYS: int = 2
+    """Nombre de jours avant leur expiration à partir duquel les autorisations
+    Nextcloud sont renouvelées par la tâche périodique."""
+
+    NC_CREDENTIALS_RENEWAL_BATCH_SIZE: int = 100
+    """Nombre d’utilisateurs dont les autorisations Nextcloud sont
+    renouvelées par lot."""
+
+    NC_CREDENTIALS_RENEWAL_CONCURRENCY: int = 4
+    """Nombre d’autorisations Nextcloud demandées simultanément lors du
+    renouvellement périodique."""
+
     NC_LOGIN_API_URL: str | None = None
     """URL du fournisseur d'accès utilisé par Nextcloud.
 
@@ -209,6 +234,63 @@ class MainSettings(BaseSettings):
     MAX_SIZE_UPLOAD: int = 20000000
     """Taille maximum des fichiers téléversés, en octets."""
 
+    NC_UPLOAD_CHUNK_SIZE: int = 5242880
+    """Taille, en octets, des morceaux envoyés à Nextcloud lors de la mise en
+    ligne des fichiers téléversés.
+
+    Les fichiers plus gros sont envoyés avec le protocole de téléversement par
+    morceaux de Nextcloud. Nextcloud impose des morceaux d'au moins 5 Mio
+    quand son stockage principal est un stockage objet.
+    """
+
+    NC_UPLOAD_PARALLELISM: int = 4
+    """Nombre de morceaux envoyés simultanément à Nextcloud."""
+
+    NC_AVAILABILITY_CACHE_DURATION: int = 60
+    """Durée (en secondes) pendant laquelle la disponibilité de Nextcloud
+    pour un utilisateur est gardée en cache.
+
+    La disponibilité est vérifiée avant la création des salons et les
+    téléchargements de fichiers. Les indisponibilités sont gérées séparément,
+    avec un délai croissant avant chaque nouvelle tentative. ``0`` désactive
+    le cache.
+    """
+
+    NC_LISTING_CACHE_DURATION: int = 30
+    """Durée (en secondes) pendant laquelle le contenu d'un dossier Nextcloud
+    est gardé en cache.
+
+    Le cache est invalidé dès que l'ETag du dossier change, c'est-à-dire dès
+    que son contenu est modifié. ``0`` désactive le cache.
+    """
+
+    NC_LISTING_PAGE_SIZE: int = 100
+    """Nombre d'éléments renvoyés par page lors du parcours d'un dossier
+    Nextcloud."""
+
+    NC_POOL_MAX_ACCOUNTS: int = 64
+    """Nombre maximum de comptes Nextcloud pour lesquels des connexions HTTP
+    sont gardées ouvertes, par processus.
+
+    Les connexions sont réutilisées d'une opération sur les fichiers à
+    l'autre. Au-delà, les connexions des comptes les moins récemment utilisés
+    sont fermées.
+    """
+
+    NC_POOL_KEEPALIVE: int = 60
+    """Durée (en secondes) d'inactivité au-delà de laquelle les connexions
+    ouvertes vers un compte Nextcloud sont fermées."""
+
+    NC_DOWNLOAD_CACHE_MAX_SIZE: int = 1000000000
+    """Taille maximum, en octets, du cache des fichiers téléchargés depuis
+    Nextcloud par BBB.
+
+    Le cache est stocké dans un sous-dossier de ``TMP_DOWNLOAD_DIR``. Les
+    fichiers sont revalidés auprès de Nextcloud à chaque téléchargement grâce
+    à leur ETag, et les fichiers les moins récemment utilisés sont supprimés
+    quand le cache dépasse cette taille. ``0`` désactive le cache.
+    """
+
     TIME_FORMAT: str = "%Y-%m-%d"
     """Format des dates utilisées lors des échanges avec l’API de Nextcloud.
 
@@ -387,6 +469,16 @@ class MainSettings(BaseSettings):
         OIDC_CLAIMS_MAPPING='{"given_name":"given_name","family_name":"usual_name","email":"email"}'
     """
 
+    USER_CACHE_TIMEOUT: int = 60
+    """Durée, en secondes, pendant laquelle l’utilisateur d’une session est
+    conservé en mémoire par chaque processus.
+
+    Pendant cette durée, et tant que les informations renvoyées par le
+    serveur d’identité ne changent pas, l’utilisateur est chargé sans être
+    recherché par son email ni mis à jour en base de données. ``0`` désactive
+    ce cache.
+    """
+
     OIDC_ISSUER: str | None = None
     """URL du serveur d’identité des organisateurs de réunion.
 
@@ -779,6 +871,15 @@ class MainSettings(BaseSettings):
     STATS_INDEX: int = 2
     """Numéro de ligne des statistiques de réunion dans le fichier CSV."""
 
+    ADMIN_COUNT_ESTIMATE_THRESHOLD: int = 10000
+    """Nombre de résultats à partir duquel les pages d’administration
+    affichent une estimation plutôt que le nombre exact de résultats.
+
+    L’estimation est fournie par le planificateur de PostgreSQL, et évite de
+    compter toutes les lignes d’une recherche sur de grandes tables. ``0``
+    affiche toujours le nombre exact.
+    """
+
     BIGBLUEBUTTON_ENDPOINT: str | None = None
     """URL du service BBB.
 
@@ -788,6 +889,32 @@ class MainSettings(BaseSettings):
     BIGBLUEBUTTON_SECRET: str | None = None
     """Mot de passe du service BBB."""
 
+    BIGBLUEBUTTON_SERVERS: list[dict[str, str]] = []
+    """Liste de serveurs BBB sur lesquels répartir les réunions, à la place de
+    ``BIGBLUEBUTTON_ENDPOINT`` et ``BIGBLUEBUTTON_SECRET``.
+
+    Chaque serveur est décrit par son URL ``endpoint`` et son mot de passe
+    ``secret``. Les nouvelles réunions sont créées sur le serveur comptant le
+    moins de participants, et les réunions en cours restent sur leur serveur.
+    Les enregistrements sont recherchés sur tous les serveurs.
+
+    Par exemple ``[{"endpoint": "https://bbb1.test/bigbluebutton/api", "secret":
+    "secret1"}, {"endpoint": "https://bbb2.test/bigbluebutton/api", "secret":
+    "secret2"}]``
+    """
+
+    @field_validator("BIGBLUEBUTTON_SERVERS", mode="after")
+    def check_bigbluebutton_servers(
+        cls, servers: list[dict[str, str]]
+    ) -> list[dict[str, str]]:
+        """Validate that each BBB server has an endpoint and a secret."""
+        for server in servers:
+            if not server.get("endpoint") or not server.get("secret"):
+                raise ValueError(
+                    "BIGBLUEBUTTON_SERVERS entries need an 'endpoint' and a 'secret'"
+                )
+        return servers
+
     BIGBLUEBUTTON_DIALNUMBER: str | None = None
     """The dial access number that participants can call in using regular
     phone.
@@ -804,7 +931,35 @@ class MainSettings(BaseSettings):
 
     BIGBLUEBUTTON_API_CACHE_DURATION: int = 5
     """Le temps de mise en cache (en secondes) des réponses aux requêtes GET à
-    l'API BBB."""
+    l'API BBB. ``0`` désactive le cache."""
+
+    BIGBLUEBUTTON_API_CACHE_DURATIONS: dict[str, int] = {
+        "getRecordings": 300,
+        "getRecordingTextTracks": 300,
+    }
+    """Le temps de mise en cache (en secondes) des réponses de certaines
+    méthodes de l'API BBB, à la place de ``BIGBLUEBUTTON_API_CACHE_DURATION``.
+
+    Les réponses concernant une réunion et ses enregistrements sont oubliées
+    dès que B3Desk les modifie, ou que BBB signale un nouvel enregistrement.
+    """
+
+    BIGBLUEBUTTON_API_STALE_DURATION: int = 60
+    """Durée (en secondes) pendant laquelle une réponse de l'API BBB reste
+    utilisée après l'expiration de ``BIGBLUEBUTTON_API_CACHE_DURATION``.
+
+    La réponse expirée est renvoyée immédiatement, pendant qu'une tâche du
+    worker la rafraîchit. Elle est aussi renvoyée lorsque BBB ne répond pas.
+    """
+
+    BIGBLUEBUTTON_API_ERROR_CACHE_DURATION: int = 5
+    """Durée (en secondes) pendant laquelle un échec d'une requête GET à l'API
+    BBB est mis en cache.
+
+    Pendant ce délai, la requête n'est pas renvoyée à BBB : la dernière
+    réponse connue est utilisée, ou l'erreur est renvoyée immédiatement, au
+    lieu d'attendre ``BIGBLUEBUTTON_REQUEST_TIMEOUT`` à chaque appel.
+    """
 
     BIGBLUEBUTTON_REQUEST_TIMEOUT: int = 2
     """BBB request timeout
@@ -812,6 +967,96 @@ class MainSettings(BaseSettings):
     Timeout for BBB request expressed in seconds in logs
     """
 
+    BIGBLUEBUTTON_POOL_SIZE: int = 10
+    """Nombre maximum de connexions HTTP gardées ouvertes vers BBB, par
+    processus.
+
+    Les connexions sont réutilisées d'une requête à l'autre, ce qui évite de
+    renégocier une connexion TCP et TLS à chaque appel à l'API BBB.
+    """
+
+    BIGBLUEBUTTON_POOL_KEEPALIVE: int = 60
+    """Durée (en secondes) d'inactivité au-delà de laquelle les connexions
+    ouvertes vers BBB sont fermées puis recréées."""
+
+    BIGBLUEBUTTON_REQUEST_RETRIES: int = 1
+    """Nombre de nouvelles tentatives lorsqu'une connexion à BBB échoue, ou
+    lorsque BBB répond avec un code 502, 503 ou 504."""
+
+    BIGBLUEBUTTON_REQUEST_BACKOFF: float = 0.1
+    """Facteur (en secondes) du délai exponentiel entre deux tentatives de
+    requête à BBB."""
+
+    BIGBLUEBUTTON_MAX_CONCURRENT_REQUESTS: int = 10
+    """Nombre maximum de requêtes envoyées simultanément à BBB lorsque l'état
+    de plusieurs réunions est demandé en une fois."""
+
+    BIGBLUEBUTTON_MAX_IN_FLIGHT_REQUESTS: int = 20
+    """Nombre maximum de requêtes en cours vers BBB, par processus.
+
+    Au-delà, les requêtes échouent immédiatement au lieu d'occuper les
+    workers en attendant BBB. ``0`` désactive la limite.
+    """
+
+    BIGBLUEBUTTON_BREAKER_THRESHOLD: int = 5
+    """Nombre d'échecs d'une même méthode de l'API BBB au-delà duquel elle est
+    considérée indisponible.
+
+    Les échecs sont comptés sur ``BIGBLUEBUTTON_BREAKER_DURATION`` secondes.
+    Les requêtes vers une méthode indisponible échouent immédiatement, et les
+    parcours de connexion renvoient vers la salle d'attente. ``0`` désactive le
+    disjoncteur.
+    """
+
+    BIGBLUEBUTTON_BREAKER_DURATION: int = 10
+    """Durée (en secondes) pendant laquelle une méthode de l'API BBB est
+    considérée indisponible.
+
+    Une seule requête de test est ensuite envoyée à BBB. Si elle échoue, la
+    durée est doublée, jusqu'à ``BIGBLUEBUTTON_BREAKER_MAX_DURATION``.
+    """
+
+    BIGBLUEBUTTON_BREAKER_MAX_DURATION: int = 300
+    """Durée maximale (en secondes) pendant laquelle une méthode de l'API BBB
+    est considérée indisponible."""
+
+    BIGBLUEBUTTON_MEETINGS_SNAPSHOT_INTERVAL: int = 5
+    """Intervalle (en secondes) entre deux rafraîchissements de l'état de
+    toutes les réunions BBB.
+
+    Une tâche périodique du worker interroge ``getMeetings`` et conserve en
+    cache l'état des réunions en cours, ce qui évite une requête
+    ``isMeetingRunning`` par participant·e en salle d'attente. Le worker doit
+    être lancé avec l'option ``--beat``. ``0`` désactive le rafraîchissement.
+    """
+
+    BIGBLUEBUTTON_MEETINGS_SNAPSHOT_MAX_AGE: int = 15
+    """Âge maximum (en secondes) de l'état des réunions BBB mis en cache.
+
+    Au-delà, l'état n'est plus utilisé et BBB est interrogé directement.
+    """
+
+    WAITING_ROOM_POLL_INTERVAL: int = 2
+    """Intervalle (en secondes) entre deux vérifications du démarrage d'une
+    réunion pour laquelle des participant·es sont en salle d'attente.
+
+    Une seule vérification est faite par réunion et par processus, quel que
+    soit le nombre de participant·es en attente.
+    """
+
+    WAITING_ROOM_KEEPALIVE_INTERVAL: int = 15
+    """Intervalle (en secondes) entre deux messages de maintien de la
+    connexion envoyés aux navigateurs en salle d'attente."""
+
+    WAITING_ROOM_STREAM_DURATION: int = 25
+    """Durée maximum (en secondes) d'une connexion de salle d'attente.
+
+    Au-delà, la connexion est fermée et le navigateur se reconnecte. Les
+    connexions ne sont acceptées que par les workers gunicorn ``gevent``, où
+    elles n'occupent qu'une greenlet. Avec les autres workers, la page de
+    salle d'attente se recharge périodiquement.
+    """
+
     RECORDING_NOTIFICATION_MIN_DELAY: int = 60
     """Délai minimum (en secondes) avant l'envoi du mail notifiant la
     disponibilité d'un enregistrement.
@@ -847,6 +1092,30 @@ class MainSettings(BaseSettings):
     attendra l'expiration de ``RECORDING_NOTIFICATION_MAX_DELAY``.
     """
 
+    RECORDING_RECONCILIATION_INTERVAL: int = 900
+    """Intervalle (en secondes) entre deux synchronisations des
+    enregistrements conservés par B3Desk avec ceux de BBB.
+
+    Les enregistrements sont enregistrés à chaque callback de BBB. Une tâche
+    périodique du worker interroge ``getRecordings`` pour rattraper les
+    callbacks perdus, et retirer les enregistrements expirés ou supprimés sur
+    BBB. Le worker doit être lancé avec l'option ``--beat``. ``0`` désactive
+    la synchronisation.
+    """
+
+    RECORDING_RECONCILIATION_PAGE_SIZE: int = 100
+    """Nombre d'enregistrements demandés à BBB par requête ``getRecordings``
+    lors de la synchronisation des enregistrements."""
+
+    RECORDING_RECONCILIATION_MAX_MISSES: int = 3
+    """Nombre de synchronisations consécutives dont un enregistrement doit être
+    absent avant d'être retiré de B3Desk.
+
+    Une réponse incomplète de BBB, par exemple lorsqu'un serveur est
+    momentanément retiré de la configuration, ne vide donc pas la liste des
+    enregistrements.
+    """
+
     MATOMO_URL: str | None = None
     """URL de l’instance de Matomo vers laquelle envoyer des statistiques."""
 
@@ -36,6 +36,9 @@ function createNCFilePicker() {
 
             })
             .then(data => {
+                if (data.rejected && data.rejected.length) {
+                    alert(rejected_documents_message + "\n" + data.rejected.join("\n"))
+                }
                 setTimeout(() => window.close(), 100);
             })
             .catch(e => console.log(e))
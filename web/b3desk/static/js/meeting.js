@@ -226,6 +226,20 @@ function close_open_modal() {
     // { 'from' : 'upload', 'value': 'tancarville.jpeg' },
     // ]
 
+// Uploaded files are pushed to Nextcloud in the background:
+// a 202 response gives the URL to poll until the push is done.
+function wait_for_nextcloud_push(res) {
+    if (res.status === 202) {
+        return res.json().then(data => new Promise(resolve => {
+            setTimeout(() => resolve(fetch(data.status_url, {headers: {'Accept': 'application/json'}})), 1000);
+        })).then(wait_for_nextcloud_push);
+    }
+    if (res.ok) {
+        return res.json();
+    }
+    return res.json().then(data => { throw data; });
+}
+
 function link_file_to_meeting(value, from) {
     var csrf_token = document.getElementsByName("csrf_token")[0].value
     var post_data = {
@@ -242,12 +256,7 @@ function link_file_to_meeting(value, from) {
         },
         body: JSON.stringify(post_data)
     })
-    .then(res => {
-        if (res.ok) {
-            return res.json();
-        }
-        return res.json().then(data => { throw data; });
-    })
+    .then(wait_for_nextcloud_push)
     .then(data => {
         append_file_to_fileslist(data.title, data.id, data.created_at);
         printout_message({ type: 'success', title: 'Document ajouté', data: 'Le document '+data.title+' a bien été ajouté'});
@@ -300,6 +309,9 @@ document.addEventListener('DOMContentLoaded', () => {
         //uploadMultiple: true,
         chunking: true,
         forceChunking: true,
+        parallelChunkUploads: true,
+        retryChunks: true,
+        retryChunksLimit: 3,
         maxFilesize: 20, // megabytes
         acceptedFiles: accepted_files,
         dictRemoveFile: 'Supprimer',
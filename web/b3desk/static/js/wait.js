@@ -1,5 +1,24 @@
 secondsBeforeRefresh = document.getElementById("seconds_before_refresh").value
+eventsUrl = document.getElementById("joinMeetingForm").dataset.eventsUrl
 let joinMeeting = () => {
     document.getElementById("joinMeetingForm").submit()
 }
-setTimeout(joinMeeting, secondsBeforeRefresh * 1000)
+let pollMeeting = () => {
+    setTimeout(joinMeeting, secondsBeforeRefresh * 1000)
+}
+
+if (window.EventSource && eventsUrl) {
+    let events = new EventSource(eventsUrl)
+    events.addEventListener("started", () => {
+        events.close()
+        joinMeeting()
+    })
+    events.onerror = () => {
+        // The browser reconnects by itself, unless the server refused the stream.
+        if (events.readyState === EventSource.CLOSED) {
+            pollMeeting()
+        }
+    }
+} else {
+    pollMeeting()
+}
@@ -1,16 +1,16 @@
 import os
 
-import requests
 from celery import Celery
+from celery.signals import beat_init
 from celery.utils.log import get_task_logger
 from flask import current_app
 
+from b3desk import BigBlueButtonUnavailable
 from b3desk import cache
 from b3desk.models import db
 from b3desk.utils import send_available_recording_notification_mail
 
 REDIS_URL = os.environ.get("REDIS_URL")
-DEBUG = os.environ.get("FLASK_DEBUG")
 
 celery = Celery("tasks")
 celery.conf.broker_url = f"redis://{REDIS_URL}"
@@ -41,14 +41,11 @@ def recording_notified_key(bbb_recording_id):
 @celery.task(name="background_upload")
 def background_upload(endpoint, xml):
     """Celery task to upload XML documents to BigBlueButton API in background."""
-    logger.info("BBB API request %s: xml:%s", endpoint, xml)
+    from b3desk.models.bbb import get_bbb_session
 
-    session = requests.Session()
-    if DEBUG:  # pragma: no cover
-        # In local development environment, BBB is not served as https
-        session.verify = False
+    logger.info("BBB API request %s: xml:%s", endpoint, xml)
 
-    response = session.post(
+    response = get_bbb_session().post(
         endpoint,
         headers={"Content-Type": "application/xml"},
         data=xml,
@@ -58,6 +55,90 @@ def background_upload(endpoint, xml):
     return True
 
 
+@celery.task(name="refresh_bbb_response")
+def refresh_bbb_response(url):
+    """Celery task to refresh a cached response of the BBB API."""
+    import requests
+
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import bbb_response_refresh_key
+
+    try:
+        BBB(None).refresh_response(requests.Request("GET", url).prepare())
+    except BigBlueButtonUnavailable:
+        logger.warning("Could not refresh the BBB response %s", url)
+        return False
+    finally:
+        cache.delete(bbb_response_refresh_key(url))
+    return True
+
+
+@celery.task(name="push_upload_to_nextcloud")
+def push_upload_to_nextcloud(upload_id):
+    """Celery task to push a complete upload to Nextcloud."""
+    from b3desk.uploads import push_upload
+
+    return push_upload(upload_id)
+
+
+@celery.task(name="refresh_meetings_snapshot")
+def refresh_meetings_snapshot():
+    """Celery task to refresh the cached state of all the BBB meetings."""
+    from b3desk.models.bbb import refresh_meetings_snapshot
+
+    try:
+        meetings = refresh_meetings_snapshot()
+    except BigBlueButtonUnavailable:
+        logger.warning("Could not refresh the BBB meetings snapshot")
+        return False
+
+    logger.debug("BBB meetings snapshot refreshed: %s meetings", len(meetings))
+    return True
+
+
+@celery.task(name="refresh_recording")
+def refresh_recording(meeting_id, bbb_recording_id):
+    """Celery task to store the current state of a recording."""
+    from b3desk.models.meetings import Meeting
+    from b3desk.models.recordings import refresh_recording
+
+    if meeting := db.session.get(Meeting, meeting_id):
+        refresh_recording(meeting, bbb_recording_id)
+        db.session.commit()
+
+
+@celery.task(name="reconcile_recordings")
+def reconcile_recordings():
+    """Celery task to synchronise the stored recordings with BBB."""
+    from b3desk.models.recordings import reconcile_recordings
+
+    try:
+        count = reconcile_recordings()
+    except BigBlueButtonUnavailable:
+        logger.warning("Could not reconcile the recordings with BBB")
+        return False
+
+    logger.debug("Recordings reconciled with BBB: %s recordings", count)
+    return True
+
+
+@beat_init.connect
+def reconcile_recordings_on_start(sender, **kwargs):
+    """Fill the stored recordings as soon as the scheduler starts, after a deployment."""
+    if "reconcile-recordings" in celery.conf.beat_schedule:
+        reconcile_recordings.delay()
+
+
+@celery.task(name="renew_nc_credentials")
+def renew_nc_credentials():
+    """Celery task to renew the Nextcloud credentials about to expire."""
+    from b3desk.nextcloud import renew_expiring_nc_credentials
+
+    count = renew_expiring_nc_credentials()
+    logger.debug("Nextcloud credentials renewed: %s users", count)
+    return count
+
+
 @celery.task(name="send_recording_notification")
 def send_recording_notification(
     meeting_id, bbb_recording_id, force=False, is_min_deadline=False
@@ -70,8 +151,8 @@ def send_recording_notification(
     (``force``). A ``notified`` cache flag, claimed atomically before sending,
     prevents concurrent callbacks and deadline tasks from sending duplicates.
     """
-    from b3desk.models.bbb import BBB
     from b3desk.models.meetings import Meeting
+    from b3desk.models.recordings import refresh_recording
 
     if cache.get(recording_notified_key(bbb_recording_id)):
         return
@@ -94,26 +175,26 @@ def send_recording_notification(
         cache.get(recording_min_reached_key(bbb_recording_id))
     )
 
-    bbb = BBB(meeting.meetingID)
-    recordings = BBB.get_recordings.uncached(bbb, bbb_recording_id=bbb_recording_id)
-    if not recordings:
-        logger.warning(
-            "No recording returned by BBB for %s, skipping notification",
-            bbb_recording_id,
-        )
-        return
-
     try:
-        recording = recordings[0]
-        playbacks = recording["playbacks"]
-        recording_name = recording["name"]
-        recording_start = recording["start_date"].isoformat()
+        recording = refresh_recording(meeting, bbb_recording_id)
     except (KeyError, AttributeError) as e:
         logger.error(
             "Unexpected BBB recording structure for %s: %s", bbb_recording_id, e
         )
         return
 
+    if recording is None:
+        logger.warning(
+            "No recording returned by BBB for %s, skipping notification",
+            bbb_recording_id,
+        )
+        return
+
+    playbacks = recording.playbacks
+    recording_name = recording.name
+    recording_start = recording.start_date.isoformat()
+    db.session.commit()
+
     expected = set(current_app.config["RECORDING_EXPECTED_FORMATS"])
     if meeting.ai_summary_enabled:
         expected.add("ai-summary")
@@ -0,0 +1,240 @@
+"""Process-wide pooled HTTP sessions for the external services B3Desk talks to.
+
+``requests.Session`` keeps connections alive between calls, but only as long as
+the same session object is reused. Transports defined here hold one session per
+process, rebuilt after a fork so that gunicorn workers and celery children never
+share sockets with their parent.
+
+Sessions are shared by the threads of a process, and one of them may still be
+in the middle of a request when a session is replaced. Replaced sessions are
+never closed, their connections are released once the last request using them
+drops them.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.connectionpool import HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_FORCELIST = (502, 503, 504)
+
+transports = {}
+
+
+@dataclass
+class PoolStatistics:
+    """Connection pool counters of a transport, for the current process."""
+
+    requests: int = 0
+    new_connections: int = 0
+    wait_time: float = 0.0
+    lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def hits(self):
+        """Number of requests that reused a kept-alive connection."""
+        return max(self.requests - self.new_connections, 0)
+
+    def count_new_connection(self):
+        with self.lock:
+            self.new_connections += 1
+
+    def count_request(self, wait_time):
+        with self.lock:
+            self.requests += 1
+            self.wait_time += wait_time
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "wait_time": self.wait_time,
+                "hits": self.hits,
+            }
+
+
+def instrumented_pool_class(base, statistics):
+    """Build a urllib3 connection pool class feeding ``statistics``."""
+
+    class InstrumentedConnectionPool(base):
+        def _new_conn(self):
+            statistics.count_new_connection()
+            return super()._new_conn()
+
+        def _get_conn(self, timeout=None):
+            start = time.monotonic()
+            try:
+                return super()._get_conn(timeout=timeout)
+            finally:
+                statistics.count_request(time.monotonic() - start)
+
+    return InstrumentedConnectionPool
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    """HTTP adapter whose connection pools report to a ``PoolStatistics``."""
+
+    def __init__(self, statistics, *args, **kwargs):
+        self.statistics = statistics
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": instrumented_pool_class(HTTPConnectionPool, self.statistics),
+            "https": instrumented_pool_class(HTTPSConnectionPool, self.statistics),
+        }
+
+
+def build_session(statistics, pool_size, retries=0, backoff_factor=0, verify=True):
+    """Build a ``requests.Session`` whose connection pools report to ``statistics``."""
+    retry = Retry(
+        total=retries,
+        read=False,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_FORCELIST,
+        raise_on_status=False,
+    )
+    adapter = InstrumentedHTTPAdapter(
+        statistics,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.verify = verify
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class PooledTransport:
+    """A lazily built ``requests.Session`` shared by a whole process.
+
+    The session is rebuilt when the process id changes (after a fork) and when
+    it has been idle for more than ``keepalive`` seconds, as servers usually
+    close idle connections on their side anyway.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.statistics = PoolStatistics()
+        self._session = None
+        self._pid = None
+        self._last_used = None
+        self._lock = threading.Lock()
+        transports[name] = self
+
+    def session(
+        self, pool_size=10, keepalive=None, retries=0, backoff_factor=0, verify=True
+    ):
+        with self._lock:
+            now = time.monotonic()
+            if self._pid != os.getpid():
+                # Never close a session inherited from the parent process:
+                # the sockets are shared, closing them would break the parent.
+                self._session = None
+                self.statistics = PoolStatistics()
+
+            elif (
+                self._session is not None
+                and keepalive is not None
+                and now - self._last_used > keepalive
+            ):
+                # Another thread may still be using the idle session.
+                self._session = None
+
+            if self._session is None:
+                self._session = self._build_session(
+                    pool_size, retries, backoff_factor, verify
+                )
+                self._pid = os.getpid()
+
+            self._last_used = now
+            return self._session
+
+    def _build_session(self, pool_size, retries, backoff_factor, verify):
+        return build_session(
+            self.statistics, pool_size, retries, backoff_factor, verify
+        )
+
+    def reset(self):
+        with self._lock:
+            if self._session is not None and self._pid == os.getpid():
+                self._session.close()
+            self._session = None
+            self._pid = None
+            self.statistics = PoolStatistics()
+
+
+class KeyedPooledTransport:
+    """Lazily built ``requests.Session`` objects, one per key, for a process.
+
+    This suits services spread over many hosts or accounts. At most
+    ``max_size`` sessions are kept, the least recently used ones are dropped
+    first, and the sessions idle for more than ``keepalive`` seconds are
+    dropped whenever the transport is used. Like ``PooledTransport``, every
+    session is dropped after a fork, and dropped sessions are never closed.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.statistics = PoolStatistics()
+        self._sessions = OrderedDict()
+        self._pid = None
+        self._lock = threading.Lock()
+        transports[name] = self
+
+    def session(self, key, max_size=64, pool_size=10, keepalive=None, verify=True):
+        with self._lock:
+            now = time.monotonic()
+            if self._pid != os.getpid():
+                # Never close sessions inherited from the parent process.
+                self._sessions.clear()
+                self.statistics = PoolStatistics()
+                self._pid = os.getpid()
+
+            if keepalive is not None:
+                for idle_key, (_, last_used) in list(self._sessions.items()):
+                    if now - last_used > keepalive:
+                        del self._sessions[idle_key]
+
+            session, _ = self._sessions.pop(key, (None, None))
+            if session is None:
+                session = build_session(self.statistics, pool_size, verify=verify)
+            self._sessions[key] = (session, now)
+
+            while len(self._sessions) > max_size:
+                self._sessions.popitem(last=False)
+
+        return session
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def reset(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for session, _ in self._sessions.values():
+                    session.close()
+            self._sessions.clear()
+            self._pid = None
+            self.statistics = PoolStatistics()
+
+
+def pool_statistics():
+    """Return the statistics of every transport of the current process."""
+    return {
+        name: transport.statistics.as_dict() for name, transport in transports.items()
+    }
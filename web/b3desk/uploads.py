@@ -0,0 +1,223 @@
+"""Resumable chunked uploads, and their push to Nextcloud.
+
+Dropzone sends the files in chunks, possibly several at once and in any order.
+Each chunk is streamed to its offset in the upload file with ``os.pwrite``, and
+the byte ranges received so far are recorded in a manifest next to it. An
+upload is complete once its ranges cover the whole file, whichever chunk
+arrived last. An interrupted upload can be resumed by sending the missing
+chunks only.
+
+Complete uploads are then pushed to Nextcloud by a Celery task, whose progress
+is kept in the cache so the UI can poll it.
+"""
+
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from flask import current_app
+from flask_babel import lazy_gettext as _
+from sqlalchemy import exc
+from webdav3.exceptions import WebDavException
+from werkzeug.utils import secure_filename
+
+from b3desk import cache
+from b3desk.models import db
+
+READ_BLOCK_SIZE = 256 * 1024
+UPLOAD_STATUS_TIMEOUT = 3600
+
+
+def merge_ranges(ranges):
+    """Merge overlapping and adjacent ``[start, end)`` ranges."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class ChunkedUpload:
+    """A file being uploaded chunk by chunk in the upload directory."""
+
+    def __init__(self, user_id, meeting_id, filename):
+        directory = Path(current_app.config["UPLOAD_DIR"]) / "chunks"
+        directory.mkdir(parents=True, exist_ok=True)
+        name = secure_filename(f"{user_id}-{meeting_id}-{filename}")
+        self.path = directory / name
+        self.manifest_path = directory / f"{name}.manifest"
+        self.lock_path = directory / f"{name}.lock"
+
+    @contextmanager
+    def lock(self):
+        """Serialize the manifest updates of concurrent chunk requests."""
+        with self.lock_path.open("w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def manifest(self):
+        try:
+            return json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, manifest):
+        tmp_path = self.manifest_path.with_suffix(".manifest.tmp")
+        tmp_path.write_text(json.dumps(manifest))
+        tmp_path.replace(self.manifest_path)
+
+    @property
+    def is_complete(self):
+        return bool(self.manifest and self.manifest["complete"])
+
+    def write_chunk(self, stream, offset, total_size):
+        """Stream a chunk to its offset in the file, and record its range.
+
+        Return the updated manifest.
+        """
+        end = offset
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            while data := stream.read(READ_BLOCK_SIZE):
+                os.pwrite(fd, data, end)
+                end += len(data)
+        finally:
+            os.close(fd)
+
+        with self.lock():
+            manifest = self.manifest or {"total_size": total_size, "ranges": []}
+            manifest["ranges"] = merge_ranges([*manifest["ranges"], [offset, end]])
+            manifest["complete"] = manifest["ranges"] == [[0, total_size]]
+            self._save_manifest(manifest)
+        return manifest
+
+    def remove(self):
+        for path in (self.path, self.manifest_path, self.lock_path):
+            path.unlink(missing_ok=True)
+
+
+def upload_status_key(upload_id):
+    return f"upload_status:{upload_id}"
+
+
+def get_upload_status(upload_id):
+    return cache.get(upload_status_key(upload_id))
+
+
+def set_upload_status(upload_id, **status):
+    previous = get_upload_status(upload_id) or {}
+    cache.set(
+        upload_status_key(upload_id),
+        {**previous, **status},
+        timeout=UPLOAD_STATUS_TIMEOUT,
+    )
+
+
+def start_nextcloud_push(user, meeting_id, title):
+    """Schedule the push of a complete upload to Nextcloud, and return its id."""
+    from b3desk.tasks import push_upload_to_nextcloud
+
+    upload_id = uuid.uuid4().hex
+    set_upload_status(
+        upload_id,
+        state="pending",
+        user_id=user.id,
+        meeting_id=meeting_id,
+        title=title,
+        sent=0,
+        size=ChunkedUpload(user.id, meeting_id, title).manifest["total_size"],
+    )
+    push_upload_to_nextcloud.delay(upload_id)
+    return upload_id
+
+
+def push_upload(upload_id):
+    """Upload a complete file to the owner Nextcloud and attach it to its meeting."""
+    from b3desk.models.meetings import MeetingFiles
+    from b3desk.models.users import User
+    from b3desk.nextcloud import create_webdav_client
+    from b3desk.nextcloud import is_nextcloud_unavailable_error
+    from b3desk.nextcloud import nextcloud_breaker
+
+    status = get_upload_status(upload_id)
+    user = db.session.get(User, status["user_id"])
+    title = status["title"]
+    upload = ChunkedUpload(user.id, status["meeting_id"], title)
+
+    def fail(code, msg):
+        set_upload_status(upload_id, state="error", code=code, msg=str(msg))
+        return False
+
+    unavailable_message = _(
+        "Le service de fichiers est temporairement indisponible. "
+        "Veuillez réessayer dans quelques minutes."
+    )
+    if (client := create_webdav_client(user)) is None:
+        return fail(503, unavailable_message)
+
+    def progress(current, total):
+        set_upload_status(upload_id, state="uploading", sent=current, size=total)
+
+    nc_path = f"visio-agents/{title}"
+    try:
+        client.mkdir("visio-agents")  # does not fail if dir already exists
+        client.upload_chunked(
+            remote_path=nc_path,
+            local_path=upload.path,
+            chunk_size=current_app.config["NC_UPLOAD_CHUNK_SIZE"],
+            parallelism=current_app.config["NC_UPLOAD_PARALLELISM"],
+            progress=progress,
+        )
+    except WebDavException as exception:
+        current_app.logger.warning("WebDAV error: %s", exception)
+        if is_nextcloud_unavailable_error(exception):
+            nextcloud_breaker.mark_failed(user.nc_locator)
+        return fail(503, unavailable_message)
+
+    upload.remove()
+
+    meeting_file = MeetingFiles(
+        nc_path=nc_path,
+        title=title,
+        created_at=date.today(),
+        meeting_id=status["meeting_id"],
+        owner=user,
+    )
+
+    try:
+        db.session.add(meeting_file)
+        db.session.commit()
+
+    except exc.SQLAlchemyError as exception:
+        db.session.rollback()
+        current_app.logger.error("SQLAlchemy error: %s", exception)
+        try:
+            client.clean(nc_path)
+        except WebDavException as cleanup_error:
+            current_app.logger.warning(
+                "Failed to cleanup Nextcloud file %s: %s", nc_path, cleanup_error
+            )
+        return fail(409, _("Le fichier a déjà été mis en ligne"))
+
+    set_upload_status(
+        upload_id,
+        state="done",
+        file={
+            "title": meeting_file.short_title,
+            "id": meeting_file.id,
+            "created_at": meeting_file.created_at.strftime(
+                current_app.config["TIME_FORMAT"]
+            ),
+        },
+    )
+    return True
@@ -0,0 +1,142 @@
+"""Notify the waiting room attendees as soon as their meeting starts.
+
+Browsers waiting for a meeting keep a Server-Sent-Events connection open
+instead of reloading the waiting page. In each process, a single watcher per
+meeting checks whether the meeting has started, and wakes up every connection
+waiting for it.
+
+Only standard :mod:`threading` primitives are used, and they are
+monkey-patched by the gunicorn ``gevent`` workers, so a waiting connection only
+costs a greenlet. With threaded or ``sync`` workers, each stream would hold a
+thread or the whole worker for its duration, so the waiting page falls back to
+reloading itself.
+"""
+
+import sys
+import threading
+import time
+
+from b3desk import BigBlueButtonUnavailable
+from b3desk import cache
+
+MEETING_STARTED_CACHE_KEY = "meeting_started_{meeting_id}"
+
+# The creation marker only needs to last until the moderator is in the room.
+# BBB then reports the meeting as running.
+MEETING_STARTED_TIMEOUT = 60
+
+watchers = {}
+watchers_lock = threading.Lock()
+
+
+def notify_meeting_started(meeting_id):
+    """Mark a BBB meeting as started, and wake up its waiting room."""
+    cache.set(
+        MEETING_STARTED_CACHE_KEY.format(meeting_id=meeting_id),
+        True,
+        timeout=MEETING_STARTED_TIMEOUT,
+    )
+    with watchers_lock:
+        watcher = watchers.get(meeting_id)
+    if watcher:
+        watcher.started.set()
+
+
+def forget_meeting_started(meeting_id):
+    """Remove the creation marker of a BBB meeting."""
+    cache.delete(MEETING_STARTED_CACHE_KEY.format(meeting_id=meeting_id))
+
+
+def has_meeting_started(meeting_id):
+    """Check if a BBB meeting has just been created or is running."""
+    from b3desk.models.bbb import BBB
+
+    return (
+        bool(cache.get(MEETING_STARTED_CACHE_KEY.format(meeting_id=meeting_id)))
+        or BBB(meeting_id).is_running()
+    )
+
+
+class MeetingWatcher(threading.Thread):
+    """Check periodically if a meeting has started, on behalf of all its waiters."""
+
+    def __init__(self, app, meeting_id):
+        super().__init__(name=f"waiting-room-{meeting_id}", daemon=True)
+        self.app = app
+        self.meeting_id = meeting_id
+        self.started = threading.Event()
+        self.waiters = 0
+
+    def run(self):
+        interval = self.app.config["WAITING_ROOM_POLL_INTERVAL"]
+        try:
+            with self.app.app_context():
+                while not self.started.is_set():
+                    try:
+                        if has_meeting_started(self.meeting_id):
+                            self.started.set()
+                            break
+                    except BigBlueButtonUnavailable:
+                        self.app.logger.warning(
+                            "Could not check if meeting %s started", self.meeting_id
+                        )
+
+                    with watchers_lock:
+                        if not self.waiters:
+                            break
+
+                    self.started.wait(interval)
+        finally:
+            with watchers_lock:
+                if watchers.get(self.meeting_id) is self:
+                    del watchers[self.meeting_id]
+
+
+def wait_for_meeting(app, meeting_id, timeout):
+    """Block until the meeting starts or the timeout expires.
+
+    Return whether the meeting has started.
+    """
+    with watchers_lock:
+        watcher = watchers.get(meeting_id)
+        if watcher is None or not watcher.is_alive():
+            watcher = MeetingWatcher(app, meeting_id)
+            watchers[meeting_id] = watcher
+            watcher.start()
+        watcher.waiters += 1
+
+    try:
+        return watcher.started.wait(timeout)
+    finally:
+        with watchers_lock:
+            watcher.waiters -= 1
+
+
+def can_stream_events():
+    """Check if the server can hold streams without blocking other requests.
+
+    This is the case when gevent has monkey-patched the sockets, as the gunicorn
+    ``gevent`` workers do. Threaded workers would run out of threads as soon as
+    a few dozen attendees wait for a meeting.
+    """
+    gevent_monkey = sys.modules.get("gevent.monkey")
+    return gevent_monkey is not None and gevent_monkey.is_module_patched("socket")
+
+
+def meeting_events(app, meeting_id):
+    """Stream the Server-Sent-Events of a waiting room.
+
+    A comment is sent regularly to keep the connection alive. The stream ends
+    after ``WAITING_ROOM_STREAM_DURATION`` seconds, and the browser reconnects.
+    The stream runs outside of the request context, so it does not hold a
+    database connection.
+    """
+    keepalive = app.config["WAITING_ROOM_KEEPALIVE_INTERVAL"]
+    deadline = time.monotonic() + app.config["WAITING_ROOM_STREAM_DURATION"]
+    yield f"retry: {int(keepalive * 1000)}\n\n"
+
+    while (remaining := deadline - time.monotonic()) > 0:
+        if wait_for_meeting(app, meeting_id, min(keepalive, remaining)):
+            yield "event: started\ndata: {}\n\n"
+            return
+        yield ": keepalive\n\n"
@@ -0,0 +1,36 @@
+"""add recording missed reconciliations.
+
+Stored recordings are only removed after being missing from several
+consecutive reconciliations with BBB.
+
+Revision ID: 3e7b1d9a0c52
+Revises: 9c3f27d8e1a6
+Create Date: 2026-10-18 17:12:05.418233
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3e7b1d9a0c52"
+down_revision = "9c3f27d8e1a6"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("recording", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "missed_reconciliations",
+                sa.Integer(),
+                server_default="0",
+                nullable=False,
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("recording", schema=None) as batch_op:
+        batch_op.drop_column("missed_reconciliations")
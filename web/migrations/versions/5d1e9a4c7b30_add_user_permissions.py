@@ -0,0 +1,83 @@
+"""add the permissions granted by groups on users.
+
+The permissions of a user are resolved from its groups, and denormalised on the
+``user`` table so checking them does not load the groups.
+
+Revision ID: 5d1e9a4c7b30
+Revises: b81f0c7e4d29
+Create Date: 2026-10-18 14:26:08.517306
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d1e9a4c7b30"
+down_revision = "b81f0c7e4d29"
+branch_labels = None
+depends_on = None
+
+
+PERMISSIONS = ("enable_sip", "enable_file_sharing", "enable_ai_summary")
+
+user_table = sa.table(
+    "user",
+    sa.column("id", sa.Integer),
+    *(sa.column(permission, sa.Boolean) for permission in PERMISSIONS),
+)
+group_table = sa.table(
+    "group",
+    sa.column("id", sa.Integer),
+    *(sa.column(permission, sa.Boolean) for permission in PERMISSIONS),
+)
+group_member_table = sa.table(
+    "group_member",
+    sa.column("user_id", sa.Integer),
+    sa.column("group_id", sa.Integer),
+)
+
+
+def upgrade():
+    with op.batch_alter_table("user", schema=None) as batch_op:
+        for permission in PERMISSIONS:
+            batch_op.add_column(sa.Column(permission, sa.Boolean(), nullable=True))
+
+    memberships = (
+        sa.select(sa.literal(1))
+        .select_from(
+            group_member_table.join(
+                group_table, group_table.c.id == group_member_table.c.group_id
+            )
+        )
+        .where(group_member_table.c.user_id == user_table.c.id)
+    )
+    op.execute(
+        user_table.update().values(
+            {
+                permission: sa.case(
+                    (
+                        memberships.where(group_table.c[permission].is_(True)).exists(),
+                        sa.true(),
+                    ),
+                    (
+                        sa.and_(
+                            memberships.exists(),
+                            ~memberships.where(
+                                group_table.c[permission].isnot(False)
+                            ).exists(),
+                        ),
+                        sa.false(),
+                    ),
+                    else_=sa.null(),
+                )
+                for permission in PERMISSIONS
+            }
+        )
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("user", schema=None) as batch_op:
+        for permission in reversed(PERMISSIONS):
+            batch_op.drop_column(permission)
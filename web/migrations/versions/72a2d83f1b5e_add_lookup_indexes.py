@@ -0,0 +1,49 @@
+"""add indexes on the lookup columns.
+
+``meeting_access.user_id`` is already covered by the primary key, and
+``user.email`` by its unique constraint.
+
+Revision ID: 72a2d83f1b5e
+Revises: a3a6e932b2ae
+Create Date: 2026-10-18 10:12:31.482907
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "72a2d83f1b5e"
+down_revision = "a3a6e932b2ae"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_meeting_owner_id", "meeting", ["owner_id"])
+    op.create_index(
+        "ix_meeting_shadow_last_connection_utc_datetime",
+        "meeting",
+        ["last_connection_utc_datetime"],
+        postgresql_where=sa.text("is_shadow"),
+        sqlite_where=sa.text("is_shadow = 1"),
+    )
+    op.create_index("ix_meeting_files_meeting_id", "meeting_files", ["meeting_id"])
+    op.create_index("ix_meeting_access_meeting_id", "meeting_access", ["meeting_id"])
+    op.create_index(
+        "ix_previous_voice_bridge_archived_at",
+        "previous_voice_bridge",
+        ["archived_at"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_previous_voice_bridge_archived_at", table_name="previous_voice_bridge"
+    )
+    op.drop_index("ix_meeting_access_meeting_id", table_name="meeting_access")
+    op.drop_index("ix_meeting_files_meeting_id", table_name="meeting_files")
+    op.drop_index(
+        "ix_meeting_shadow_last_connection_utc_datetime", table_name="meeting"
+    )
+    op.drop_index("ix_meeting_owner_id", table_name="meeting")
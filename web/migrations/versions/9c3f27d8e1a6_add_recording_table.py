@@ -0,0 +1,50 @@
+"""add recording table.
+
+The recordings are stored when BBB calls back, and periodically reconciled with
+BBB, so the recordings page does not query BBB.
+
+Revision ID: 9c3f27d8e1a6
+Revises: 5d1e9a4c7b30
+Create Date: 2026-10-18 15:42:51.036284
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9c3f27d8e1a6"
+down_revision = "5d1e9a4c7b30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "recording",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("recordID", sa.Unicode(length=255), nullable=False),
+        sa.Column("meeting_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.Unicode(length=4096), nullable=True),
+        sa.Column("participants", sa.Integer(), nullable=True),
+        sa.Column("start_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_date", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("playbacks", sa.JSON(), nullable=False),
+        sa.Column("synchronized_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["meeting_id"],
+            ["meeting.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("recordID"),
+    )
+    op.create_index(
+        "ix_recording_meeting_id_start_date",
+        "recording",
+        ["meeting_id", "start_date"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_recording_meeting_id_start_date", table_name="recording")
+    op.drop_table("recording")
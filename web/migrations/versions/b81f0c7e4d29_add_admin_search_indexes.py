@@ -0,0 +1,57 @@
+"""add admin search and pagination indexes.
+
+The admin listings are paginated on ``(created_at, id)``. Their searches use
+``ILIKE '%...%'``, which can only use trigram indexes. Those are specific to
+PostgreSQL, and SQLite keeps scanning the tables.
+
+Revision ID: b81f0c7e4d29
+Revises: 72a2d83f1b5e
+Create Date: 2026-10-18 11:03:17.126054
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b81f0c7e4d29"
+down_revision = "72a2d83f1b5e"
+branch_labels = None
+depends_on = None
+
+
+TRIGRAM_INDEXES = {
+    "ix_user_given_name_trgm": ("user", "given_name"),
+    "ix_user_family_name_trgm": ("user", "family_name"),
+    "ix_user_email_trgm": ("user", "email"),
+    "ix_meeting_name_trgm": ("meeting", "name"),
+    "ix_group_name_trgm": ("group", "name"),
+}
+
+
+def upgrade():
+    op.create_index("ix_user_created_at_id", "user", ["created_at", "id"])
+    op.create_index("ix_meeting_created_at_id", "meeting", ["created_at", "id"])
+    op.create_index("ix_group_created_at_id", "group", ["created_at", "id"])
+
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, (table_name, column_name) in TRIGRAM_INDEXES.items():
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            postgresql_using="gin",
+            postgresql_ops={column_name: "gin_trgm_ops"},
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        for index_name, (table_name, _) in TRIGRAM_INDEXES.items():
+            op.drop_index(index_name, table_name=table_name)
+
+    op.drop_index("ix_group_created_at_id", table_name="group")
+    op.drop_index("ix_meeting_created_at_id", table_name="meeting")
+    op.drop_index("ix_user_created_at_id", table_name="user")
@@ -42,9 +42,12 @@ backlog = 2048
 #       can be seen at
 #       http://docs.gunicorn.org/en/latest/settings.html#worker-class
 #
-#   worker_connections - For the eventlet and gevent worker classes
-#       this limits the maximum number of simultaneous clients that
-#       a single process can handle.
+#   worker_connections - For the eventlet, gevent and gthread worker
+#       classes this limits the maximum number of simultaneous clients
+#       that a single process can handle. The waiting room keeps a
+#       Server-Sent-Events request open for each attendee, which only
+#       costs a greenlet with the gevent worker class. With the other
+#       worker classes, the waiting room falls back to reloading the page.
 #
 #       A positive integer generally set to around 1000.
 #
@@ -65,7 +68,7 @@ backlog = 2048
 #
 
 workers = 1
-worker_class = "sync"
+worker_class = "gevent"
 worker_connections = 1000
 timeout = 30
 keepalive = 2
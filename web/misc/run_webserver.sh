@@ -3,4 +3,4 @@
 # DB Migration
 flask db upgrade &>> /var/log/flask-migrate.log
 
-gunicorn --chdir /opt/bbb-visio --bind 0.0.0.0:5000 --log-level info --access-logfile /var/log/gunicorn-access.log --error-logfile /var/log/gunicorn-error.log wsgi:app
+gunicorn --chdir /opt/bbb-visio --bind 0.0.0.0:5000 --worker-class gevent --worker-connections "${GUNICORN_WORKER_CONNECTIONS:-1000}" --log-level info --access-logfile /var/log/gunicorn-access.log --error-logfile /var/log/gunicorn-error.log wsgi:app
@@ -333,6 +333,9 @@ def configuration(tmp_path, iam_server, iam_client, request, private_key, db):
         # Disable cache in unit tests
         "CACHE_DEFAULT_TIMEOUT": 0,
         "BIGBLUEBUTTON_API_CACHE_DURATION": 0,
+        "BIGBLUEBUTTON_API_CACHE_DURATIONS": {},
+        "NC_AVAILABILITY_CACHE_DURATION": 0,
+        "USER_CACHE_TIMEOUT": 0,
         "RECORDING_NOTIFICATION_MIN_DELAY": 0,
         "RECORDING_NOTIFICATION_MAX_DELAY": 0,
         "RECORDING_EXPECTED_FORMATS": ["presentation"],
@@ -998,8 +1001,8 @@ def bbb_recording(mocker):
     from b3desk.models.bbb import BBB
 
     return mocker.patch.object(
-        BBB.get_recordings,
-        "uncached",
+        BBB,
+        "get_recordings",
         return_value=[
             {
                 "playbacks": {
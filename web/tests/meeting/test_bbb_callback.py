@@ -150,7 +150,7 @@ def test_callback_acknowledges_even_when_bbb_has_no_recording_yet(
     """Recording lookup happens in the task; the callback always acknowledges."""
     from b3desk.models.bbb import BBB
 
-    mocker.patch.object(BBB.get_recordings, "uncached", return_value=[])
+    mocker.patch.object(BBB, "get_recordings", return_value=[])
 
     signed = make_signed_parameters(
         {"meeting_id": meeting.meetingID, "record_id": RECORD_ID}
@@ -182,3 +182,31 @@ def test_subsequent_callback_triggers_recheck(
         status=200,
     )
     delay.assert_called_once_with(meeting.id, RECORD_ID)
+
+
+def test_callbacks_store_the_recording(
+    client_app, meeting, smtpd, bbb_recording, make_signed_parameters
+):
+    """The recording is stored, and updated by the callbacks following the mail."""
+    from b3desk.models.recordings import Recording
+
+    signed = make_signed_parameters(
+        {"meeting_id": meeting.meetingID, "record_id": RECORD_ID}
+    )
+    client_app.post(
+        "/bbb-callback/recording_status", {"signed_parameters": signed}, status=200
+    )
+    assert len(smtpd.messages) == 1
+    recording = Recording.query.one()
+    assert recording.recordID == RECORD_ID
+    assert recording.meeting == meeting
+    assert list(recording.playbacks) == ["presentation"]
+
+    bbb_recording.return_value[0]["playbacks"]["video"] = {
+        "url": "https://bbb.test/playback/video/"
+    }
+    client_app.post(
+        "/bbb-callback/recording_status", {"signed_parameters": signed}, status=200
+    )
+    assert len(smtpd.messages) == 1
+    assert list(Recording.query.one().playbacks) == ["presentation", "video"]
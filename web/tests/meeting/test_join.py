@@ -1,6 +1,8 @@
+import threading
 from urllib.parse import parse_qs
 from urllib.parse import urlparse
 
+from b3desk import cache
 from b3desk.join import get_hash
 from b3desk.join import get_signin_url
 from b3desk.models.roles import Role
@@ -453,3 +455,45 @@ def test_visio_code_form_validation_with_invalid_captcha(client_app, meeting, mo
         "shouldDisplayCaptcha": False,
         "captchaCode": False,
     }
+
+
+def test_concurrent_creators_share_the_first_creation(client_app, meeting, mocker):
+    """Creators wait for the room being created instead of creating it again."""
+    from b3desk.join import MEETING_CREATION_LOCK_CACHE_KEY
+    from b3desk.join import create_bbb_meeting
+    from b3desk.waiting_room import notify_meeting_started
+
+    create = mocker.patch("b3desk.models.bbb.BBB.create")
+    lock_key = MEETING_CREATION_LOCK_CACHE_KEY.format(meeting_id=meeting.meetingID)
+    cache.set(lock_key, "another-worker")
+
+    timer = threading.Timer(0.2, notify_meeting_started, [meeting.meetingID])
+    timer.start()
+    assert create_bbb_meeting(meeting, meeting.owner)
+    timer.join()
+    assert not create.called
+
+
+def test_concurrent_creators_share_the_first_failure(client_app, meeting, mocker):
+    from b3desk.join import MEETING_CREATION_LOCK_CACHE_KEY
+    from b3desk.join import create_bbb_meeting
+
+    create = mocker.patch("b3desk.models.bbb.BBB.create")
+    lock_key = MEETING_CREATION_LOCK_CACHE_KEY.format(meeting_id=meeting.meetingID)
+    cache.set(lock_key, "another-worker")
+
+    timer = threading.Timer(0.2, cache.delete, [lock_key])
+    timer.start()
+    assert not create_bbb_meeting(meeting, meeting.owner)
+    timer.join()
+    assert not create.called
+
+
+def test_creation_lock_is_released(client_app, meeting, mocker, bbb_response):
+    from b3desk.join import MEETING_CREATION_LOCK_CACHE_KEY
+    from b3desk.join import create_bbb_meeting
+
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    assert create_bbb_meeting(meeting, meeting.owner)
+    lock_key = MEETING_CREATION_LOCK_CACHE_KEY.format(meeting_id=meeting.meetingID)
+    assert cache.get(lock_key) is None
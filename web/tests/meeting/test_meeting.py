@@ -1367,3 +1367,59 @@ def test_create_meeting_ai_summary_requires_recording(
     res.mustcontain(
         "La génération de résumé nécessite d'activer l'enregistrement manuel ou automatique."
     )
+
+
+def test_welcome_page_query_count_does_not_depend_on_meetings(
+    client_app, authenticated_user, user_2, meeting, meeting_1_user_2, bbb_response
+):
+    """The welcome page loads its meetings with a constant number of queries."""
+    from b3desk.models.groups import Group
+    from b3desk.models.meetings import AccessLevel
+    from b3desk.models.meetings import MeetingAccess
+    from sqlalchemy import event
+
+    def count_welcome_queries():
+        db.session.expire_all()
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            client_app.get("/welcome", status=200)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return len(statements)
+
+    # The first request updates the user last connection date.
+    client_app.get("/welcome", status=200)
+    query_count = count_welcome_queries()
+
+    user_2.groups.append(Group(name="group", enable_sip=True))
+    for i in range(5):
+        owned = Meeting(
+            owner=authenticated_user,
+            name=f"owned {i}",
+            voiceBridge=f"33333333{i}",
+            visio_code=f"93333333{i}",
+        )
+        owned.favorite_of.append(authenticated_user)
+        delegated = Meeting(
+            owner=user_2,
+            name=f"delegated {i}",
+            voiceBridge=f"44444444{i}",
+            visio_code=f"94444444{i}",
+        )
+        db.session.add_all([owned, delegated])
+        db.session.flush()
+        db.session.add(
+            MeetingAccess(
+                user_id=authenticated_user.id,
+                meeting_id=delegated.id,
+                level=AccessLevel.DELEGATE,
+            )
+        )
+    db.session.commit()
+
+    assert count_welcome_queries() == query_count
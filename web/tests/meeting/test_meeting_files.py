@@ -1,3 +1,5 @@
+import gzip
+import io
 import json
 from datetime import date
 from datetime import datetime
@@ -6,12 +8,15 @@ from pathlib import Path
 
 import pytest
 import requests
+import urllib3
+from b3desk.file_cache import FileCache
 from b3desk.models import db
 from b3desk.models.meetings import Meeting
 from b3desk.models.meetings import MeetingFiles
 from b3desk.models.meetings import assign_unique_codes
 from b3desk.models.meetings import get_meeting_file_hash
 from b3desk.models.users import User
+from b3desk.nextcloud import WebDAVClient
 from b3desk.session import user_needed
 from flask import url_for
 from sqlalchemy import exc
@@ -101,20 +106,113 @@ def test_file_picker_called_by_bbb(
     assert "meeting/file_picker.html" in vars(response)["contexts"]
 
 
-def test_file_picker_callback(client_app, authenticated_user, meeting, mocker):
-    post_data = ["/folder/file1.pdf", "file2.jpg"]
-
-    mocker.patch("b3desk.tasks.background_upload.delay", return_value=True)
+def test_file_picker_callback(
+    client_app, authenticated_user, meeting, mocker, webdav_server
+):
+    write_nextcloud_file(webdav_server, "picked/file1.pdf", b"first")
+    write_nextcloud_file(webdav_server, "picked/file2.pdf", b"second")
+    write_nextcloud_file(webdav_server, "picked/other/file3.jpg", b"third")
+    post_data = [
+        "/picked/file1.pdf",
+        "picked/file2.pdf",
+        "picked/other/file3.jpg",
+        "picked/missing.pdf",
+    ]
+
+    send_meeting_files = mocker.patch("b3desk.models.bbb.BBB.send_meeting_files")
+    list_directory = mocker.spy(WebDAVClient, "list_directory")
     url = url_for(
         "meeting_files.file_picker_callback", bbb_meeting_id=meeting.meetingID
     )
-    client_app.post(
+    response = client_app.post(
         url,
         params=json.dumps(post_data),
         headers={"Accept": "application/json", "Content-Type": "application/json"},
         status=200,
     )
 
+    assert response.json["rejected"] == ["picked/missing.pdf"]
+    [meeting_files] = send_meeting_files.call_args.args
+    assert [meeting_file.nc_path for meeting_file in meeting_files] == post_data[:3]
+    # One listing per directory
+    assert list_directory.call_count == 2
+
+
+def test_file_picker_callback_sends_large_files(
+    client_app, authenticated_user, meeting, mocker, webdav_server
+):
+    """Files picked during a meeting are not limited by MAX_SIZE_UPLOAD."""
+    client_app.app.config["MAX_SIZE_UPLOAD"] = 4
+    write_nextcloud_file(webdav_server, "sized/large.pdf", b"too large")
+
+    send_meeting_files = mocker.patch("b3desk.models.bbb.BBB.send_meeting_files")
+    url = url_for(
+        "meeting_files.file_picker_callback", bbb_meeting_id=meeting.meetingID
+    )
+    response = client_app.post(
+        url,
+        params=json.dumps(["sized/large.pdf"]),
+        headers={"Accept": "application/json", "Content-Type": "application/json"},
+        status=200,
+    )
+
+    assert response.json["rejected"] == []
+    [meeting_files] = send_meeting_files.call_args.args
+    assert [meeting_file.nc_path for meeting_file in meeting_files] == [
+        "sized/large.pdf"
+    ]
+
+
+def test_nextcloud_directory_listing(client_app, authenticated_user, webdav_server):
+    client_app.app.config["NC_LISTING_PAGE_SIZE"] = 2
+    write_nextcloud_file(webdav_server, "listing/b.pdf", b"b")
+    write_nextcloud_file(webdav_server, "listing/A.pdf", b"a")
+    write_nextcloud_file(webdav_server, "listing/c.pdf", b"c")
+    write_nextcloud_file(webdav_server, "listing/subfolder/d.pdf", b"d")
+
+    response = client_app.get("/nextcloud/files", {"path": "listing"}, status=200)
+    assert response.json["total"] == 4
+    assert response.json["pages"] == 2
+    assert [entry["path"] for entry in response.json["entries"]] == [
+        "listing/subfolder",
+        "listing/A.pdf",
+    ]
+    assert response.json["entries"][0]["is_dir"]
+    assert response.json["entries"][1]["size"] == 1
+
+    response = client_app.get(
+        "/nextcloud/files", {"path": "listing", "page": 2}, status=200
+    )
+    assert [entry["name"] for entry in response.json["entries"]] == [
+        "b.pdf",
+        "c.pdf",
+    ]
+
+    response = client_app.get("/nextcloud/files", status=200)
+    assert "listing" in [entry["name"] for entry in response.json["entries"]]
+
+    client_app.get("/nextcloud/files", {"path": "missing"}, status=404)
+
+
+def test_nextcloud_directory_listing_cache(
+    client_app, authenticated_user, webdav_server, mocker
+):
+    client_app.app.config["NC_LISTING_CACHE_DURATION"] = 30
+    write_nextcloud_file(webdav_server, "listing-cache/a.pdf", b"a")
+    get_etag = mocker.patch.object(WebDAVClient, "get_etag", return_value='"1"')
+    list_directory = mocker.spy(WebDAVClient, "list_directory")
+
+    client_app.get("/nextcloud/files", {"path": "listing-cache"}, status=200)
+    client_app.get("/nextcloud/files", {"path": "listing-cache"}, status=200)
+    assert list_directory.call_count == 1
+
+    # The content of the directory changed, so did its ETag
+    write_nextcloud_file(webdav_server, "listing-cache/b.pdf", b"b")
+    get_etag.return_value = '"2"'
+    response = client_app.get("/nextcloud/files", {"path": "listing-cache"}, status=200)
+    assert list_directory.call_count == 2
+    assert response.json["total"] == 2
+
 
 def test_file_picker_invalid_signature_returns_404(client_app, authenticated_user):
     """SignedConverter returns 404 when signature is invalid."""
@@ -135,25 +233,29 @@ def test_user_needed_decorator_aborts_403_without_session(client_app, mocker):
     assert exc_info.value.code == 403
 
 
-def test_ncdownload(
-    client_app, authenticated_user, meeting, mocker, caplog, nextcloud_credentials
-):
-    class FakeClient:
-        def info(self, ncpath):
-            return {"content_type": "application/pdf"}
+def write_nextcloud_file(webdav_server, nc_path, content):
+    root_path = Path(webdav_server.provider_map["/"].root_folder_path)
+    path = root_path / "remote.php" / "dav" / "files" / "alice" / nc_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
 
-        def download_sync(self, remote_path, local_path):
-            with Path(local_path).open("wb") as f:
-                f.write(b"fake pdf content")
 
+def test_ncdownload(
+    client_app,
+    authenticated_user,
+    meeting,
+    caplog,
+    nextcloud_credentials,
+    webdav_server,
+):
+    write_nextcloud_file(webdav_server, "folder/file1.pdf", b"fake pdf content")
     meeting.owner.nc_login = nextcloud_credentials["nclogin"]
     meeting.owner.nc_locator = nextcloud_credentials["nclocator"]
     meeting.owner.nc_token = nextcloud_credentials["nctoken"]
     db.session.add(meeting.owner)
     db.session.commit()
 
-    mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
-
     nc_path = "folder/file1.pdf"
     token = get_meeting_file_hash(meeting.owner.id, nc_path)
     response = client_app.get(f"/ncdownload/{token}/{meeting.owner.id}/{nc_path}")
@@ -161,6 +263,66 @@ def test_ncdownload(
     assert "Service requesting file url folder/file1.pdf" in caplog.text
     assert response.status_int == 200
     assert response.content_type == "application/pdf"
+    assert response.body == b"fake pdf content"
+    assert response.headers["ETag"]
+
+
+def test_ncdownload_range_and_etag(
+    client_app, meeting, nextcloud_credentials, webdav_server
+):
+    """Range and conditional requests are forwarded to Nextcloud."""
+    write_nextcloud_file(webdav_server, "folder/range.pdf", b"0123456789")
+    meeting.owner.nc_login = nextcloud_credentials["nclogin"]
+    meeting.owner.nc_locator = nextcloud_credentials["nclocator"]
+    meeting.owner.nc_token = nextcloud_credentials["nctoken"]
+    db.session.add(meeting.owner)
+    db.session.commit()
+
+    nc_path = "folder/range.pdf"
+    token = get_meeting_file_hash(meeting.owner.id, nc_path)
+    url = f"/ncdownload/{token}/{meeting.owner.id}/{nc_path}"
+
+    response = client_app.get(url, headers={"Range": "bytes=2-5"}, status=206)
+    assert response.body == b"2345"
+    assert response.headers["Content-Range"] == "bytes 2-5/10"
+
+    etag = client_app.get(url, status=200).headers["ETag"]
+    response = client_app.get(url, headers={"If-None-Match": etag}, status=304)
+    assert response.body == b""
+
+
+def test_ncdownload_cache(
+    client_app, meeting, nextcloud_credentials, webdav_server, tmp_path
+):
+    """Files are cached on disk, and revalidated against Nextcloud with their ETag."""
+    nextcloud_file = write_nextcloud_file(
+        webdav_server, "folder/cached.pdf", b"first version"
+    )
+    meeting.owner.nc_login = nextcloud_credentials["nclogin"]
+    meeting.owner.nc_locator = nextcloud_credentials["nclocator"]
+    meeting.owner.nc_token = nextcloud_credentials["nctoken"]
+    db.session.add(meeting.owner)
+    db.session.commit()
+
+    nc_path = "folder/cached.pdf"
+    token = get_meeting_file_hash(meeting.owner.id, nc_path)
+    url = f"/ncdownload/{token}/{meeting.owner.id}/{nc_path}"
+
+    assert client_app.get(url, status=200).body == b"first version"
+    [cached_file] = (tmp_path / "ncdownload").glob("*.data")
+    assert cached_file.read_bytes() == b"first version"
+
+    # Nextcloud answers 304, the cached copy is served
+    cached_file.write_bytes(b"FIRST VERSION")
+    assert client_app.get(url, status=200).body == b"FIRST VERSION"
+
+    # The file changed in Nextcloud, its ETag too
+    nextcloud_file.write_bytes(b"second version, longer")
+    assert client_app.get(url, status=200).body == b"second version, longer"
+    cache = FileCache(tmp_path / "ncdownload", max_size=1000)
+    data_path, metadata = cache.get(meeting.owner.id, nc_path)
+    assert data_path.read_bytes() == b"second version, longer"
+    assert metadata["size"] == len(b"second version, longer")
 
 
 def test_ncdownload_with_bad_token_abort_404(
@@ -194,7 +356,7 @@ def test_ncdownload_webdav_exception(
     db.session.commit()
 
     class FakeClient:
-        def info(self, ncpath):
+        def open_download(self, nc_path, headers=None):
             raise WebDavException()
 
     mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
@@ -215,7 +377,12 @@ def test_ncdownload_webdav_exception(
 
 
 def test_download_meeting_file_from_nextcloud(
-    client_app, authenticated_user, meeting, mocker, nextcloud_credentials
+    client_app,
+    authenticated_user,
+    meeting,
+    nextcloud_credentials,
+    webdav_server,
+    mocker,
 ):
     """Download a file stored in Nextcloud."""
     meeting_file = MeetingFiles(
@@ -233,15 +400,8 @@ def test_download_meeting_file_from_nextcloud(
     db.session.add(meeting.owner)
     db.session.commit()
 
-    class FakeClient:
-        def list(self):
-            return []
-
-        def download_sync(self, remote_path, local_path):
-            with Path(local_path).open("wb") as f:
-                f.write(b"fake content")
-
-    mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
+    write_nextcloud_file(webdav_server, "visio-agents/test.pdf", b"fake content")
+    open_download = mocker.spy(WebDAVClient, "open_download")
 
     url = url_for(
         "meeting_files.download_meeting_files",
@@ -249,9 +409,13 @@ def test_download_meeting_file_from_nextcloud(
         meeting_file=meeting_file,
     )
     response = client_app.get(url)
+    # Clients that do not accept compressed bodies do not get one
+    assert open_download.call_args.kwargs["headers"]["Accept-Encoding"] == "identity"
 
     assert response.status_code == 200
     assert response.content_type == "application/pdf"
+    assert response.body == b"fake content"
+    assert response.headers["Content-Disposition"] == "attachment; filename=test.pdf"
 
 
 def test_download_meeting_file_without_webdav_credentials(
@@ -369,7 +533,7 @@ def test_add_dropzone_file_upload_to_nextcloud(
         def mkdir(self, path):
             pass
 
-        def upload_sync(self, remote_path, local_path):
+        def upload_chunked(self, remote_path, local_path, **kwargs):
             pass
 
     mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
@@ -405,7 +569,7 @@ def test_add_dropzone_file_sqlalchemy_error(
         def mkdir(self, path):
             pass
 
-        def upload_sync(self, remote_path, local_path):
+        def upload_chunked(self, remote_path, local_path, **kwargs):
             pass
 
         def clean(self, path):
@@ -449,7 +613,7 @@ def test_add_dropzone_file_sqlalchemy_error_cleanup_fails(
         def mkdir(self, path):
             pass
 
-        def upload_sync(self, remote_path, local_path):
+        def upload_chunked(self, remote_path, local_path, **kwargs):
             pass
 
         def clean(self, path):
@@ -475,7 +639,12 @@ def test_add_dropzone_file_sqlalchemy_error_cleanup_fails(
 
 
 def test_add_nextcloud_file_upload(
-    client_app, authenticated_user, meeting, mocker, nextcloud_credentials
+    client_app,
+    authenticated_user,
+    meeting,
+    mocker,
+    nextcloud_credentials,
+    webdav_server,
 ):
     """Test nominal path: add file from Nextcloud."""
     meeting.owner.nc_login = nextcloud_credentials["nclogin"]
@@ -484,11 +653,7 @@ def test_add_nextcloud_file_upload(
     db.session.add(meeting.owner)
     db.session.commit()
 
-    class FakeClient:
-        def info(self, path):
-            return {"size": 1000}
-
-    mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
+    write_nextcloud_file(webdav_server, "folder/doc.pdf", b"content")
 
     response = client_app.post(
         url_for("meeting_files.add_meeting_files", meeting=meeting),
@@ -500,8 +665,31 @@ def test_add_nextcloud_file_upload(
     assert response.json["title"] == "doc.pdf"
 
 
+def test_add_missing_nextcloud_file(
+    client_app, authenticated_user, meeting, nextcloud_credentials, webdav_server
+):
+    meeting.owner.nc_login = nextcloud_credentials["nclogin"]
+    meeting.owner.nc_locator = nextcloud_credentials["nclocator"]
+    meeting.owner.nc_token = nextcloud_credentials["nctoken"]
+    db.session.add(meeting.owner)
+    db.session.commit()
+
+    client_app.post(
+        url_for("meeting_files.add_meeting_files", meeting=meeting),
+        params=json.dumps({"from": "nextcloud", "value": "/folder/missing.pdf"}),
+        headers={"Content-Type": "application/json", "Accept": "application/json"},
+        expect_errors=True,
+    )
+    assert MeetingFiles.query.filter_by(nc_path="/folder/missing.pdf").count() == 0
+
+
 def test_add_nextcloud_file_sqlalchemy_error(
-    client_app, authenticated_user, meeting, mocker, nextcloud_credentials
+    client_app,
+    authenticated_user,
+    meeting,
+    mocker,
+    nextcloud_credentials,
+    webdav_server,
 ):
     """SQLAlchemy error returns appropriate error message."""
     meeting.owner.nc_login = nextcloud_credentials["nclogin"]
@@ -510,11 +698,7 @@ def test_add_nextcloud_file_sqlalchemy_error(
     db.session.add(meeting.owner)
     db.session.commit()
 
-    class FakeClient:
-        def info(self, path):
-            return {"size": 1000}
-
-    mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
+    write_nextcloud_file(webdav_server, "folder/doc.pdf", b"content")
 
     original_commit = db.session.commit
     call_count = [0]
@@ -594,7 +778,12 @@ def test_add_url_file_sqlalchemy_error(
 
 
 def test_add_nextcloud_file_too_large(
-    client_app, authenticated_user, meeting, mocker, nextcloud_credentials
+    client_app,
+    authenticated_user,
+    meeting,
+    mocker,
+    nextcloud_credentials,
+    webdav_server,
 ):
     """Test error when Nextcloud file exceeds max upload size."""
     meeting.owner.nc_login = nextcloud_credentials["nclogin"]
@@ -603,11 +792,8 @@ def test_add_nextcloud_file_too_large(
     db.session.add(meeting.owner)
     db.session.commit()
 
-    class FakeClient:
-        def info(self, path):
-            return {"size": 999999999}
-
-    mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
+    client_app.app.config["MAX_SIZE_UPLOAD"] = 4
+    write_nextcloud_file(webdav_server, "folder/huge.pdf", b"too large")
 
     response = client_app.post(
         url_for("meeting_files.add_meeting_files", meeting=meeting),
@@ -680,7 +866,7 @@ def test_add_dropzone_file_too_large(
         def mkdir(self, path):
             pass  # pragma: no cover
 
-        def upload_sync(self, remote_path, local_path):
+        def upload_chunked(self, remote_path, local_path, **kwargs):
             pass  # pragma: no cover
 
     mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
@@ -701,7 +887,7 @@ def test_upload_file_chunks_disk_write_error(
     client_app, authenticated_user, meeting, jpg_file_content, mocker
 ):
     """Test that OSError during disk write returns 500."""
-    mocker.patch("pathlib.Path.open", side_effect=OSError("Disk full"))
+    mocker.patch("b3desk.uploads.os.pwrite", side_effect=OSError("Disk full"))
 
     response = client_app.post(
         f"/meeting/files/{meeting.id}/upload",
@@ -842,8 +1028,10 @@ def test_download_meeting_file_from_url(
     db.session.commit()
 
     mock_response = mocker.Mock()
-    mock_response.content = b"fake pdf content"
-    mocker.patch.object(requests, "get", return_value=mock_response)
+    mock_response.status_code = 200
+    mock_response.headers = {"Content-Type": "application/pdf", "ETag": '"abc"'}
+    mock_response.raw.stream.return_value = iter([b"fake ", b"pdf content"])
+    get = mocker.patch.object(requests, "get", return_value=mock_response)
 
     response = client_app.get(
         url_for(
@@ -851,9 +1039,90 @@ def test_download_meeting_file_from_url(
             meeting=meeting,
             meeting_file=meeting_file,
         ),
+        headers={"If-None-Match": '"xyz"'},
     )
 
     assert response.status_int == 200
+    assert response.body == b"fake pdf content"
+    assert response.headers["ETag"] == '"abc"'
+    assert get.call_args.kwargs["stream"]
+    assert get.call_args.kwargs["headers"] == {
+        "If-None-Match": '"xyz"',
+        "Accept-Encoding": "identity",
+    }
+
+
+def test_download_url_file_out_of_range(
+    client_app, authenticated_user, meeting, mocker
+):
+    meeting_file = MeetingFiles(
+        url="https://example.com/doc.pdf",
+        title="doc.pdf",
+        created_at=date.today(),
+        meeting_id=meeting.id,
+        owner=meeting.owner,
+    )
+    db.session.add(meeting_file)
+    db.session.commit()
+
+    mock_response = mocker.Mock()
+    mock_response.status_code = 416
+    mocker.patch.object(requests, "get", return_value=mock_response)
+
+    client_app.get(
+        url_for(
+            "meeting_files.download_meeting_files",
+            meeting=meeting,
+            meeting_file=meeting_file,
+        ),
+        headers={"Range": "bytes=1000-"},
+        status=416,
+    )
+    mock_response.close.assert_called_once()
+
+
+def test_download_compressed_url_file(client_app, authenticated_user, meeting, mocker):
+    """Compressed files are forwarded as they are, with their encoding and size.
+
+    WebTest decodes the response, so the received content is the original text.
+    """
+    meeting_file = MeetingFiles(
+        url="https://example.com/doc.txt",
+        title="doc.txt",
+        created_at=date.today(),
+        meeting_id=meeting.id,
+        owner=meeting.owner,
+    )
+    db.session.add(meeting_file)
+    db.session.commit()
+
+    content = b"some text " * 1000
+    compressed = gzip.compress(content)
+    headers = {
+        "Content-Type": "text/plain",
+        "Content-Encoding": "gzip",
+        "Content-Length": str(len(compressed)),
+    }
+    upstream = requests.Response()
+    upstream.status_code = 200
+    upstream.headers.update(headers)
+    upstream.raw = urllib3.HTTPResponse(
+        io.BytesIO(compressed), headers=headers, preload_content=False
+    )
+    get = mocker.patch.object(requests, "get", return_value=upstream)
+
+    response = client_app.get(
+        url_for(
+            "meeting_files.download_meeting_files",
+            meeting=meeting,
+            meeting_file=meeting_file,
+        ),
+        headers={"Accept-Encoding": "gzip"},
+        status=200,
+    )
+
+    assert response.body == content
+    assert get.call_args.kwargs["headers"] == {"Accept-Encoding": "gzip"}
 
 
 def test_add_url_file_not_available(client_app, authenticated_user, meeting, mocker):
@@ -1120,3 +1389,112 @@ def test_delete_meeting_file_not_owner(client_app, authenticated_user, meeting):
 
     assert response.status_int == 403
     assert "ne pouvez pas supprimer" in response.json["msg"]
+
+
+def test_upload_file_chunks_out_of_order(
+    client_app, authenticated_user, meeting, jpg_file_content, tmp_path
+):
+    """Chunks can be received in any order, and the upload can be resumed."""
+
+    def post_chunk(index, offset, content):
+        return client_app.post(
+            f"/meeting/files/{meeting.id}/upload",
+            {
+                "dzchunkindex": index,
+                "dzchunkbyteoffset": offset,
+                "dztotalchunkcount": 3,
+                "dztotalfilesize": len(jpg_file_content),
+            },
+            upload_files=[("dropzoneFiles", "file.jpg", content)],
+        )
+
+    response = post_chunk(2, 100, jpg_file_content[100:])
+    assert response.json["received"] == [[100, len(jpg_file_content)]]
+
+    response = post_chunk(0, 0, jpg_file_content[:50])
+    assert response.json["received"] == [[0, 50], [100, len(jpg_file_content)]]
+
+    status_url = url_for(
+        "meeting_files.upload_file_chunks_status", meeting=meeting, filename="file.jpg"
+    )
+    response = client_app.get(status_url)
+    assert response.json == {
+        "received": [[0, 50], [100, len(jpg_file_content)]],
+        "complete": False,
+    }
+
+    post_chunk(1, 50, jpg_file_content[50:100])
+    assert client_app.get(status_url).json["complete"]
+    assert (tmp_path / "chunks" / "1-1-file.jpg").read_bytes() == jpg_file_content
+
+
+def test_nextcloud_push_status(client_app, authenticated_user, meeting, meeting_2):
+    from b3desk.uploads import set_upload_status
+
+    set_upload_status(
+        "upload-id",
+        state="uploading",
+        user_id=meeting.owner.id,
+        meeting_id=meeting.id,
+        title="file.jpg",
+        sent=10,
+        size=100,
+    )
+    url = url_for(
+        "meeting_files.nextcloud_push_status", meeting=meeting, upload_id="upload-id"
+    )
+    response = client_app.get(url, status=202)
+    assert response.json["sent"] == 10
+    assert response.json["size"] == 100
+
+    set_upload_status(
+        "upload-id",
+        state="done",
+        file={"title": "file.jpg", "id": 1, "created_at": "2025-01-01"},
+    )
+    response = client_app.get(url, status=200)
+    assert response.json["title"] == "file.jpg"
+
+    client_app.get(
+        url_for(
+            "meeting_files.nextcloud_push_status",
+            meeting=meeting_2,
+            upload_id="upload-id",
+        ),
+        status=404,
+    )
+
+
+def test_add_dropzone_file_nextcloud_unavailable(
+    client_app, authenticated_user, meeting, jpg_file_content, mocker
+):
+    """A WebDAV error during the background push is reported by the push status."""
+    client_app.post(
+        f"/meeting/files/{meeting.id}/upload",
+        {
+            "dzchunkindex": 0,
+            "dzchunkbyteoffset": 0,
+            "dztotalchunkcount": 1,
+            "dztotalfilesize": len(jpg_file_content),
+        },
+        upload_files=[("dropzoneFiles", "file.jpg", jpg_file_content)],
+    )
+
+    class FakeClient:
+        def mkdir(self, path):
+            pass
+
+        def upload_chunked(self, remote_path, local_path, **kwargs):
+            raise WebDavException()
+
+    mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
+
+    response = client_app.post(
+        url_for("meeting_files.add_meeting_files", meeting=meeting),
+        params=json.dumps({"from": "upload", "value": "file.jpg"}),
+        headers={"Content-Type": "application/json"},
+        expect_errors=True,
+    )
+
+    assert response.status_int == 503
+    assert "indisponible" in response.json["msg"]
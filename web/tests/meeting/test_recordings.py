@@ -8,6 +8,16 @@ import pytest
 from b3desk.commands import bp
 
 
+def store_recordings(meeting):
+    """Store the recordings BBB returns for a meeting."""
+    from b3desk.models import db
+    from b3desk.models.recordings import store_recording
+
+    for recording in meeting.bbb.get_recordings():
+        store_recording(meeting, recording)
+    db.session.commit()
+
+
 @pytest.fixture
 def bbb_getRecordings_response(mocker):
     """Fixture that provides a mock BBB getRecordings API response with sample recording data."""
@@ -368,6 +378,7 @@ def test_open_recordings_page(
 
     mocker.patch("b3desk.models.bbb.requests.get", return_value=DirectLinkRecording)
     mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    store_recordings(meeting)
 
     response = client_app.get(f"/meeting/recordings/{meeting.id}")
     html = response.body.decode("utf-8")
@@ -474,9 +485,205 @@ def test_open_recordings_page_ai_summary(
     mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
     cli_runner.invoke(bp.cli, ["user-to-admin", "alice@domain.tld"])
     response = client_app.post("/admin/add-group-members/1/1", status=302)
+    store_recordings(meeting)
     response = client_app.get(f"/meeting/recordings/{meeting.id}")
     html = response.body.decode("utf-8")
 
     assert "https://bbb.test/ai-summary/rec-ai-1/ai-summary.html" in html
     assert "https://bbb.test/ai-summary/rec-ai-1/ai-summary.pdf" in html
     assert "https://bbb.test/ai-summary/rec-ai-1/ai-summary.md" in html
+
+
+def test_recordings_page_reads_stored_recordings(
+    client_app, authenticated_user, mocker, meeting, bbb_getRecordings_response
+):
+    """The recordings page lists the stored recordings without querying BBB."""
+    import requests
+
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    store_recordings(meeting)
+    bbb_getRecordings_response.side_effect = requests.Timeout("timeout")
+
+    response = client_app.get(f"/meeting/recordings/{meeting.id}")
+    assert "Recording title hand written" in response.text
+    assert response.text.count('<dialog id="delete-video-') == 2
+
+
+def test_recordings_page_falls_back_to_bbb_before_the_first_reconciliation(
+    client_app,
+    authenticated_user,
+    mocker,
+    meeting,
+    meeting_2,
+    bbb_getRecordings_response,
+):
+    """Until a reconciliation completes, each meeting fetches its recordings once."""
+    from b3desk.models import db
+    from b3desk.models.recordings import Recording
+
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    # A recording of another meeting stored by a callback
+    db.session.add(
+        Recording(
+            recordID="other-recording",
+            meeting=meeting_2,
+            start_date=datetime.datetime(2018, 7, 4),
+            end_date=datetime.datetime(2018, 7, 4),
+        )
+    )
+    db.session.commit()
+
+    response = client_app.get(f"/meeting/recordings/{meeting.id}")
+    assert "Recording title hand written" in response.text
+    assert len(meeting.recordings) == 2
+    assert bbb_getRecordings_response.call_count == 1
+
+    client_app.get(f"/meeting/recordings/{meeting.id}")
+    assert bbb_getRecordings_response.call_count == 1
+
+
+def test_recordings_page_does_not_fall_back_to_bbb_once_reconciled(
+    client_app, authenticated_user, mocker, meeting, bbb_getRecordings_response
+):
+    from b3desk import cache
+    from b3desk.models.recordings import RECORDINGS_RECONCILED_CACHE_KEY
+
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    cache.set(RECORDINGS_RECONCILED_CACHE_KEY, True)
+
+    client_app.get(f"/meeting/recordings/{meeting.id}")
+    assert meeting.recordings == []
+    assert bbb_getRecordings_response.call_count == 0
+
+
+def test_delete_recording_removes_stored_recording(
+    client_app, authenticated_user, meeting, bbb_getRecordings_response
+):
+    from b3desk.models.recordings import Recording
+
+    store_recordings(meeting)
+    record_id = meeting.recordings[0].recordID
+
+    client_app.post(f"/meeting/{meeting.id}/video/delete", {"recordID": record_id})
+    assert [recording.recordID for recording in Recording.query.all()] == [
+        meeting.recordings[0].recordID
+    ]
+    assert meeting.recordings[0].recordID != record_id
+
+
+def test_update_recording_name_updates_stored_recording(
+    client_app, authenticated_user, meeting, bbb_getRecordings_response
+):
+    store_recordings(meeting)
+    recording = meeting.recordings[0]
+
+    client_app.post(
+        f"/meeting/{meeting.id}/recordings/{recording.recordID}",
+        {"name": "Renamed recording"},
+        status=302,
+    )
+    assert recording.name == "Renamed recording"
+
+
+def test_reconcile_recordings(client_app, meeting, mocker):
+    """Recordings of known meetings are stored, and those BBB lost are removed."""
+    from b3desk.models import db
+    from b3desk.models.recordings import Recording
+    from b3desk.models.recordings import reconcile_recordings
+
+    db.session.add(
+        Recording(
+            recordID="deleted-recording",
+            meeting=meeting,
+            start_date=datetime.datetime(2018, 7, 4),
+            end_date=datetime.datetime(2018, 7, 4),
+        )
+    )
+    db.session.commit()
+
+    def recording(record_id, meeting_id):
+        return f"""
+    <recording>
+      <recordID>{record_id}</recordID>
+      <meetingID>{meeting_id}</meetingID>
+      <startTime>1530718721124</startTime>
+      <endTime>1530718810456</endTime>
+      <participants>3</participants>
+      <metadata><name>{record_id}</name></metadata>
+      <playback>
+        <format>
+          <type>presentation</type>
+          <url>https://bbb.test/playback/presentation/{record_id}</url>
+        </format>
+      </playback>
+    </recording>"""
+
+    class Response:
+        content = f"""
+<response>
+  <returncode>SUCCESS</returncode>
+  <recordings>
+    {recording("known-recording", meeting.meetingID)}
+    {recording("unknown-meeting-recording", "meeting-persistent-9999--hash")}
+  </recordings>
+</response>
+"""
+        text = ""
+
+    send = mocker.patch("requests.Session.send", return_value=Response)
+    client_app.app.config["RECORDING_RECONCILIATION_MAX_MISSES"] = 2
+
+    assert reconcile_recordings() == 1
+    assert "meetingID" not in send.call_args.args[0].url
+    assert "limit=100" in send.call_args.args[0].url
+    assert [recording.recordID for recording in meeting.recordings] == [
+        "known-recording",
+        "deleted-recording",
+    ]
+    assert meeting.recordings[1].missed_reconciliations == 1
+
+    # Recordings are only removed once BBB misses them several times in a row
+    assert reconcile_recordings() == 1
+    assert [recording.recordID for recording in meeting.recordings] == [
+        "known-recording"
+    ]
+    assert meeting.recordings[0].playbacks["presentation"]["url"] == (
+        "https://bbb.test/playback/presentation/known-recording"
+    )
+
+
+def test_reconcile_recordings_task_when_bbb_is_unavailable(client_app, meeting, mocker):
+    """Stored recordings are kept when BBB cannot be reached."""
+    import requests
+    from b3desk.models import db
+    from b3desk.models.recordings import Recording
+    from b3desk.tasks import celery
+    from b3desk.tasks import reconcile_recordings
+
+    db.session.add(
+        Recording(
+            recordID="recording",
+            meeting=meeting,
+            start_date=datetime.datetime(2018, 7, 4),
+            end_date=datetime.datetime(2018, 7, 4),
+        )
+    )
+    db.session.commit()
+
+    mocker.patch("requests.Session.send", side_effect=requests.Timeout("timeout"))
+    assert reconcile_recordings.delay().get() is False
+    assert len(meeting.recordings) == 1
+    assert (
+        celery.conf.beat_schedule["reconcile-recordings"]["schedule"]
+        == client_app.app.config["RECORDING_RECONCILIATION_INTERVAL"]
+    )
+
+
+def test_recordings_are_reconciled_when_the_scheduler_starts(client_app, mocker):
+    """The recordings table is filled right after a deployment."""
+    from b3desk.tasks import reconcile_recordings
+    from b3desk.tasks import reconcile_recordings_on_start
+
+    delay = mocker.patch.object(reconcile_recordings, "delay")
+    reconcile_recordings_on_start(sender=None)
+    delay.assert_called_once_with()
@@ -0,0 +1,133 @@
+import threading
+
+import pytest
+from b3desk.join import get_hash
+from b3desk.models import db
+from b3desk.models.roles import Role
+from b3desk.waiting_room import can_stream_events
+from b3desk.waiting_room import notify_meeting_started
+from b3desk.waiting_room import wait_for_meeting
+from flask import url_for
+
+
+@pytest.fixture
+def gevent_worker(mocker):
+    mocker.patch("b3desk.endpoints.join.can_stream_events", return_value=True)
+
+
+def events_url(meeting, role=Role.attendee):
+    return url_for(
+        "join.waiting_meeting_events",
+        meeting_fake_id=meeting.fake_id,
+        hash_=get_hash(meeting, role),
+    )
+
+
+def test_events_when_meeting_is_running(client_app, meeting, mocker, gevent_worker):
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=True)
+
+    response = client_app.get(events_url(meeting), status=200)
+    assert response.content_type == "text/event-stream"
+    assert "event: started" in response.text
+
+
+def test_events_do_not_hold_a_database_connection(
+    client_app, meeting, mocker, gevent_worker
+):
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=True)
+    remove = mocker.spy(db.session, "remove")
+    meeting_events = mocker.patch(
+        "b3desk.endpoints.join.meeting_events", return_value=iter(["data\n\n"])
+    )
+
+    client_app.get(events_url(meeting), status=200)
+    assert remove.called
+    meeting_events.assert_called_once()
+
+
+def test_events_until_stream_ends(client_app, meeting, mocker, gevent_worker):
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    client_app.app.config["WAITING_ROOM_KEEPALIVE_INTERVAL"] = 0.1
+    client_app.app.config["WAITING_ROOM_STREAM_DURATION"] = 0.3
+
+    response = client_app.get(events_url(meeting), status=200)
+    assert ": keepalive" in response.text
+    assert "event: started" not in response.text
+
+
+def test_events_refused_without_gevent(client_app, meeting):
+    """Streams would exhaust threaded workers, the page reloads instead."""
+    client_app.get(events_url(meeting), status=204)
+
+
+def test_can_stream_events_with_gevent(mocker):
+    assert not can_stream_events()
+
+    monkey = mocker.Mock()
+    monkey.is_module_patched.return_value = True
+    mocker.patch.dict("sys.modules", {"gevent.monkey": monkey})
+    assert can_stream_events()
+    monkey.is_module_patched.assert_called_with("socket")
+
+
+def test_waiting_page_streams_events_on_gevent_workers(client_app, meeting, mocker):
+    waiting_url = url_for(
+        "join.waiting_meeting",
+        meeting_fake_id=meeting.fake_id,
+        hash_=get_hash(meeting, Role.attendee),
+    )
+
+    response = client_app.get(waiting_url, status=200)
+    assert "data-events-url" not in response.text
+
+    mocker.patch("b3desk.endpoints.join.can_stream_events", return_value=True)
+    response = client_app.get(waiting_url, status=200)
+    assert f'data-events-url="{events_url(meeting)}"' in response.text
+
+
+def test_events_with_invalid_hash(client_app, meeting):
+    url = url_for(
+        "join.waiting_meeting_events",
+        meeting_fake_id=meeting.fake_id,
+        hash_="invalid-hash",
+    )
+    client_app.get(url, status=404)
+
+
+def test_waiters_share_a_single_watcher(client_app, meeting, mocker):
+    """Waiting attendees are woken up by the meeting creation, with one BBB check."""
+    is_running = mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    client_app.app.config["WAITING_ROOM_POLL_INTERVAL"] = 60
+    app = client_app.app
+    meeting_id = meeting.meetingID
+    results = []
+
+    def wait():
+        with app.app_context():
+            results.append(wait_for_meeting(app, meeting_id, timeout=10))
+
+    threads = [threading.Thread(target=wait) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+
+    while is_running.call_count < 1:
+        threading.Event().wait(0.01)
+
+    notify_meeting_started(meeting_id)
+    for thread in threads:
+        thread.join()
+
+    assert results == [True, True, True]
+    assert is_running.call_count == 1
+
+
+def test_created_meeting_can_be_joined_from_the_waiting_room(
+    client_app, meeting, mocker
+):
+    from b3desk.join import get_join_url
+
+    mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    assert "/meeting/wait/" in get_join_url(meeting, Role.attendee, "Alice")
+
+    notify_meeting_started(meeting.meetingID)
+    assert "/meeting/wait/" not in get_join_url(meeting, Role.attendee, "Alice")
@@ -91,7 +91,9 @@ def test_research_bar_is_kept_through_pagination_in_user_list_in_admin_page(
     # 'li' matches Alice (page 1) and Charlie (page 2), but not Berenice.
     mocker.patch("b3desk.endpoints.admin.PER_PAGE", 1)
     cli_runner.invoke(bp.cli, ["user-to-admin", "alice@domain.tld"])
-    res = client_app.get("/admin/users?search=li&page=2", status=200)
+    res = client_app.get("/admin/users?search=li", status=200)
+    assert res.text.count("alice@domain.tld") == 1
+    res = res.click(href="after=", index=0)
     assert res.text.count("charlie@domain.tld") == 1
     assert res.text.count("alice@domain.tld") == 0
     assert res.text.count("berenice@domain.tld") == 0
@@ -424,7 +426,8 @@ def test_research_bar_is_kept_through_pagination_in_group_list_in_admin_page(
     db.session.commit()
     mocker.patch("b3desk.endpoints.admin.PER_PAGE", 1)
     cli_runner.invoke(bp.cli, ["user-to-admin", "alice@domain.tld"])
-    res = client_app.get("/admin/groups?search=team&page=2", status=200)
+    res = client_app.get("/admin/groups?search=team", status=200)
+    res = res.click(href="after=", index=0)
     groups_table = res.pyquery("table#groups").text()
     assert "Team-y" in groups_table
     assert "Team-x" not in groups_table
@@ -639,6 +642,7 @@ def test_admin_can_open_recordings_page(
 ):
     """Test admin can open recordings page."""
     from b3desk.models.bbb import BBB
+    from b3desk.models.recordings import store_recording
 
     cli_runner.invoke(bp.cli, ["user-to-admin", "alice@domain.tld"])
 
@@ -656,6 +660,9 @@ def test_admin_can_open_recordings_page(
 
     mocker.patch("b3desk.models.bbb.requests.get", return_value=DirectLinkRecording)
     mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
+    for recording in BBB(other_meeting.meetingID).get_recordings():
+        store_recording(other_meeting, recording)
+    db.session.commit()
 
     response = client_app.get(f"/meeting/recordings/{other_meeting.id}")
     html = response.body.decode("utf-8")
@@ -691,3 +698,56 @@ def test_admin_cannot_edit_files_if_meeting_owner_cannot_use_file_sharing(
         status=302,
     )
     assert ("warning", "Vous ne pouvez pas modifier cet élément") in res.flashes
+
+
+def test_group_list_keyset_pagination(cli_runner, user, client_app, authenticated_user):
+    """Pages are reached through cursors in both directions."""
+    from b3desk.endpoints.admin import get_groups_paginate
+
+    groups = [
+        Group(name=name, created_at=datetime(2024, 1, 1 + i))
+        for i, name in enumerate(["Team-x", "Squad", "Team-y", "Crew"])
+    ]
+    db.session.add_all(groups)
+    db.session.commit()
+
+    def names(page):
+        return [group.name for group in page.items]
+
+    first = get_groups_paginate(per_page=2, data=None)
+    assert names(first) == ["Team-x", "Squad"]
+    assert not first.has_prev
+    assert first.has_next
+    assert first.total == 4
+
+    second = get_groups_paginate(per_page=2, data=None, after=first.next_cursor)
+    assert names(second) == ["Team-y", "Crew"]
+    assert second.has_prev
+    assert not second.has_next
+
+    previous = get_groups_paginate(per_page=2, data=None, before=second.prev_cursor)
+    assert names(previous) == ["Team-x", "Squad"]
+    assert not previous.has_prev
+    assert previous.has_next
+
+    last = get_groups_paginate(per_page=3, data=None, before=0)
+    assert names(last) == ["Squad", "Team-y", "Crew"]
+    assert last.has_prev
+    assert not last.has_next
+
+
+def test_user_list_estimated_count(
+    cli_runner, user, client_app, authenticated_user, mocker
+):
+    """Large result counts come from the database planner estimation."""
+    mocker.patch("b3desk.pagination.estimate_count", return_value=123456)
+    cli_runner.invoke(bp.cli, ["user-to-admin", "alice@domain.tld"])
+
+    res = client_app.get("/admin/users", status=200)
+    assert "Environ" in res.text
+    assert "123456 utilisateurs" in res.text
+
+    client_app.app.config["ADMIN_COUNT_ESTIMATE_THRESHOLD"] = 0
+    res = client_app.get("/admin/users", status=200)
+    assert "Environ" not in res.text
+    assert "1 utilisateur" in res.text
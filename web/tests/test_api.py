@@ -365,3 +365,27 @@ def test_api_new_shadow_meeting_without_pin_and_sip(
     assert "pin" not in res.json["shadow-meeting"][0]
     assert "phone_number" not in res.json["shadow-meeting"][0]
     assert "SIPMediaGW_url" not in res.json["shadow-meeting"][0]
+
+
+def test_api_meetings_running_state(
+    client_app,
+    user,
+    meeting,
+    meeting_1_user_2,
+    iam_token,
+    mocker,
+):
+    """The running state of every meeting is returned on demand."""
+    is_running = mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=True)
+    res = client_app.get(
+        "/api/meetings", headers={"Authorization": f"Bearer {iam_token.access_token}"}
+    )
+    assert all("running" not in item for item in res.json["meetings"])
+    assert is_running.call_count == 0
+
+    res = client_app.get(
+        "/api/meetings?running=true",
+        headers={"Authorization": f"Bearer {iam_token.access_token}"},
+    )
+    assert [item["running"] for item in res.json["meetings"]] == [True, True]
+    assert is_running.call_count == 2
@@ -1,3 +1,5 @@
+import datetime
+
 import pytest
 import requests
 from b3desk import BigBlueButtonUnavailable
@@ -38,6 +40,99 @@ def test_is_running(meeting, mocker):
     assert send.call_count == 1
 
 
+IS_MEETING_RUNNING_STOPPED_RESPONSE = """
+<response>
+  <returncode>SUCCESS</returncode>
+  <running>false</running>
+</response>
+"""
+
+
+class RunningResponse:
+    content = IS_MEETING_RUNNING_SUCCESS_RESPONSE
+    text = ""
+
+
+class StoppedResponse:
+    content = IS_MEETING_RUNNING_STOPPED_RESPONSE
+    text = ""
+
+
+def test_meeting_creation_does_not_trust_cached_responses(meeting, mocker):
+    """A meeting that ended on its own is created again, whatever the cache says."""
+    from b3desk.join import request_bbb_meeting_creation
+    from b3desk.models.bbb import BBB
+
+    send = mocker.patch("requests.Session.send", return_value=RunningResponse)
+    assert BBB(meeting.meetingID).is_running(use_snapshot=False)
+
+    send.return_value = StoppedResponse
+    assert BBB(meeting.meetingID).is_running()
+    assert send.call_count == 1
+
+    create = mocker.patch("b3desk.models.bbb.BBB.create")
+    request_bbb_meeting_creation(meeting)
+    assert send.call_count == 2
+    create.assert_called_once()
+
+
+def test_stale_response_is_served_while_refreshed(meeting, mocker, time_machine):
+    """Expired responses are served once more, while they are refreshed in the background."""
+    from b3desk.models.bbb import BBB
+
+    now = datetime.datetime.now()
+    time_machine.move_to(now)
+    send = mocker.patch("requests.Session.send", return_value=RunningResponse)
+    bbb = BBB(meeting.meetingID)
+    assert bbb.is_running()
+
+    time_machine.move_to(now + datetime.timedelta(seconds=10))
+    send.return_value = StoppedResponse
+    assert bbb.is_running()
+    assert send.call_count == 2
+
+    assert not bbb.is_running()
+    assert send.call_count == 2
+
+
+def test_failure_is_cached(meeting, mocker, time_machine):
+    """BBB is not queried again right after a failure."""
+    from b3desk.models.bbb import BBB
+
+    now = datetime.datetime.now()
+    time_machine.move_to(now)
+    send = mocker.patch("requests.Session.send", side_effect=requests.Timeout())
+    bbb = BBB(meeting.meetingID)
+    with pytest.raises(BigBlueButtonUnavailable):
+        bbb.is_running()
+    with pytest.raises(BigBlueButtonUnavailable):
+        bbb.is_running()
+    assert send.call_count == 1
+
+    time_machine.move_to(now + datetime.timedelta(seconds=10))
+    send.side_effect = None
+    send.return_value = RunningResponse
+    assert bbb.is_running()
+    assert send.call_count == 2
+
+
+def test_stale_response_is_served_on_failure(meeting, mocker, time_machine):
+    """The last response is served while BBB is failing."""
+    from b3desk.models.bbb import BBB
+
+    now = datetime.datetime.now()
+    time_machine.move_to(now)
+    send = mocker.patch("requests.Session.send", return_value=RunningResponse)
+    bbb = BBB(meeting.meetingID)
+    assert bbb.is_running()
+
+    time_machine.move_to(now + datetime.timedelta(seconds=10))
+    send.side_effect = requests.Timeout()
+    assert bbb.is_running()
+    assert bbb.is_running()
+    assert send.call_count == 2
+
+
 GET_RECORDINGS_RESPONSE = """
 <response>
   <returncode>SUCCESS</returncode>
@@ -167,6 +262,110 @@ def test_get_recordings(meeting, mocker):
     assert send.call_count == 1
 
 
+def test_concurrent_misses_send_a_single_request(client_app, meeting, mocker):
+    """Callers missing the same response wait for the first request to BBB."""
+    import threading
+
+    from b3desk.models.bbb import BBB
+
+    sending = threading.Event()
+    release = threading.Event()
+
+    def send(request, **kwargs):
+        sending.set()
+        release.wait(5)
+        return RunningResponse
+
+    send = mocker.patch("requests.Session.send", side_effect=send)
+    app = client_app.app
+    meeting_id = meeting.meetingID
+    results = []
+
+    def is_running():
+        with app.app_context():
+            results.append(BBB(meeting_id).is_running())
+
+    first = threading.Thread(target=is_running)
+    first.start()
+    sending.wait(5)
+    others = [threading.Thread(target=is_running) for _ in range(3)]
+    for thread in others:
+        thread.start()
+    release.set()
+    for thread in [first, *others]:
+        thread.join()
+
+    assert results == [True] * 4
+    assert send.call_count == 1
+
+
+def test_misses_do_not_wait_for_scheduled_refreshes(client_app, meeting, mocker):
+    """A pending background refresh does not hold back the callers missing the response."""
+    from b3desk import cache
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import bbb_response_refresh_key
+
+    bbb = BBB(meeting.meetingID)
+    request = bbb.bbb_request("isMeetingRunning", params={"meetingID": bbb.meeting_id})
+    cache.add(bbb_response_refresh_key(request.url), True)
+    sleep = mocker.patch("b3desk.caching.time.sleep")
+    send = mocker.patch("requests.Session.send", return_value=RunningResponse)
+
+    assert bbb.is_running()
+    assert send.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_cache_duration_per_endpoint(client_app, meeting, mocker, time_machine):
+    from b3desk.models.bbb import BBB
+
+    client_app.app.config["BIGBLUEBUTTON_API_CACHE_DURATIONS"] = {
+        "isMeetingRunning": 60
+    }
+    now = datetime.datetime.now()
+    time_machine.move_to(now)
+    send = mocker.patch("requests.Session.send", return_value=RunningResponse)
+    bbb = BBB(meeting.meetingID)
+    assert bbb.is_running()
+
+    time_machine.move_to(now + datetime.timedelta(seconds=30))
+    assert bbb.is_running()
+    assert send.call_count == 1
+
+
+def test_recordings_are_forgotten_when_updated(meeting, mocker):
+    """Updating recordings purges the cached recordings of the meeting."""
+    from b3desk.models.bbb import BBB
+
+    class Response:
+        content = GET_RECORDINGS_RESPONSE
+        text = ""
+
+    send = mocker.patch("requests.Session.send", return_value=Response)
+    bbb = BBB(meeting.meetingID)
+    assert len(bbb.get_recordings()) == 2
+    assert send.call_count == 1
+
+    bbb.update_recordings(["recording-id"], {"name": "New name"})
+    assert send.call_count == 2
+
+    assert len(bbb.get_recordings()) == 2
+    assert send.call_count == 3
+
+
+def test_meeting_state_is_forgotten_when_ended(meeting, mocker):
+    from b3desk.models.bbb import BBB
+
+    send = mocker.patch("requests.Session.send", return_value=RunningResponse)
+    bbb = BBB(meeting.meetingID)
+    assert bbb.is_running()
+
+    send.return_value = StoppedResponse
+    bbb.end()
+    assert not bbb.is_running()
+    assert send.call_count == 3
+
+
 CREATE_RESPONSE = """
 <response>
   <returncode>SUCCESS</returncode>
@@ -223,14 +422,20 @@ def test_timeout_bbb_request(client_app, mocker, authenticated_user, meeting, ca
 def test_timeout_bbb_get_recordings_request(
     client_app, mocker, authenticated_user, meeting, caplog
 ):
+    from b3desk.models.bbb import BBB
+
     mocker.patch(
         "requests.Session.send", side_effect=requests.Timeout("timeout message")
     )
     mocker.patch("b3desk.models.bbb.BBB.is_running", return_value=False)
     client_app.app.config["BIGBLUEBUTTON_API_CACHE_DURATION"] = 0
-    client_app.get("/meeting/recordings/1")
+    with pytest.raises(BigBlueButtonUnavailable):
+        BBB(meeting.meetingID).get_recordings()
     assert "BBB API timeout error timeout message" in caplog.text
 
+    # The recordings page only lists the stored recordings
+    client_app.get("/meeting/recordings/1", status=200)
+
 
 def test_invalid_xml_response(meeting, mocker, caplog):
     """Tests that invalid XML responses raise BigBlueButtonUnavailable."""
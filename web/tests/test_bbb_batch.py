@@ -0,0 +1,68 @@
+import threading
+
+import requests
+
+IS_MEETING_RUNNING_RESPONSE = """
+<response>
+  <returncode>SUCCESS</returncode>
+  <running>{running}</running>
+</response>
+"""
+
+
+class Response:
+    text = ""
+
+    def __init__(self, running):
+        self.content = IS_MEETING_RUNNING_RESPONSE.format(running=running)
+
+
+def test_is_running_for_several_meetings(client_app, mocker):
+    from b3desk.models.bbb import BBBBatch
+
+    def send(request, **kwargs):
+        return Response("true" if "running-meeting" in request.url else "false")
+
+    mocker.patch("requests.Session.send", side_effect=send)
+
+    result = BBBBatch(["running-meeting", "idle-meeting"]).is_running()
+    assert result == {"running-meeting": True, "idle-meeting": False}
+
+
+def test_requests_are_sent_concurrently(client_app, mocker):
+    """All the requests are in flight at the same time, up to the limit."""
+    from b3desk.models.bbb import BBBBatch
+
+    barrier = threading.Barrier(3, timeout=5)
+
+    def send(request, **kwargs):
+        barrier.wait()
+        return Response("true")
+
+    send = mocker.patch("requests.Session.send", side_effect=send)
+
+    result = BBBBatch(["a", "b", "c"], max_workers=3).is_running()
+    assert result == {"a": True, "b": True, "c": True}
+    assert send.call_count == 3
+
+
+def test_unavailable_meeting_does_not_fail_the_batch(client_app, mocker):
+    from b3desk.models.bbb import BBBBatch
+
+    def send(request, **kwargs):
+        if "broken" in request.url:
+            raise requests.Timeout("timeout message")
+        return Response("true")
+
+    mocker.patch("requests.Session.send", side_effect=send)
+
+    result = BBBBatch(["broken", "working"]).is_running()
+    assert result == {"broken": None, "working": True}
+
+
+def test_empty_batch(client_app, mocker):
+    from b3desk.models.bbb import BBBBatch
+
+    send = mocker.patch("requests.Session.send")
+    assert BBBBatch([]).is_running() == {}
+    send.assert_not_called()
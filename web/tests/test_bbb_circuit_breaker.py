@@ -0,0 +1,110 @@
+import datetime
+
+import pytest
+import requests
+from b3desk import BigBlueButtonUnavailable
+from b3desk.join import get_join_url
+from b3desk.models.roles import Role
+
+IS_MEETING_RUNNING_RESPONSE = """
+<response>
+  <returncode>SUCCESS</returncode>
+  <running>true</running>
+</response>
+"""
+
+
+class Response:
+    content = IS_MEETING_RUNNING_RESPONSE
+    text = ""
+
+
+@pytest.fixture
+def configuration(configuration):
+    configuration["BIGBLUEBUTTON_BREAKER_THRESHOLD"] = 2
+    configuration["BIGBLUEBUTTON_BREAKER_DURATION"] = 10
+    return configuration
+
+
+@pytest.fixture
+def bbb_down(mocker):
+    return mocker.patch("requests.Session.send", side_effect=requests.Timeout())
+
+
+def test_breaker_opens_after_repeated_failures(client_app, meeting, bbb_down):
+    from b3desk.models.bbb import BBB
+
+    bbb = BBB(meeting.meetingID)
+    for _ in range(3):
+        with pytest.raises(BigBlueButtonUnavailable):
+            bbb.is_running()
+
+    assert bbb_down.call_count == 2
+
+
+def test_breaker_is_per_endpoint(client_app, meeting, bbb_down):
+    from b3desk.models.bbb import BBB
+
+    bbb = BBB(meeting.meetingID)
+    for _ in range(2):
+        with pytest.raises(BigBlueButtonUnavailable):
+            bbb.is_running()
+
+    bbb_down.side_effect = None
+    bbb_down.return_value = Response
+    assert bbb.get_meeting_info()["returncode"] == "SUCCESS"
+    with pytest.raises(BigBlueButtonUnavailable):
+        bbb.is_running()
+
+
+def test_breaker_half_open_probe(client_app, meeting, bbb_down, time_machine):
+    from b3desk.models.bbb import BBB
+
+    now = datetime.datetime.now()
+    time_machine.move_to(now)
+    bbb = BBB(meeting.meetingID)
+    for _ in range(2):
+        with pytest.raises(BigBlueButtonUnavailable):
+            bbb.is_running()
+
+    # The probe fails, and the circuit opens for twice as long
+    time_machine.move_to(now + datetime.timedelta(seconds=11))
+    with pytest.raises(BigBlueButtonUnavailable):
+        bbb.is_running()
+    assert bbb_down.call_count == 3
+
+    time_machine.move_to(now + datetime.timedelta(seconds=22))
+    with pytest.raises(BigBlueButtonUnavailable):
+        bbb.is_running()
+    assert bbb_down.call_count == 3
+
+    # The probe succeeds, and the circuit closes
+    time_machine.move_to(now + datetime.timedelta(seconds=32))
+    bbb_down.side_effect = None
+    bbb_down.return_value = Response
+    assert bbb.is_running()
+    assert bbb.is_running()
+    assert bbb_down.call_count == 5
+
+
+def test_in_flight_limit(client_app, meeting, mocker):
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import in_flight_limit
+
+    send = mocker.patch("requests.Session.send", return_value=Response)
+    client_app.app.config["BIGBLUEBUTTON_MAX_IN_FLIGHT_REQUESTS"] = 1
+
+    with in_flight_limit(), pytest.raises(BigBlueButtonUnavailable):
+        BBB(meeting.meetingID).is_running()
+    assert send.call_count == 0
+
+    assert BBB(meeting.meetingID).is_running()
+    assert send.call_count == 1
+
+
+def test_attendees_wait_while_bbb_is_unavailable(client_app, meeting, bbb_down):
+    for _ in range(2):
+        assert "/meeting/wait/" in get_join_url(meeting, Role.attendee, "Alice")
+
+    assert "/meeting/wait/" in get_join_url(meeting, Role.attendee, "Alice")
+    assert bbb_down.call_count == 2
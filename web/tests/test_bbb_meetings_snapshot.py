@@ -0,0 +1,141 @@
+import time
+
+import requests
+from b3desk.tasks import celery
+
+GET_MEETINGS_RESPONSE = """
+<response>
+  <returncode>SUCCESS</returncode>
+  <meetings>
+    <meeting>
+      <meetingID>running-meeting</meetingID>
+      <createTime>1531241258036</createTime>
+      <running>true</running>
+      <participantCount>12</participantCount>
+      <moderatorCount>2</moderatorCount>
+    </meeting>
+    <meeting>
+      <meetingID>idle-meeting</meetingID>
+      <createTime>1531241258037</createTime>
+      <running>false</running>
+      <participantCount>0</participantCount>
+      <moderatorCount>0</moderatorCount>
+    </meeting>
+  </meetings>
+</response>
+"""
+
+
+IS_MEETING_RUNNING_RESPONSE = """
+<response>
+  <returncode>SUCCESS</returncode>
+  <running>true</running>
+</response>
+"""
+
+
+class Response:
+    text = ""
+
+    def __init__(self, content=GET_MEETINGS_RESPONSE):
+        self.content = content
+
+
+def test_get_meetings(client_app, mocker):
+    from b3desk.models.bbb import BBB
+
+    send = mocker.patch("requests.Session.send", return_value=Response())
+
+    assert BBB.get_meetings() == {
+        "running-meeting": {
+            "running": True,
+            "participantCount": 12,
+            "moderatorCount": 2,
+            "createTime": 1531241258036,
+        },
+        "idle-meeting": {
+            "running": False,
+            "participantCount": 0,
+            "moderatorCount": 0,
+            "createTime": 1531241258037,
+        },
+    }
+    assert "/getMeetings?" in send.call_args.args[0].url
+
+
+def test_is_running_is_answered_from_the_snapshot(client_app, mocker):
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import refresh_meetings_snapshot
+
+    send = mocker.patch("requests.Session.send", return_value=Response())
+    refresh_meetings_snapshot()
+    assert send.call_count == 1
+
+    assert BBB("running-meeting").is_running()
+    assert not BBB("idle-meeting").is_running()
+    assert not BBB("unknown-meeting").is_running()
+    assert BBB("running-meeting").get_meeting_state()["participantCount"] == "12"
+    assert BBB("unknown-meeting").get_meeting_state()["returncode"] == "FAILED"
+    assert send.call_count == 1
+
+
+def test_meeting_creation_does_not_trust_the_snapshot(client_app, meeting, mocker):
+    """A room created since the last snapshot is not created a second time."""
+    from b3desk.join import request_bbb_meeting_creation
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import refresh_meetings_snapshot
+
+    send = mocker.patch("requests.Session.send", return_value=Response())
+    refresh_meetings_snapshot()
+    assert not BBB(meeting.meetingID).is_running()
+
+    send.return_value = Response(IS_MEETING_RUNNING_RESPONSE)
+    assert not request_bbb_meeting_creation(meeting)
+    assert "/isMeetingRunning?" in send.call_args.args[0].url
+
+    assert BBB(meeting.meetingID).get_meeting_info()["running"] == "true"
+    assert "/getMeetingInfo?" in send.call_args.args[0].url
+
+
+def test_stale_snapshot_is_not_used(client_app, mocker):
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import refresh_meetings_snapshot
+
+    send = mocker.patch("requests.Session.send", return_value=Response())
+    refresh_meetings_snapshot()
+
+    max_age = client_app.app.config["BIGBLUEBUTTON_MEETINGS_SNAPSHOT_MAX_AGE"]
+    mocker.patch("b3desk.models.bbb.time.time", return_value=time.time() + max_age + 1)
+    send.return_value = Response(IS_MEETING_RUNNING_RESPONSE)
+    assert BBB("running-meeting").is_running()
+    assert send.call_count == 2
+    assert "/isMeetingRunning?" in send.call_args.args[0].url
+
+
+def test_ended_meeting_is_removed_from_the_snapshot(client_app, mocker):
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import refresh_meetings_snapshot
+
+    mocker.patch("requests.Session.send", return_value=Response())
+    refresh_meetings_snapshot()
+
+    BBB("running-meeting").end()
+    assert not BBB("running-meeting").is_running()
+
+
+def test_refresh_task_is_scheduled(client_app):
+    schedule = celery.conf.beat_schedule["refresh-meetings-snapshot"]
+    assert schedule["task"] == "refresh_meetings_snapshot"
+    assert (
+        schedule["schedule"]
+        == client_app.app.config["BIGBLUEBUTTON_MEETINGS_SNAPSHOT_INTERVAL"]
+    )
+
+
+def test_refresh_task_when_bbb_is_unavailable(client_app, mocker):
+    from b3desk.models.bbb import get_meetings_snapshot
+    from b3desk.tasks import refresh_meetings_snapshot
+
+    mocker.patch("requests.Session.send", side_effect=requests.Timeout("timeout"))
+    assert refresh_meetings_snapshot.delay().get() is False
+    assert get_meetings_snapshot() is None
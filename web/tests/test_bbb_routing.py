@@ -0,0 +1,232 @@
+import hashlib
+import re
+import threading
+import wsgiref.simple_server
+from urllib.parse import parse_qsl
+
+import portpicker
+import pytest
+from b3desk.models.roles import Role
+from joserfc import jwt
+from joserfc.jwk import OctKey
+
+RECORDING = """
+<recording>
+  <recordID>{record_id}</recordID>
+  <meetingID>{meeting_id}</meetingID>
+  <participants>2</participants>
+  <startTime>{start_time}</startTime>
+  <endTime>{start_time}</endTime>
+  <metadata><name>Recording</name></metadata>
+  <playback>
+    <format>
+      <type>presentation</type>
+      <url>https://bbb.test/playback/{record_id}</url>
+    </format>
+  </playback>
+</recording>
+"""
+
+
+class StubBBB:
+    """A minimal BBB server, keeping its meetings and recordings in memory."""
+
+    def __init__(self, secret):
+        self.secret = secret
+        self.endpoint = None
+        self.meetings = {}
+        self.recordings = []
+        self.actions = []
+
+    def respond(self, action, params):
+        if action == "create":
+            self.meetings.setdefault(params["meetingID"], 0)
+            return f"<meetingID>{params['meetingID']}</meetingID>"
+
+        if action == "isMeetingRunning":
+            return f"<running>{str(params['meetingID'] in self.meetings).lower()}</running>"
+
+        if action == "end":
+            self.meetings.pop(params["meetingID"], None)
+            return ""
+
+        if action == "getMeetings":
+            meetings = "".join(
+                f"<meeting><meetingID>{meeting_id}</meetingID><running>true</running>"
+                f"<participantCount>{count}</participantCount></meeting>"
+                for meeting_id, count in self.meetings.items()
+            )
+            return f"<meetings>{meetings}</meetings>"
+
+        if action == "getRecordings":
+            matching = [
+                recording
+                for recording in self.recordings
+                if params.get("meetingID", recording["meeting_id"])
+                == recording["meeting_id"]
+            ]
+            offset = int(params.get("offset", 0))
+            limit = int(params.get("limit", len(matching)))
+            recordings = "".join(
+                RECORDING.format(**recording)
+                for recording in matching[offset : offset + limit]
+            )
+            return f"<recordings>{recordings}</recordings>"
+
+        if action == "deleteRecordings":
+            before = len(self.recordings)
+            self.recordings = [
+                recording
+                for recording in self.recordings
+                if recording["record_id"] not in params["recordID"].split(",")
+            ]
+            return None if before == len(self.recordings) else "<deleted>true</deleted>"
+
+        return None
+
+    def __call__(self, environ, start_response):
+        action = environ["PATH_INFO"].rsplit("/", 1)[-1]
+        query = environ["QUERY_STRING"]
+        params = dict(parse_qsl(query))
+        unsigned_query = re.sub(r"&?checksum=[^&]*$", "", query)
+        checksum = hashlib.sha1(
+            f"{action}{unsigned_query}{self.secret}".encode()
+        ).hexdigest()
+        self.actions.append(action)
+
+        body = (
+            self.respond(action, params) if params.get("checksum") == checksum else None
+        )
+        returncode = "FAILED" if body is None else "SUCCESS"
+        start_response("200 OK", [("Content-Type", "text/xml")])
+        return [
+            f"<response><returncode>{returncode}</returncode>{body or ''}</response>".encode()
+        ]
+
+
+class QuietHandler(wsgiref.simple_server.WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_servers():
+    stubs, servers, threads = [], [], []
+    for secret in ("first-secret", "second-secret"):
+        stub = StubBBB(secret)
+        port = portpicker.pick_unused_port()
+        server = wsgiref.simple_server.make_server(
+            "localhost", port, stub, handler_class=QuietHandler
+        )
+        stub.endpoint = f"http://localhost:{port}/bigbluebutton/api"
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        stubs.append(stub)
+        servers.append(server)
+        threads.append(thread)
+
+    yield stubs
+
+    for server, thread in zip(servers, threads, strict=True):
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+@pytest.fixture
+def configuration(configuration, stub_servers):
+    configuration["BIGBLUEBUTTON_SERVERS"] = [
+        {"endpoint": stub.endpoint, "secret": stub.secret} for stub in stub_servers
+    ]
+    return configuration
+
+
+def test_rooms_are_placed_on_the_least_loaded_server(client_app, stub_servers):
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import refresh_meetings_snapshot
+
+    busy, idle = stub_servers
+    busy.meetings["busy-meeting"] = 50
+    refresh_meetings_snapshot()
+
+    bbb = BBB("new-meeting")
+    assert BBB.success(bbb.create(name="New meeting"))
+    assert "new-meeting" in idle.meetings
+    assert "create" not in busy.actions
+
+    join_url = bbb.prepare_request_to_join_bbb(Role.attendee, "Alice").url
+    assert join_url.startswith(idle.endpoint)
+
+    bbb.end()
+    assert "new-meeting" not in idle.meetings
+    assert "end" not in busy.actions
+
+
+def test_running_meetings_are_found_on_their_server(client_app, stub_servers):
+    from b3desk.models.bbb import BBB
+
+    first, second = stub_servers
+    second.meetings["running-meeting"] = 3
+
+    bbb = BBB("running-meeting")
+    assert bbb.is_running()
+    assert bbb.is_running()
+    assert first.actions == ["isMeetingRunning"]
+    assert second.actions == ["isMeetingRunning", "isMeetingRunning"]
+
+    join_url = bbb.prepare_request_to_join_bbb(Role.moderator, "Alice").url
+    assert join_url.startswith(second.endpoint)
+
+
+def test_recordings_are_fetched_from_every_server(client_app, stub_servers):
+    from b3desk.models.bbb import BBB
+
+    first, second = stub_servers
+    first.recordings.append(
+        {"record_id": "old", "meeting_id": "meeting", "start_time": 1530000000000}
+    )
+    second.recordings.append(
+        {"record_id": "new", "meeting_id": "meeting", "start_time": 1540000000000}
+    )
+    second.recordings.append(
+        {"record_id": "other", "meeting_id": "other", "start_time": 1540000000000}
+    )
+
+    bbb = BBB("meeting")
+    assert [recording["recordID"] for recording in bbb.get_recordings()] == [
+        "new",
+        "old",
+    ]
+    assert len(BBB.get_all_recordings()) == 3
+
+    first.actions.clear()
+    assert len(BBB.get_all_recordings(page_size=1)) == 3
+    assert first.actions == ["getRecordings", "getRecordings"]
+
+    assert BBB.success(bbb.delete_recordings("old"))
+    assert first.recordings == []
+    assert len(second.recordings) == 2
+
+    # A page of unparsable recordings does not end the paging
+    second.recordings.insert(
+        0, {"record_id": "malformed", "meeting_id": "meeting", "start_time": "?"}
+    )
+    second.actions.clear()
+    assert len(BBB.get_all_recordings(page_size=1)) == 2
+    assert second.actions == ["getRecordings"] * 4
+
+
+def test_callbacks_signed_by_any_server(client_app, meeting, stub_servers, mocker):
+    mocker.patch("b3desk.endpoints.bbb_callback.send_recording_notification")
+    key = OctKey.import_key(stub_servers[1].secret.encode())
+    signed_parameters = jwt.encode(
+        {"alg": "HS256"},
+        {"meeting_id": meeting.meetingID, "record_id": "recording"},
+        key,
+    )
+
+    client_app.post(
+        "/bbb-callback/recording_status",
+        {"signed_parameters": signed_parameters},
+        status=200,
+    )
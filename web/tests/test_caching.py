@@ -0,0 +1,97 @@
+import threading
+
+from b3desk import cache
+from b3desk.caching import coalesced
+from b3desk.caching import single_flight
+
+
+def test_coalesced_caches_results(client_app):
+    calls = []
+
+    @coalesced("test-coalesced", timeout=60)
+    def compute(value):
+        calls.append(value)
+        return value * 2
+
+    assert compute(2) == 4
+    assert compute(2) == 4
+    assert compute(3) == 6
+    assert calls == [2, 3]
+    assert cache.get("test-coalesced:2")["value"] == 4
+
+
+def test_coalesced_null_timeout_is_not_cached(client_app):
+    calls = []
+
+    @coalesced("test-coalesced", timeout=lambda value: 60 if value else 0)
+    def compute():
+        calls.append(True)
+        return ""
+
+    assert compute() == ""
+    assert compute() == ""
+    assert len(calls) == 2
+
+
+def test_coalesced_concurrent_callers_compute_once(client_app):
+    calls = []
+    computing = threading.Event()
+    release = threading.Event()
+
+    @coalesced("test-coalesced", timeout=60)
+    def compute():
+        calls.append(True)
+        computing.set()
+        release.wait(5)
+        return "value"
+
+    app = client_app.app
+    results = []
+
+    def call():
+        with app.app_context():
+            results.append(compute())
+
+    first = threading.Thread(target=call)
+    first.start()
+    computing.wait(5)
+    others = [threading.Thread(target=call) for _ in range(3)]
+    for thread in others:
+        thread.start()
+    release.set()
+    for thread in [first, *others]:
+        thread.join()
+
+    assert results == ["value"] * 4
+    assert len(calls) == 1
+
+
+def test_coalesced_early_recomputation(client_app, mocker):
+    calls = []
+
+    @coalesced("test-coalesced", timeout=60)
+    def compute():
+        calls.append(True)
+        return len(calls)
+
+    assert compute() == 1
+    assert compute() == 1
+
+    # The unlikeliest draw recomputes the value long before it expires
+    mocker.patch("b3desk.caching.random.random", return_value=0.999999)
+    cache.set("test-coalesced", {**cache.get("test-coalesced"), "delta": 10})
+    assert compute() == 2
+
+
+def test_single_flight_serves_stale_value_while_locked(client_app):
+    cache.set("test-lock", "another-caller")
+    assert (
+        single_flight("test-lock", lambda: "new", lambda: None, stale="stale")
+        == "stale"
+    )
+
+
+def test_single_flight_computes_when_the_lock_is_released(client_app):
+    cache.set("test-lock", "another-caller")
+    threading.Timer(0.1, cache.delete, ["test-lock"]).start()
+    assert single_flight("test-lock", lambda: "new", lambda: None) == "new"
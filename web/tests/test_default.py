@@ -87,6 +87,23 @@ def test_home__authenticated_user(client_app, mocker, authenticated_user):
     assert response.location == url_for("public.welcome")
 
 
+def test_meetings_stats_failures_are_not_cached(client_app, mocker):
+    from b3desk.endpoints.public import get_meetings_stats
+
+    client_app.app.config["STATS_URL"] = "https://stats.test/stats.csv"
+    client_app.app.config["STATS_INDEX"] = 0
+    response = mocker.Mock(status_code=500)
+    get = mocker.patch("requests.get", return_value=response)
+
+    assert get_meetings_stats() is None
+
+    response.status_code = 200
+    response.content = b"stats,12,3"
+    assert get_meetings_stats() == {"participantCount": 12, "runningCount": 3}
+    assert get_meetings_stats() == {"participantCount": 12, "runningCount": 3}
+    assert get.call_count == 2
+
+
 def test_change_language(app):
     """Test that language can be changed and persists in session."""
     client_app = TestApp(app)
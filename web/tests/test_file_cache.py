@@ -0,0 +1,80 @@
+import os
+
+from b3desk.file_cache import FileCache
+
+
+def store(cache, owner_id, nc_path, content, etag='"etag"'):
+    writer = cache.writer(owner_id, nc_path, etag=etag, content_type="text/plain")
+    writer.write(content)
+    writer.commit()
+
+
+def test_get_cached_file(tmp_path):
+    cache = FileCache(tmp_path, max_size=100)
+    assert cache.get(1, "file.txt") is None
+
+    store(cache, 1, "file.txt", b"content")
+    data_path, metadata = cache.get(1, "file.txt")
+    assert data_path.read_bytes() == b"content"
+    assert metadata["etag"] == '"etag"'
+    assert metadata["content_type"] == "text/plain"
+    assert cache.get(2, "file.txt") is None
+
+
+def test_new_versions_do_not_replace_the_content_being_read(tmp_path):
+    """A reader of the previous metadata still finds the matching content."""
+    cache = FileCache(tmp_path, max_size=100)
+    store(cache, 1, "file.txt", b"first", etag='"first"')
+    first_path, _ = cache.get(1, "file.txt")
+
+    store(cache, 1, "file.txt", b"second version", etag='"second"')
+    assert first_path.read_bytes() == b"first"
+    data_path, metadata = cache.get(1, "file.txt")
+    assert data_path.read_bytes() == b"second version"
+    assert metadata["etag"] == '"second"'
+
+
+def test_replaced_versions_are_evicted_first(tmp_path):
+    cache = FileCache(tmp_path, max_size=10)
+    store(cache, 1, "a.txt", b"aaaa")
+    store(cache, 1, "a.txt", b"AAAA")
+    store(cache, 1, "b.txt", b"bbbb")
+
+    assert cache.get(1, "a.txt")[0].read_bytes() == b"AAAA"
+    assert cache.get(1, "b.txt")
+    assert len(list(tmp_path.glob("*.data"))) == 2
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = FileCache(tmp_path, max_size=10)
+    store(cache, 1, "a.txt", b"aaaa")
+    store(cache, 1, "b.txt", b"bbbb")
+
+    # Make 'a.txt' older, then use it so it becomes the most recent
+    for data_path in tmp_path.glob("*.data"):
+        os.utime(data_path, (0, 0))
+    cache.get(1, "a.txt")
+
+    store(cache, 1, "c.txt", b"cccc")
+    assert cache.get(1, "a.txt")
+    assert cache.get(1, "b.txt") is None
+    assert cache.get(1, "c.txt")
+
+
+def test_files_too_large_are_not_cached(tmp_path):
+    cache = FileCache(tmp_path, max_size=4)
+    assert cache.writer(1, "file.txt", '"etag"', "text/plain", size=5) is None
+
+    store(cache, 1, "file.txt", b"12345")
+    assert cache.get(1, "file.txt") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_aborted_files_are_not_cached(tmp_path):
+    cache = FileCache(tmp_path, max_size=100)
+    writer = cache.writer(1, "file.txt", etag='"etag"', content_type="text/plain")
+    writer.write(b"partial")
+    writer.abort()
+
+    assert cache.get(1, "file.txt") is None
+    assert not list(tmp_path.iterdir())
@@ -290,6 +290,52 @@ def test_can_use_ai_summary_falls_back_to_config_when_group_has_none(
     assert user.can_use_ai_summary is True
 
 
+def test_permissions_are_refreshed_when_group_flags_change(client_app, user, group_3):
+    from b3desk.models import db
+
+    client_app.app.config["ENABLE_SIP"] = True
+    user.groups.append(group_3)
+    db.session.commit()
+    assert user.enable_sip is None
+    assert user.can_use_sip is True
+
+    group_3.enable_sip = False
+    db.session.commit()
+    assert user.enable_sip is False
+    assert user.can_use_sip is False
+
+
+def test_permissions_are_refreshed_when_group_is_deleted(
+    client_app, user, group, group_2
+):
+    from b3desk.models import db
+
+    user.groups = [group, group_2]
+    db.session.commit()
+    assert user.can_use_sip is True
+
+    db.session.delete(group)
+    db.session.commit()
+    assert user.enable_sip is False
+    assert user.can_use_sip is False
+
+
+def test_permissions_checks_do_not_load_groups(client_app, user, group):
+    from b3desk.models import db
+    from b3desk.models.users import User
+
+    user.groups.append(group)
+    db.session.commit()
+    user_id = user.id
+    db.session.expunge_all()
+
+    user = db.session.get(User, user_id)
+    assert user.can_use_sip is True
+    assert user.can_use_file_sharing is True
+    assert user.can_use_ai_summary is True
+    assert "groups" not in db.inspect(user).dict
+
+
 @pytest.fixture()
 def mock_meeting_is_not_running(mocker):
     """Mock meeting.bbb.is_running() to return False."""
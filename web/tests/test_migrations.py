@@ -18,3 +18,20 @@ def test_create_favorite_table(app, user, meeting):
     with app.app_context():
         downgrade(directory=MIGRATIONS_DIR, revision="a1b2c3d4e5f6")
         upgrade(directory=MIGRATIONS_DIR)
+
+
+def test_backfill_user_permissions(app, user, user_2, group, group_2, group_3):
+    """Test the permissions granted by groups are computed for existing users."""
+    from b3desk.models import db
+
+    user.groups = [group_2, group_3]
+    user_2.groups = [group_2]
+    db.session.commit()
+
+    with app.app_context():
+        downgrade(directory=MIGRATIONS_DIR, revision="b81f0c7e4d29")
+        upgrade(directory=MIGRATIONS_DIR)
+
+    db.session.expire_all()
+    assert user.enable_sip is None
+    assert user_2.enable_sip is False
@@ -1,8 +1,12 @@
 import shutil
 from datetime import date
+from datetime import datetime
+from datetime import timedelta
 from pathlib import Path
 
+import pytest
 from b3desk import cache
+from b3desk import nextcloud
 from b3desk.models import db
 from b3desk.models.meetings import MeetingFiles
 from b3desk.nextcloud import WebDAVClient
@@ -26,7 +30,7 @@ def test_check_connection_success(client_app, user, mocker):
     db.session.add(user)
     db.session.commit()
 
-    mocker.patch("webdav3.client.Client.list")
+    mocker.patch("b3desk.nextcloud.WebDAVClient.probe")
 
     result = is_nextcloud_available(user, verify=True)
 
@@ -54,7 +58,7 @@ def test_check_connection_webdav_error(client_app, user, mocker):
     db.session.add(user)
     db.session.commit()
 
-    mocker.patch("webdav3.client.Client.list", side_effect=WebDavException)
+    mocker.patch("b3desk.nextcloud.WebDAVClient.probe", side_effect=WebDavException)
 
     result = is_nextcloud_available(user, verify=True)
 
@@ -72,7 +76,8 @@ def test_check_connection_marks_unavailable_on_connection_error(
     db.session.commit()
 
     mocker.patch(
-        "webdav3.client.Client.list", side_effect=NoConnection("nextcloud.test")
+        "b3desk.nextcloud.WebDAVClient.probe",
+        side_effect=NoConnection("nextcloud.test"),
     )
 
     result = is_nextcloud_available(user, verify=True)
@@ -93,7 +98,7 @@ def test_check_connection_retry_refreshes_credentials(client_app, user, mocker):
     update_mock = mocker.patch(
         "b3desk.nextcloud.update_user_nc_credentials", return_value=True
     )
-    mocker.patch("webdav3.client.Client.list")
+    mocker.patch("b3desk.nextcloud.WebDAVClient.probe")
 
     def set_credentials(user, force_renew=False):
         user.nc_login = "alice"
@@ -130,7 +135,8 @@ def test_check_connection_no_retry_on_unavailable_error(client_app, user, mocker
     db.session.commit()
 
     mocker.patch(
-        "webdav3.client.Client.list", side_effect=NoConnection("nextcloud.test")
+        "b3desk.nextcloud.WebDAVClient.probe",
+        side_effect=NoConnection("nextcloud.test"),
     )
     update_mock = mocker.patch("b3desk.nextcloud.update_user_nc_credentials")
 
@@ -188,12 +194,12 @@ def test_check_connection_skips_when_user_auth_blocked(client_app, user, mocker)
 
     user_auth_breaker.mark_failed(user.id)
 
-    list_mock = mocker.patch("webdav3.client.Client.list")
+    probe_mock = mocker.patch("b3desk.nextcloud.WebDAVClient.probe")
 
     result = is_nextcloud_available(user, verify=True)
 
     assert result is False
-    list_mock.assert_not_called()
+    probe_mock.assert_not_called()
 
 
 def test_check_connection_marks_user_on_auth_error_after_retry(
@@ -207,7 +213,7 @@ def test_check_connection_marks_user_on_auth_error_after_retry(
     db.session.commit()
 
     mocker.patch(
-        "webdav3.client.Client.list",
+        "b3desk.nextcloud.WebDAVClient.probe",
         side_effect=ResponseErrorCode("http://test", 401, "Unauthorized"),
     )
     mocker.patch("b3desk.nextcloud.update_user_nc_credentials", return_value=True)
@@ -230,7 +236,7 @@ def test_check_connection_clears_backoff_on_success(app, client_app, user, mocke
     user_auth_breaker.mark_failed(user.id)
     assert user_auth_breaker.is_blocked(user.id) is True
 
-    mocker.patch("webdav3.client.Client.list")
+    mocker.patch("b3desk.nextcloud.WebDAVClient.probe")
 
     user_auth_breaker.clear(user.id)
 
@@ -241,6 +247,47 @@ def test_check_connection_clears_backoff_on_success(app, client_app, user, mocke
         assert cache.get(f"nc_auth_failed:{user.id}") is None
 
 
+def test_check_connection_probes_the_root_without_listing_it(
+    client_app, user, nextcloud_credentials, mocker
+):
+    """Connection check sends a depth 0 PROPFIND to the real server."""
+    user.nc_login = nextcloud_credentials["nclogin"]
+    user.nc_locator = nextcloud_credentials["nclocator"]
+    user.nc_token = nextcloud_credentials["nctoken"]
+    db.session.add(user)
+    db.session.commit()
+
+    request = mocker.spy(WebDAVClient, "execute_request")
+    list_mock = mocker.patch("webdav3.client.Client.list")
+
+    assert is_nextcloud_available(user, verify=True) is True
+    list_mock.assert_not_called()
+    assert request.call_args.kwargs["headers_ext"][0] == "Depth: 0"
+
+
+def test_check_connection_success_is_cached(app, client_app, user, mocker):
+    """Successful connection checks are cached, but breakers still apply."""
+    client_app.app.config["NC_AVAILABILITY_CACHE_DURATION"] = 60
+    user.nc_login = "alice"
+    user.nc_locator = "http://nextcloud.test"
+    user.nc_token = "token123"
+    db.session.add(user)
+    db.session.commit()
+
+    probe_mock = mocker.patch("b3desk.nextcloud.WebDAVClient.probe")
+
+    assert is_nextcloud_available(user, verify=True) is True
+    assert is_nextcloud_available(user, verify=True) is True
+    assert probe_mock.call_count == 1
+
+    nextcloud_breaker.mark_failed(user.nc_locator)
+    assert is_nextcloud_available(user, verify=True) is False
+
+    user.nc_locator = "http://other-nextcloud.test"
+    assert is_nextcloud_available(user, verify=True) is True
+    assert probe_mock.call_count == 2
+
+
 def test_update_credentials_marks_blocked_on_failure(app, client_app, user, mocker):
     """Credentials fetch failure marks user in backoff."""
     user.nc_login = None
@@ -383,10 +430,10 @@ def test_webdav_error_handler_html_branch(
     db.session.commit()
 
     class FakeClient:
-        def list(self):
-            return []
+        def probe(self):
+            pass
 
-        def download_sync(self, remote_path, local_path):
+        def open_download(self, remote_path, headers=None):
             raise NoConnection("nextcloud.test")
 
     mocker.patch("b3desk.nextcloud.WebDAVClient", return_value=FakeClient())
@@ -434,3 +481,256 @@ def test_webdav_client_with_spaces_in_username(client_app, webdav_server):
         assert info["name"] == "test.txt"
     finally:
         shutil.rmtree(user_dir)
+
+
+def webdav_client():
+    return WebDAVClient(
+        {
+            "webdav_hostname": "https://nextcloud.test",
+            "webdav_root": "/remote.php/dav/files/alice/",
+            "webdav_token": "fake",
+        }
+    )
+
+
+def test_upload_chunked(client_app, mocker, tmp_path):
+    """Large files are sent in parallel chunks then assembled by Nextcloud."""
+
+    class Response:
+        status_code = 201
+        content = b""
+
+    request = mocker.patch("requests.Session.request", return_value=Response())
+    local_path = tmp_path / "file.pdf"
+    local_path.write_bytes(b"0123456789")
+    progress = mocker.Mock()
+
+    client = webdav_client()
+    client.upload_chunked(
+        "visio-agents/file.pdf",
+        local_path,
+        chunk_size=4,
+        parallelism=2,
+        progress=progress,
+    )
+
+    calls = [call.kwargs for call in request.call_args_list]
+    assert [call["method"] for call in calls] == ["MKCOL", "PUT", "PUT", "PUT", "MOVE"]
+    upload_url = calls[0]["url"]
+    assert upload_url.startswith("https://nextcloud.test/remote.php/dav/uploads/alice/")
+    assert "//" not in upload_url.removeprefix("https://")
+    assert sorted((call["url"], call["data"]) for call in calls[1:4]) == [
+        (f"{upload_url}/00001", b"0123"),
+        (f"{upload_url}/00002", b"4567"),
+        (f"{upload_url}/00003", b"89"),
+    ]
+    assert calls[4]["url"] == f"{upload_url}/.file"
+    for call in calls:
+        assert call["headers"]["Authorization"] == "Bearer fake"
+        assert (
+            call["headers"]["Destination"]
+            == "https://nextcloud.test/remote.php/dav/files/alice/visio-agents/file.pdf"
+        )
+        assert call["headers"]["OC-Total-Length"] == "10"
+    assert progress.call_args.args == (10, 10)
+
+
+def test_upload_chunked_failure_removes_the_chunks(client_app, mocker, tmp_path):
+    class Response:
+        content = b""
+
+        def __init__(self, status_code):
+            self.status_code = status_code
+
+    def request(method, url, **kwargs):
+        return Response(500 if method == "MOVE" else 201)
+
+    session_request = mocker.patch("requests.Session.request", side_effect=request)
+    local_path = tmp_path / "file.pdf"
+    local_path.write_bytes(b"0123456789")
+
+    client = webdav_client()
+    with pytest.raises(ResponseErrorCode):
+        client.upload_chunked("file.pdf", local_path, chunk_size=4, parallelism=2)
+
+    assert session_request.call_args.kwargs["method"] == "DELETE"
+    assert (
+        session_request.call_args.kwargs["url"]
+        == session_request.call_args_list[0].kwargs["url"]
+    )
+
+
+def test_upload_chunked_without_chunking_support(client_app, mocker, tmp_path):
+    """Servers without chunked uploads get a single PUT."""
+
+    class Response:
+        status_code = 405
+        content = b""
+
+    mocker.patch("requests.Session.request", return_value=Response())
+    upload_sync = mocker.patch("b3desk.nextcloud.WebDAVClient.upload_sync")
+    local_path = tmp_path / "file.pdf"
+    local_path.write_bytes(b"0123456789")
+
+    webdav_client().upload_chunked("file.pdf", local_path, chunk_size=4, parallelism=2)
+
+    upload_sync.assert_called_once_with(
+        remote_path="file.pdf", local_path=local_path, progress=None
+    )
+
+
+def test_upload_chunked_small_file(client_app, mocker, tmp_path):
+    request = mocker.patch("requests.Session.request")
+    upload_sync = mocker.patch("b3desk.nextcloud.WebDAVClient.upload_sync")
+    local_path = tmp_path / "file.pdf"
+    local_path.write_bytes(b"0123456789")
+
+    webdav_client().upload_chunked("file.pdf", local_path, chunk_size=10, parallelism=2)
+
+    upload_sync.assert_called_once()
+    request.assert_not_called()
+
+
+def create_enrolled_user(email, enrolled_days_ago, **kwargs):
+    from b3desk.models.users import User
+
+    user = User(
+        email=email,
+        preferred_username=email.split("@")[0],
+        nc_login="login",
+        nc_locator="http://nextcloud.test",
+        nc_token="old-token",
+        nc_last_auto_enroll=datetime.now() - timedelta(days=enrolled_days_ago),
+        **kwargs,
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def test_renew_expiring_nc_credentials(client_app, mocker, nextcloud_credentials):
+    """Credentials about to expire are renewed batch by batch."""
+    from b3desk.tasks import renew_nc_credentials
+
+    client_app.app.config["NC_LOGIN_TIMEDELTA_DAYS"] = 30
+    client_app.app.config["NC_CREDENTIALS_RENEWAL_MARGIN_DAYS"] = 2
+    client_app.app.config["NC_CREDENTIALS_RENEWAL_BATCH_SIZE"] = 1
+
+    expiring = create_enrolled_user("expiring@domain.test", 29)
+    expired = create_enrolled_user("expired@domain.test", 40)
+    failing = create_enrolled_user("failing@domain.test", 50)
+    fresh = create_enrolled_user("fresh@domain.test", 10)
+    disabled = create_enrolled_user(
+        "disabled@domain.test", 40, enable_file_sharing=False
+    )
+
+    def credentials_request(url, payload, headers):
+        if payload["username"] == "failing":
+            return {"error": "unknown user"}
+        return nextcloud_credentials
+
+    mocker.patch(
+        "b3desk.nextcloud.make_nextcloud_credentials_request",
+        side_effect=credentials_request,
+    )
+    mark_failed = mocker.spy(credentials_breaker, "mark_failed")
+
+    assert renew_nc_credentials.delay().get() == 2
+
+    for user in (expiring, expired, failing, fresh, disabled):
+        db.session.refresh(user)
+    assert expiring.nc_token == nextcloud_credentials["nctoken"]
+    assert expired.nc_token == nextcloud_credentials["nctoken"]
+    assert failing.nc_token == "old-token"
+    assert fresh.nc_token == "old-token"
+    assert disabled.nc_token == "old-token"
+    mark_failed.assert_called_once_with(failing.id)
+
+
+def test_renewal_resolves_usernames_in_bulk(client_app, mocker, nextcloud_credentials):
+    """Usernames of a batch are resolved together by the secondary identity provider."""
+    client_app.app.config["SECONDARY_IDENTITY_PROVIDER_ENABLED"] = True
+    create_enrolled_user("alice@domain.test", 40)
+    create_enrolled_user("bob@domain.test", 40)
+    failing = create_enrolled_user("carol@domain.test", 40)
+
+    # Bob is unknown to the identity provider, Carol's lookup failed
+    resolve = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_ids_from_emails",
+        return_value={"alice@domain.test": "alice-nextcloud", "bob@domain.test": None},
+    )
+    single_lookup = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_id_from_email"
+    )
+    credentials_request = mocker.patch(
+        "b3desk.nextcloud.make_nextcloud_credentials_request",
+        return_value=nextcloud_credentials,
+    )
+    worker_request = mocker.spy(nextcloud, "request_nc_credentials")
+
+    assert nextcloud.renew_expiring_nc_credentials() == 2
+    # The worker threads never get ORM instances
+    assert sorted(call.args for call in worker_request.call_args_list) == [
+        ("alice-nextcloud",),
+        ("bob",),
+    ]
+    resolve.assert_called_once_with(
+        ["alice@domain.test", "bob@domain.test", "carol@domain.test"]
+    )
+    single_lookup.assert_not_called()
+    assert sorted(
+        call.args[1]["username"] for call in credentials_request.call_args_list
+    ) == ["alice-nextcloud", "bob"]
+    assert failing.nc_token == "old-token"
+
+
+def test_login_renews_credentials_the_background_task_missed(client_app, mocker):
+    """Logging in only renews credentials the periodic task let expire."""
+    from b3desk.models.users import get_or_create_user
+
+    user = create_enrolled_user("alice@domain.test", 1)
+    user_info = {
+        "given_name": "Alice",
+        "family_name": "Cooper",
+        "preferred_username": "alice",
+        "email": "alice@domain.test",
+    }
+    credentials_request = mocker.spy(nextcloud, "get_user_nc_credentials")
+
+    get_or_create_user(user_info)
+    credentials_request.assert_not_called()
+    assert user.nc_token == "old-token"
+
+    user.nc_last_auto_enroll = datetime.now() - timedelta(days=40)
+    get_or_create_user(user_info)
+    credentials_request.assert_called_once()
+    assert user.nc_token != "old-token"
+
+
+def test_renewal_task_is_scheduled(client_app):
+    from b3desk.tasks import celery
+
+    schedule = celery.conf.beat_schedule["renew-nc-credentials"]
+    assert schedule["task"] == "renew_nc_credentials"
+    assert (
+        schedule["schedule"] == client_app.app.config["NC_CREDENTIALS_RENEWAL_INTERVAL"]
+    )
+
+
+@pytest.mark.parametrize(
+    "nc_locator", ["https://nextcloud.test", "https://nextcloud.test/nextcloud/"]
+)
+def test_listed_paths_are_relative_to_the_account_root(nc_locator):
+    client = WebDAVClient(
+        {
+            "webdav_hostname": nc_locator,
+            "webdav_root": "/remote.php/dav/files/alice/",
+            "webdav_token": "token",
+        }
+    )
+    prefix = nc_locator.removeprefix("https://nextcloud.test").rstrip("/")
+    root = f"{prefix}/remote.php/dav/files/alice"
+
+    assert client.get_relative_path(f"{root}/") == ""
+    assert client.get_relative_path(f"{root}/folder/") == "folder"
+    assert client.get_relative_path(f"{root}/folder/file 1.pdf") == "folder/file 1.pdf"
@@ -0,0 +1,104 @@
+"""Check that the hot lookup queries are answered with an index."""
+
+from datetime import datetime
+
+import pytest
+from b3desk.models import db
+from b3desk.models.meetings import Meeting
+from b3desk.models.meetings import MeetingAccess
+from b3desk.models.meetings import MeetingFiles
+from b3desk.models.meetings import PreviousVoiceBridge
+from b3desk.models.users import User
+
+
+def explain(query):
+    """Return the query plan of a query, as a single string."""
+    connection = db.session.connection()
+    statement = query.statement.compile(dialect=connection.dialect)
+    if connection.dialect.name == "postgresql":
+        # The test tables are too small for the planner to choose an index
+        # unless sequential scans are discouraged.
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", statement.params)
+    else:
+        params = tuple(statement.params[name] for name in statement.positiontup)
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params)
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def assert_index_scan(query, index_name):
+    plan = explain(query)
+    assert index_name in plan, plan
+    assert "Seq Scan" not in plan, plan
+
+
+@pytest.mark.parametrize(
+    "query,index_name",
+    [
+        pytest.param(
+            lambda: db.session.query(User).filter(User.email == "alice@domain.tld"),
+            "user_email_key",
+            id="user_by_email",
+        ),
+        pytest.param(
+            lambda: db.session.query(Meeting).filter(
+                Meeting.is_shadow, Meeting.owner_id == 1
+            ),
+            "ix_meeting_owner_id",
+            id="shadow_meeting_by_owner",
+        ),
+        pytest.param(
+            lambda: db.session.query(Meeting).filter(
+                Meeting.last_connection_utc_datetime < datetime(2025, 1, 1),
+                Meeting.is_shadow,
+            ),
+            "ix_meeting_shadow_last_connection_utc_datetime",
+            id="old_shadow_meetings",
+        ),
+        pytest.param(
+            lambda: db.session.query(MeetingFiles).filter(MeetingFiles.meeting_id == 1),
+            "ix_meeting_files_meeting_id",
+            id="files_by_meeting",
+        ),
+        pytest.param(
+            lambda: db.session.query(MeetingAccess).filter(
+                MeetingAccess.meeting_id == 1
+            ),
+            "ix_meeting_access_meeting_id",
+            id="access_by_meeting",
+        ),
+        pytest.param(
+            lambda: db.session.query(PreviousVoiceBridge).filter(
+                PreviousVoiceBridge.archived_at < datetime(2025, 1, 1)
+            ),
+            "ix_previous_voice_bridge_archived_at",
+            id="old_voice_bridges",
+        ),
+    ],
+)
+def test_lookup_uses_index(client_app, query, index_name):
+    if index_name == "user_email_key" and db.engine.dialect.name != "postgresql":
+        index_name = "sqlite_autoindex_user_1"
+    assert_index_scan(query(), index_name)
+
+
+@pytest.mark.parametrize(
+    "query,index_name",
+    [
+        pytest.param(
+            lambda: db.session.query(User).filter(User.email.ilike("%alice%")),
+            "ix_user_email_trgm",
+            id="user_search",
+        ),
+        pytest.param(
+            lambda: db.session.query(Meeting).filter(Meeting.name.ilike("%alice%")),
+            "ix_meeting_name_trgm",
+            id="meeting_search",
+        ),
+    ],
+)
+def test_search_uses_trigram_index(client_app, query, index_name):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("Trigram indexes are specific to PostgreSQL")
+
+    assert_index_scan(query(), index_name)
@@ -14,8 +14,8 @@ def _mock_recording(mocker, playbacks):
     from b3desk.models.bbb import BBB
 
     return mocker.patch.object(
-        BBB.get_recordings,
-        "uncached",
+        BBB,
+        "get_recordings",
         return_value=[
             {
                 "playbacks": playbacks,
@@ -40,7 +40,7 @@ def test_no_recording(client_app, meeting, smtpd, mocker):
     """If BBB returns no recording at task time, skip silently."""
     from b3desk.models.bbb import BBB
 
-    mocker.patch.object(BBB.get_recordings, "uncached", return_value=[])
+    mocker.patch.object(BBB, "get_recordings", return_value=[])
     send_recording_notification(
         meeting_id=meeting.id, bbb_recording_id="unknown", is_min_deadline=True
     )
@@ -51,9 +51,7 @@ def test_unexpected_structure(client_app, meeting, smtpd, mocker):
     """If BBB returns a recording with an unexpected shape, skip silently."""
     from b3desk.models.bbb import BBB
 
-    mocker.patch.object(
-        BBB.get_recordings, "uncached", return_value=[{"unexpected": "shape"}]
-    )
+    mocker.patch.object(BBB, "get_recordings", return_value=[{"unexpected": "shape"}])
     send_recording_notification(
         meeting_id=meeting.id, bbb_recording_id="unknown", is_min_deadline=True
     )
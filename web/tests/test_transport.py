@@ -0,0 +1,184 @@
+import threading
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+from b3desk.commands import bp
+from b3desk.transport import KeyedPooledTransport
+from b3desk.transport import PooledTransport
+from b3desk.transport import pool_statistics
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"<response><returncode>SUCCESS</returncode></response>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def keepalive_server():
+    server = ThreadingHTTPServer(("localhost", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        yield f"http://localhost:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def test_session_is_reused():
+    transport = PooledTransport("test-reuse")
+    assert transport.session() is transport.session()
+
+
+def test_session_is_rebuilt_after_fork(mocker):
+    transport = PooledTransport("test-fork")
+    session = transport.session()
+    close = mocker.patch.object(session, "close")
+
+    mocker.patch("b3desk.transport.os.getpid", return_value=-1)
+    assert transport.session() is not session
+    close.assert_not_called()
+
+
+def test_session_is_rebuilt_after_keepalive(mocker):
+    transport = PooledTransport("test-keepalive")
+    monotonic = mocker.patch("b3desk.transport.time.monotonic", return_value=100)
+    session = transport.session(keepalive=10)
+    assert transport.session(keepalive=10) is session
+    close = mocker.patch.object(session, "close")
+
+    monotonic.return_value = 200
+    assert transport.session(keepalive=10) is not session
+    # Another thread may still be sending a request with the idle session
+    close.assert_not_called()
+
+
+def test_connections_are_kept_alive(keepalive_server):
+    transport = PooledTransport("test-stats")
+    session = transport.session()
+    session.get(keepalive_server)
+    session.get(keepalive_server)
+    session.get(keepalive_server)
+
+    statistics = pool_statistics()["test-stats"]
+    assert statistics["requests"] == 3
+    assert statistics["new_connections"] == 1
+    assert statistics["hits"] == 2
+
+
+def test_statistics_are_counted_from_several_threads(keepalive_server):
+    transport = PooledTransport("test-stats-threads")
+    session = transport.session(pool_size=4)
+
+    def get():
+        for _ in range(10):
+            session.get(keepalive_server)
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    statistics = pool_statistics()["test-stats-threads"]
+    assert statistics["requests"] == 40
+    assert statistics["hits"] == 40 - statistics["new_connections"]
+
+
+def test_bbb_requests_use_the_pooled_session(meeting, bbb_response, mocker):
+    from b3desk.models.bbb import BBB
+    from b3desk.models.bbb import bbb_transport
+
+    build_session = mocker.spy(bbb_transport, "_build_session")
+    bbb_transport.reset()
+
+    BBB(meeting.meetingID).is_running()
+    BBB(meeting.meetingID).end()
+
+    assert bbb_response.call_count == 2
+    assert build_session.call_count == 1
+
+
+def test_keyed_sessions_are_reused(keepalive_server):
+    transport = KeyedPooledTransport("test-keyed")
+    session = transport.session("alice")
+    assert transport.session("alice") is session
+    assert transport.session("bob") is not session
+
+    session.get(keepalive_server)
+    transport.session("alice").get(keepalive_server)
+    statistics = pool_statistics()["test-keyed"]
+    assert statistics["new_connections"] == 1
+    assert statistics["hits"] == 1
+
+
+def test_keyed_sessions_are_bounded(mocker):
+    transport = KeyedPooledTransport("test-keyed-bounded")
+    alice = transport.session("alice", max_size=2)
+    bob = transport.session("bob", max_size=2)
+    close_alice = mocker.patch.object(alice, "close")
+    close_bob = mocker.patch.object(bob, "close")
+
+    transport.session("alice", max_size=2)
+    transport.session("charlie", max_size=2)
+    assert len(transport) == 2
+    assert transport.session("bob", max_size=2) is not bob
+    close_bob.assert_not_called()
+    close_alice.assert_not_called()
+
+
+def test_idle_keyed_sessions_are_dropped(mocker):
+    transport = KeyedPooledTransport("test-keyed-idle")
+    monotonic = mocker.patch("b3desk.transport.time.monotonic", return_value=100)
+    alice = transport.session("alice", keepalive=10)
+    close_alice = mocker.patch.object(alice, "close")
+
+    monotonic.return_value = 200
+    transport.session("bob", keepalive=10)
+    assert transport.session("alice", keepalive=10) is not alice
+    close_alice.assert_not_called()
+
+
+def test_keyed_sessions_are_dropped_after_fork(mocker):
+    transport = KeyedPooledTransport("test-keyed-fork")
+    session = transport.session("alice")
+    close = mocker.patch.object(session, "close")
+
+    mocker.patch("b3desk.transport.os.getpid", return_value=-1)
+    assert transport.session("alice") is not session
+    close.assert_not_called()
+
+
+def test_webdav_clients_share_the_session_of_an_account(client_app, user):
+    from b3desk.nextcloud import create_webdav_client
+
+    user.nc_login = "alice"
+    user.nc_locator = "http://nextcloud.test"
+    user.nc_token = "token"
+    first_client = create_webdav_client(user)
+    second_client = create_webdav_client(user)
+    assert first_client is not second_client
+    assert first_client.session is second_client.session
+
+    user.nc_login = "bob"
+    assert create_webdav_client(user).session is not first_client.session
+
+
+def test_admin_http_pools_statistics(cli_runner, client_app, authenticated_user):
+    cli_runner.invoke(bp.cli, ["user-to-admin", "alice@domain.tld"])
+    response = client_app.get("/admin/http-pools", status=200)
+    assert "bigbluebutton" in response.json
+
+
+def test_user_cannot_read_http_pools_statistics(client_app, authenticated_user):
+    client_app.get("/admin/http-pools", status=403)
@@ -1,4 +1,6 @@
 from datetime import date
+from datetime import datetime
+from datetime import timedelta
 
 import pytest
 import requests
@@ -8,6 +10,7 @@ from b3desk.models.users import get_or_create_user
 from b3desk.nextcloud import NoUserFound
 from b3desk.nextcloud import TooManyUsers
 from b3desk.nextcloud import get_secondary_identity_provider_id_from_email
+from b3desk.nextcloud import get_secondary_identity_provider_ids_from_emails
 from b3desk.nextcloud import get_user_nc_credentials
 from b3desk.nextcloud import make_nextcloud_credentials_request
 from time_machine import travel
@@ -210,3 +213,232 @@ def test_get_user_nc_credentials_with_nextcloud_credentials_request_failed(
     assert (
         f"Cannot contact NC {client_app.app.config['NC_LOGIN_API_URL']}, returning error {ncresponse['error']}"
     ) in caplog.text
+
+
+@pytest.fixture
+def user_cache(client_app):
+    from b3desk.models.users import resolved_users
+
+    client_app.app.config["USER_CACHE_TIMEOUT"] = 60
+    resolved_users.clear()
+    yield
+    resolved_users.clear()
+
+
+def test_get_session_user_is_cached(client_app, user_cache, mocker):
+    from b3desk.models import users
+
+    user_info = {
+        "sub": "alice-sub",
+        "given_name": "Alice",
+        "family_name": "Cooper",
+        "preferred_username": "alice",
+        "email": "alice@mydomain.test",
+    }
+    get_or_create_user = mocker.spy(users, "get_or_create_user")
+    commit = mocker.spy(db.session, "commit")
+
+    user = users.get_session_user(user_info)
+    assert get_or_create_user.call_count == 1
+    commit_count = commit.call_count
+
+    assert users.get_session_user(user_info).id == user.id
+    assert get_or_create_user.call_count == 1
+    assert commit.call_count == commit_count
+
+
+def test_get_session_user_changed_claims(client_app, user_cache):
+    from b3desk.models.users import get_session_user
+
+    user_info = {
+        "sub": "alice-sub",
+        "given_name": "Alice",
+        "family_name": "Cooper",
+        "preferred_username": "alice",
+        "email": "alice@mydomain.test",
+    }
+    get_session_user(user_info)
+
+    user = get_session_user({**user_info, "family_name": "Keys"})
+    assert user.family_name == "Keys"
+    assert db.session.get(User, user.id).family_name == "Keys"
+
+
+def test_get_session_user_day_boundary(client_app, user_cache, mocker):
+    from b3desk.models import users
+
+    user_info = {
+        "sub": "alice-sub",
+        "given_name": "Alice",
+        "family_name": "Cooper",
+        "preferred_username": "alice",
+        "email": "alice@mydomain.test",
+    }
+    with travel("2025-01-01 23:59:50"):
+        users.get_session_user(user_info)
+
+    get_or_create_user = mocker.spy(users, "get_or_create_user")
+    with travel("2025-01-02 00:00:10"):
+        user = users.get_session_user(user_info)
+
+    assert get_or_create_user.call_count == 1
+    assert user.last_connection_utc_datetime.date() == date(2025, 1, 2)
+
+
+class ExpiringToken:
+    def raise_for_status():
+        pass
+
+    def json():
+        return {"access_token": "valid_token", "expires_in": 300}
+
+
+class UsersAnswer:
+    def __init__(self, users):
+        self.users = users
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.users
+
+
+def users_by_email(email, access_token):
+    assert access_token == "valid_token"
+    return UsersAnswer(
+        {
+            "alice@rock.test": [{"username": "alice"}],
+            "bob@rock.test": [{"username": "bob"}],
+            "twins@rock.test": [{"username": "twin1"}, {"username": "twin2"}],
+        }.get(email, [])
+    )
+
+
+def test_secondary_identity_provider_token_is_cached(client_app, mocker):
+    """The access token is only requested again shortly before it expires."""
+    token_request = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_token",
+        return_value=ExpiringToken,
+    )
+    mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_users_from_email",
+        side_effect=users_by_email,
+    )
+
+    assert get_secondary_identity_provider_id_from_email("alice@rock.test") == "alice"
+    assert get_secondary_identity_provider_id_from_email("bob@rock.test") == "bob"
+    assert token_request.call_count == 1
+
+    with travel(datetime.now() + timedelta(seconds=280)):
+        get_secondary_identity_provider_id_from_email("alice@rock.test")
+    assert token_request.call_count == 2
+
+
+def test_secondary_identity_provider_ids_from_emails(client_app, mocker):
+    """Several emails are resolved with a single token."""
+    token_request = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_token",
+        return_value=ExpiringToken,
+    )
+    users_request = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_users_from_email",
+        side_effect=users_by_email,
+    )
+
+    usernames = get_secondary_identity_provider_ids_from_emails(
+        [
+            "alice@rock.test",
+            "bob@rock.test",
+            "twins@rock.test",
+            "nobody@rock.test",
+            "alice@rock.test",
+        ]
+    )
+
+    assert usernames == {
+        "alice@rock.test": "alice",
+        "bob@rock.test": "bob",
+        "twins@rock.test": None,
+        "nobody@rock.test": None,
+    }
+    assert token_request.call_count == 1
+    assert users_request.call_count == 4
+
+
+class RevokedToken:
+    def raise_for_status():
+        pass
+
+    def json():
+        return {"access_token": "revoked_token", "expires_in": 300}
+
+
+def revoked_token_users_by_email(email, access_token):
+    if access_token != "revoked_token":
+        return users_by_email(email, access_token)
+
+    response = requests.Response()
+    response.status_code = 401
+
+    class RevokedAnswer:
+        text = "Unauthorized"
+
+        def raise_for_status():
+            raise requests.exceptions.HTTPError(response=response)
+
+    return RevokedAnswer
+
+
+def test_revoked_secondary_identity_provider_token_is_renewed(client_app, mocker):
+    """A token refused by the identity provider is replaced, and the lookup sent again."""
+    token_request = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_token",
+        side_effect=[RevokedToken, ExpiringToken],
+    )
+    mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_users_from_email",
+        side_effect=revoked_token_users_by_email,
+    )
+
+    assert get_secondary_identity_provider_id_from_email("alice@rock.test") == "alice"
+    assert get_secondary_identity_provider_id_from_email("bob@rock.test") == "bob"
+    assert token_request.call_count == 2
+
+
+def test_revoked_token_is_renewed_once_for_several_emails(client_app, mocker):
+    token_request = mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_token",
+        side_effect=[RevokedToken, ExpiringToken],
+    )
+    mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_users_from_email",
+        side_effect=revoked_token_users_by_email,
+    )
+
+    usernames = get_secondary_identity_provider_ids_from_emails(
+        ["alice@rock.test", "bob@rock.test"]
+    )
+    assert usernames == {"alice@rock.test": "alice", "bob@rock.test": "bob"}
+    assert token_request.call_count == 2
+
+
+def test_get_apps_id_with_several_emails(cli_runner, client_app, mocker, caplog):
+    """The get-apps-id command resolves several emails at once."""
+    from b3desk.commands import bp
+
+    mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_token",
+        return_value=ExpiringToken,
+    )
+    mocker.patch(
+        "b3desk.nextcloud.get_secondary_identity_provider_users_from_email",
+        side_effect=users_by_email,
+    )
+
+    res = cli_runner.invoke(
+        bp.cli, ["get-apps-id", "alice@rock.test", "nobody@rock.test"]
+    )
+    assert res.exit_code == 0, res.output
+    assert "for email alice@rock.test: alice" in caplog.text
+    assert "for email nobody@rock.test: None" in caplog.text